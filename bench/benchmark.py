@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+#
+# Created by Alex Roland
+# For support, email alex.roland@peacefulnetworks.com
+# or open an issue on GitHub at https://github.com/Alex-Roland/exos_configurator/issues
+#
+# This script runs the version 1.4 and 1.5 build paths end to end against the fake exsh module in this folder and reports, per
+# scenario, the modelled switch time, the number of clicmd calls, show calls and script lines, and the local wall time.
+# Save a run with --save and compare later runs against it with --check to catch performance regressions when templates grow.
+#
+# Usage: python bench/benchmark.py
+#        python bench/benchmark.py --save bench/baseline.json
+#        python bench/benchmark.py --check bench/baseline.json
+#
+
+import argparse
+import json
+import os
+import runpy
+import shutil
+import string
+import sys
+import tempfile
+import time
+import warnings
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+import exsh
+import exoslib.apply
+import exoslib.estimate
+import exoslib.journal
+import exoslib.templates
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+# The scripts are written for the Python 2 interpreter on the switch
+if not hasattr(string, 'lowercase'):
+    string.lowercase = string.ascii_lowercase
+warnings.simplefilter('ignore', DeprecationWarning)
+
+SCRIPTS = {
+    '1.4': os.path.join(ROOT, 'exos_configurator_1-4.py'),
+    '1.5': os.path.join(ROOT, 'exos_configurator_1-5.py'),
+}
+SCENARIOS = [(stack, vlans) for stack in (1, 8) for vlans in (4, 100)]
+MODES = {
+    'batch': [],
+    'per-command': ['--per-command'],
+}
+TOLERANCE = 0.10
+
+def bench_vlans(count):
+    '''
+    This function returns count VLANs, starting with the default set
+    '''
+    vlans = dict(exoslib.templates.DEFAULT_VLANS)
+    tag = 100
+    while len(vlans) < count:
+        vlans['Bench{}'.format(tag)] = str(tag)
+        tag += 1
+    return vlans
+
+def answers_1_4(stack, vlans):
+    '''
+    This function returns the menu answers for a version 1.4 build
+    '''
+    # A stack is discovered from the hardware, the stacking question is only asked for a single switch
+    answers = [] if stack > 1 else ['n']
+    answers += ['1', '10.1.1.10']
+    answers += ['2', 'authkey123', 'privkey123', 'hmd-bench', 'bench closet']
+    answers += ['5', 'radiussecret', '6', 'password']
+    answers += ['7', str(stack), '48']
+    answers += ['8', '1:49,{}:49'.format(stack) if stack > 1 else '49']
+    answers += ['9', 'n'] + ['{} {}'.format(name, tag) for name, tag in sorted(vlans.items())] + ['q']
+    answers += ['10']
+    return answers
+
+def answers_1_5(stack, vlans):
+    '''
+    This function returns the menu answers for a version 1.5 build, which always uses the default VLAN set
+    '''
+    return ['1', '10.1.1.10', '2', 'hmd-bench', '3', str(stack), '4']
+
+def run(version, stack, vlan_count, mode, script_dir):
+    '''
+    This function runs one build against the fake switch and returns its measurements
+    '''
+    vlans = bench_vlans(vlan_count)
+    answers = (answers_1_4 if version == '1.4' else answers_1_5)(stack, vlans)
+    switch = exsh.configure(stack_amount=stack)
+    default_vlans = dict(exoslib.templates.DEFAULT_VLANS)
+    exoslib.templates.DEFAULT_VLANS.clear()
+    exoslib.templates.DEFAULT_VLANS.update(vlans if version == '1.5' else default_vlans)
+    exoslib.apply.SCRIPT_DIR = script_dir
+    exoslib.journal.JOURNAL_DIR = script_dir
+    exoslib.estimate.STATS_DIR = script_dir
+    feed = iter(answers)
+
+    def raw_input(prompt=''):
+        try:
+            return next(feed)
+        except StopIteration:
+            raise EOFError('ran out of answers at prompt: {}'.format(prompt))
+
+    saved = sys.argv, sys.stdout, getattr(builtins, 'raw_input', None)
+    # Pre-flight pings time the servers around the switch, not the build
+    sys.argv = [SCRIPTS[version], '--no-preflight'] + MODES[mode]
+    sys.stdout = open(os.devnull, 'w')
+    builtins.raw_input = raw_input
+    started = time.time()
+    error = None
+    try:
+        runpy.run_path(SCRIPTS[version], run_name='__main__')
+    except SystemExit:
+        pass
+    except Exception as e:
+        error = '{}: {}'.format(type(e).__name__, e)
+    finally:
+        elapsed = time.time() - started
+        sys.stdout.close()
+        sys.argv, sys.stdout, builtins.raw_input = saved
+        exoslib.templates.DEFAULT_VLANS.clear()
+        exoslib.templates.DEFAULT_VLANS.update(default_vlans)
+    return {
+        'name': '{} stack={} vlans={} {}'.format(version, stack, vlan_count, mode),
+        'switch_seconds': round(switch.clock, 2),
+        'calls': switch.calls,
+        'shows': switch.shows,
+        'script_lines': switch.lines,
+        'events': switch.events,
+        'wall_ms': round(elapsed * 1000, 1),
+        'error': error,
+    }
+
+def check(results, baseline_path):
+    '''
+    This function returns the scenarios that got slower or chattier than the baseline by more than the tolerance
+    '''
+    with open(baseline_path) as baseline_file:
+        baseline = dict((result['name'], result) for result in json.load(baseline_file))
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['name'])
+        if not previous:
+            continue
+        for key in ('switch_seconds', 'calls', 'shows'):
+            if result[key] > previous[key] * (1 + TOLERANCE) and result[key] - previous[key] >= 1:
+                regressions.append('{}: {} went from {} to {}'.format(result['name'], key, previous[key], result[key]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the configurator build paths against a fake switch')
+    parser.add_argument('--version', choices=sorted(SCRIPTS), action='append', help='only run this version (can be repeated)')
+    parser.add_argument('--save', help='write the results to a JSON baseline file')
+    parser.add_argument('--check', help='compare against a JSON baseline file and fail on regressions')
+    args = parser.parse_args()
+
+    script_dir = tempfile.mkdtemp(prefix='exos_bench_')
+    results = []
+    print('{:<36} {:>10} {:>7} {:>7} {:>8} {:>7} {:>9}'.format('scenario', 'switch s', 'calls', 'shows', 'lines', 'events', 'wall ms'))
+    for version in args.version or sorted(SCRIPTS):
+        for stack, vlans in SCENARIOS:
+            for mode in sorted(MODES):
+                result = run(version, stack, vlans, mode, script_dir)
+                results.append(result)
+                print('{:<36} {:>10} {:>7} {:>7} {:>8} {:>7} {:>9}'.format(result['name'], result['switch_seconds'], result['calls'], result['shows'], result['script_lines'], result['events'], result['wall_ms']))
+                if result['error']:
+                    print('\033[41m  {}\033[0m'.format(result['error']))
+    shutil.rmtree(script_dir)
+
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print('Results saved to {}'.format(args.save))
+    if args.check:
+        regressions = check(results, args.check)
+        for regression in regressions:
+            print('\033[41m{}\033[0m'.format(regression))
+        if regressions:
+            sys.exit(1)
+        print('\033[92mNo regressions against {}\033[0m'.format(args.check))
+    sys.exit(1 if any(result['error'] for result in results) else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+#
+# Fake exsh module for running the exos_configurator scripts off-switch.
+#
+# Put the bench folder first on sys.path and "from exsh import clicmd" picks this up instead of the real module. It keeps an
+# in-memory model of VLANs, VLAN ports, accounts, ports and the image version, answers the show commands the scripts use, runs
+# "load script" files line by line and raises RuntimeError for commands that would fail on a switch, like the real clicmd. The
+# configuration is printed the way EXOS prints it: "ports all" as the switch's port list and addresses with a dotted mask.
+#
+# Every call is charged against a latency model. By default the time is only added to a virtual clock so benchmarks run fast;
+# call configure(sleep=True) to really wait.
+#
+
+import re
+import time
+
+DEFAULT_LATENCY = {
+    'base': 0.05,
+    'show': 0.15,
+    'create': 0.10,
+    'enable': 0.08,
+    'configure': 0.06,
+    'save': 3.0,
+    'load': 0.20,
+    'download': 60.0,
+    'ping': 1.0,
+    'line': 0.02,
+    'netlogin': 0.30,
+    'stpd': 0.25,
+    'mac-locking': 0.20,
+    'reconverge': 0.50,
+}
+
+BASIC_TLVS = set(['port-description', 'system-name', 'system-description', 'system-capabilities', 'management-address'])
+SCRIPTING = ('enable cli scripting', 'disable cli scripting', 'endif')
+
+class FakeSwitch(object):
+    '''
+    This class is the in-memory switch behind the fake clicmd
+    '''
+    def __init__(self, stack_amount=1, port_count=52, image='31.7.1.4-patch1-98', latency=None, sleep=False, model='X465-48W', uplinks=None, unreachable=None, interrupt=None):
+        self.latency = dict(DEFAULT_LATENCY)
+        self.latency.update(latency or {})
+        self.sleep = sleep
+        self.image = image
+        self.partitions = {'primary': image, 'secondary': image}
+        self.booted = self.selected = 'primary'
+        self.config_selected = 'primary'
+        self.saved = {}
+        self.reboot_at = None
+        self.vlans = {'default': ('Default', '1'), 'mgmt': ('Mgmt', '4095'), 'netmgmt': ('NetMgmt', '90')}
+        self.vlan_ports = {}
+        self.accounts = set(['admin', 'user'])
+        self.stack_amount = stack_amount
+        self.port_count = port_count
+        self.model = model
+        # Fiber ports with link up, by default the first port after the copper ones on the first and last member
+        first_fiber = 49 if port_count > 48 else port_count
+        self.uplinks = set(uplinks or ([str(first_fiber)] if stack_amount == 1 else ['1:{}'.format(first_fiber), '{}:{}'.format(stack_amount, first_fiber)]))
+        self.config = []
+        # Protocols running on the switch, STP domain s0 is enabled out of the box
+        self.running = set(['s0'])
+        # Hosts that do not answer a ping, to try the pre-flight checks
+        self.unreachable = set(unreachable or [])
+        # A command that stops the build as if Ctrl-C was pressed when the switch reaches it, once
+        self.interrupt = interrupt
+        self.saved['primary'] = self.state()
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.calls = 0
+        self.shows = 0
+        self.lines = 0
+        self.clock = 0.0
+        self.events = 0
+        self.log = []
+
+    def charge(self, command, overhead):
+        '''
+        This function adds the modelled latency of a command to the clock
+        The overhead is the per-call cost (base for a clicmd round trip, line for a line inside a script), the rest depends on
+        the command type and the features it touches.
+        '''
+        words = command.split()
+        cost = overhead
+        if words and words[0] in self.latency:
+            cost += self.latency[words[0]]
+        for feature in ('netlogin', 'stpd', 'mac-locking'):
+            if feature in words:
+                cost += self.latency[feature]
+        self.clock += cost
+        if self.sleep:
+            time.sleep(cost)
+
+    def ports(self):
+        if self.stack_amount == 1:
+            return [str(port) for port in range(1, self.port_count + 1)]
+        return ['{}:{}'.format(slot, port) for slot in range(1, self.stack_amount + 1) for port in range(1, self.port_count + 1)]
+
+    def port_list(self):
+        if self.stack_amount == 1:
+            return '1-{}'.format(self.port_count)
+        return ','.join('{}:1-{}'.format(slot, self.port_count) for slot in range(1, self.stack_amount + 1))
+
+    def exos_form(self, words):
+        '''
+        This function returns a command in the form EXOS prints it in the configuration
+        '''
+        words = list(words)
+        lowered = [word.lower() for word in words]
+        for index in range(1, len(words)):
+            if lowered[index] == 'all' and lowered[index - 1] in ('port', 'ports') and 'delete' not in lowered:
+                words[index - 1:index + 1] = ['ports', self.port_list()]
+            elif lowered[index - 1] == 'ipaddress' and '/' in words[index]:
+                address, length = words[index].split('/')
+                bits = (0xffffffff << (32 - int(length))) & 0xffffffff
+                words[index] = '{} {}'.format(address, '.'.join(str(bits >> shift & 0xff) for shift in (24, 16, 8, 0)))
+        return ' '.join(words)
+
+    def addresses(self):
+        '''
+        This function returns the "show vlan" address column of every VLAN with an address in the configuration
+        '''
+        addresses = {}
+        for line in self.config:
+            words = line.split()
+            if words[:2] == ['configure', 'vlan'] and words[3:4] == ['ipaddress'] and len(words) > 5:
+                length = sum(bin(int(octet)).count('1') for octet in words[5].split('.'))
+                addresses[words[2].strip('"').lower()] = '{:<15}/{}'.format(words[4], length)
+        return addresses
+
+    def show(self, command):
+        self.shows += 1
+        if command.startswith('show vlan'):
+            rows = ['Name            VID  Protocol Addr       Flags', '-' * 60]
+            addresses = self.addresses()
+            rows.extend('{:<16}{:<5}{:<18}    ANY'.format(name, tag or '', addresses.get(name.lower(), '-' * 18)) for name, tag in sorted(self.vlans.values()))
+            match = re.search(r'include "?\^(\S+?)"?( )?"?$', command)
+            if match:
+                rows = [row for row in rows if row.startswith(match.group(1))]
+            return '\n'.join(rows)
+        if command.startswith('show accounts'):
+            return '\n'.join(['User Name    Access LoginOK  Failed', '-' * 36] + ['{:<13}RW     0        0'.format(name) for name in sorted(self.accounts)])
+        if command.startswith('show version'):
+            lines = ['Switch      : 800000-00-00 0000X-00000 Rev 1.0', 'Image   : ExtremeXOS version {} by release-manager'.format(self.image)]
+            return '\n'.join(line for line in lines if 'include Image' not in command or line.startswith('Image'))
+        if command.startswith('show switch'):
+            return '\n'.join([
+                'SysName:          bench',
+                'Image Selected:   {}'.format(self.selected),
+                'Image Booted:     {}'.format(self.booted),
+                'Config Selected:  {}.cfg'.format(self.config_selected),
+                'Primary ver:      {}'.format(self.partitions['primary']),
+                'Secondary ver:    {}'.format(self.partitions['secondary']),
+            ])
+        if command.startswith('show stacking'):
+            rows = ['Stack Topology is a Daisy-Chain', 'Node MAC Address    Slot  Stack State  Role     Flags', '-' * 54]
+            if self.stack_amount > 1:
+                rows.extend('{}00:04:96:00:00:{:02x}  {:<4}  Active       {:<7}  CA-'.format('*' if slot == 1 else ' ', slot, slot, 'Master' if slot == 1 else 'Standby') for slot in range(1, self.stack_amount + 1))
+            return '\n'.join(rows)
+        if command.startswith('show slot'):
+            rows = ['Slots    Type                 Configured           State       Ports  Flags', '-' * 79]
+            rows.extend('Slot-{:<4}{:<21}{:<21}Operational {:>5}  MB S'.format(slot, self.model, self.model, self.port_count) for slot in range(1, self.stack_amount + 1))
+            return '\n'.join(rows)
+        if command.startswith('show ports information detail'):
+            blocks = []
+            for port in self.ports():
+                number = int(port.split(':')[-1])
+                media = 'UTP' if number <= 48 else ('SF+_SR' if port in self.uplinks else 'NONE')
+                link = 'Active, 10Gbps, full-duplex' if port in self.uplinks else 'Ready'
+                blocks.append('Port:\t{}\n\tVirtual-router:\tVR-Default\n\tType:\t\t{}\n\tLink State:\t{}\n'.format(port, media, link))
+            return '\n'.join(blocks)
+        if command.startswith('show ports'):
+            return '\n'.join('{:<9}{:<21}{:<19}E     R'.format(port, '', 'Default') for port in self.ports())
+        if command.startswith('show configuration'):
+            lines = []
+            for key, (name, tag) in sorted(self.vlans.items()):
+                lines.append('create vlan "{}"'.format(name))
+                if tag:
+                    lines.append('configure vlan {} tag {}'.format(name, tag))
+            for (vlan, mode), ports in sorted(self.vlan_ports.items()):
+                lines.append('configure vlan {} add ports {} {}'.format(vlan, ','.join(ports), mode))
+            lines.extend('configure account {} encrypted "$5$bench$"'.format(name) for name in sorted(self.accounts))
+            return '\n'.join(lines + self.config)
+        return ''
+
+    def execute(self, command, args=None):
+        '''
+        This function applies one configuration command to the model and raises RuntimeError if a switch would reject it
+        args are the answers to the prompts, one per line; like on a switch the last answer is reused for any further prompt.
+        '''
+        words = command.split()
+        lowered = [word.lower() for word in words]
+        self.reconverge(lowered)
+        if lowered[:2] == ['create', 'vlan']:
+            name = words[2].strip('"')
+            if name.lower() in self.vlans:
+                raise RuntimeError('Error: VLAN {} already exists.'.format(name))
+            tag = words[4] if lowered[3:4] == ['tag'] else None
+            if tag and tag in [existing for _, existing in self.vlans.values()]:
+                raise RuntimeError('Error: VLAN tag {} is already in use.'.format(tag))
+            self.vlans[name.lower()] = (name, tag)
+        elif lowered[:2] == ['configure', 'vlan'] and lowered[3:5] == ['add', 'ports']:
+            for name in words[2].split(','):
+                matches = [vlan for vlan, tag in self.vlans.values() if name.lower() in (vlan.lower(), tag)]
+                if not matches:
+                    raise RuntimeError('Error: VLAN {} does not exist.'.format(name))
+                self.vlan_ports.setdefault((matches[0], words[6] if len(words) > 6 else 'untagged'), []).append(self.port_list() if lowered[5] == 'all' else words[5])
+        elif lowered[:2] == ['configure', 'lldp'] and 'advertise' in lowered and set(lowered[lowered.index('advertise') + 1:]) <= BASIC_TLVS:
+            # The running configuration lists every advertised basic TLV on its own line
+            split = lowered.index('advertise') + 1
+            self.config.extend(' '.join(words[:split] + [tlv]) for tlv in words[split:])
+        elif lowered[:2] == ['delete', 'account']:
+            if words[2].lower() not in self.accounts:
+                raise RuntimeError('Error: Account {} does not exist.'.format(words[2]))
+            self.accounts.discard(words[2].lower())
+        elif lowered[:2] == ['download', 'url']:
+            match = re.search(r'-(\d+\.\d+\.\d+\.\d+\S*)\.xos$', command)
+            if not match:
+                raise RuntimeError('Error: {} is not an image file.'.format(words[2]))
+            alternate = 'secondary' if self.booted == 'primary' else 'primary'
+            self.partitions[alternate] = match.group(1)
+        elif lowered[:2] == ['use', 'image']:
+            self.selected = lowered[2]
+        elif lowered[:1] == ['save']:
+            name = lowered[2] if lowered[1:2] == ['configuration'] else self.config_selected
+            self.saved[name] = self.state()
+            answers = (args or 'y').lower().split('\n')
+            if name != self.config_selected and answers[min(1, len(answers) - 1)].strip() == 'y':
+                # "Do you want to make NAME.cfg the default database?"
+                self.config_selected = name
+        elif lowered[:2] == ['use', 'configuration']:
+            self.config_selected = lowered[2]
+        elif lowered[:1] == ['reboot']:
+            if lowered[1:2] == ['time']:
+                self.reboot_at = ' '.join(words[2:])
+            elif lowered[1:2] == ['cancel']:
+                self.reboot_at = None
+            else:
+                self.reboot()
+        elif 'bogus' in lowered:
+            raise RuntimeError("%% Invalid input detected at '^' marker.")
+        else:
+            self.config.append(self.exos_form(words))
+
+    def reconverge(self, lowered):
+        '''
+        This function tracks which protocols run and charges a reconvergence for every port change to a running protocol
+        '''
+        if lowered[:2] == ['enable', 'stpd']:
+            self.running.add(lowered[2])
+        elif lowered == ['enable', 'mac-locking'] or (lowered[:2] == ['enable', 'netlogin'] and len(lowered) == 3):
+            self.running.add(lowered[1])
+        elif 'ports' in lowered:
+            if 'stpd' in lowered:
+                protocol = lowered[lowered.index('stpd') + 1]
+            else:
+                protocol = 'mac-locking' if 'mac-locking' in lowered else ('netlogin' if 'netlogin' in lowered else None)
+            if protocol in self.running:
+                self.events += 1
+                self.clock += self.latency['reconverge']
+                if self.sleep:
+                    time.sleep(self.latency['reconverge'])
+
+    def state(self):
+        return dict(self.vlans), dict((key, list(ports)) for key, ports in self.vlan_ports.items()), set(self.accounts), list(self.config)
+
+    def reboot(self):
+        '''
+        This function boots the selected image and configuration, or an empty configuration if it was never saved
+        '''
+        self.booted = self.selected
+        self.image = self.partitions[self.booted]
+        vlans, vlan_ports, accounts, config = self.saved.get(self.config_selected, ({}, {}, set(), []))
+        self.vlans, self.vlan_ports, self.accounts, self.config = dict(vlans), dict(vlan_ports), set(accounts), list(config)
+        self.reboot_at = None
+
+    def load_script(self, path):
+        '''
+        This function runs an EXOS script file and prints the marker of every failed command like CLI scripting would
+        '''
+        output = []
+        failed = False
+        with open(path) as script:
+            for line in script:
+                line = line.strip()
+                self.lines += 1
+                if not line or line in SCRIPTING or line.startswith('#') or line.startswith('if ('):
+                    continue
+                if line.startswith('set var') or line.startswith('show var'):
+                    if failed and line.startswith('set var'):
+                        output.append(line.split('"')[1])
+                    continue
+                if self.interrupt and line.startswith(self.interrupt):
+                    self.interrupt = None
+                    raise KeyboardInterrupt
+                self.charge(line, self.latency['line'])
+                try:
+                    self.execute(line)
+                    failed = False
+                except RuntimeError as e:
+                    output.append(str(e))
+                    failed = True
+        return '\n'.join(output)
+
+    def ping(self, command):
+        '''
+        This function answers a ping, hosts in unreachable get no replies
+        '''
+        words = command.split()
+        host = words[-1]
+        count = int(words[words.index('count') + 1]) if 'count' in words else 4
+        received = 0 if host in self.unreachable else count
+        return 'Ping(ICMP) {}: {} packets, 8 data bytes, interval 1 second(s).\n--- ping statistics ---\n{} packets transmitted, {} packets received, {}% loss'.format(host, count, count, received, 100 - received * 100 // count)
+
+    def clicmd(self, command, capture=False, xml=False, args=None):
+        self.calls += 1
+        self.log.append(command)
+        self.charge(command, self.latency['base'])
+        command = command.strip()
+        if command.startswith('show '):
+            output = self.show(command)
+        elif command.startswith('load script '):
+            output = self.load_script(command.split()[2])
+        elif command.startswith('ping '):
+            output = self.ping(command)
+        else:
+            self.execute(command, args)
+            output = ''
+        return output if capture else None
+
+switch = FakeSwitch()
+
+def configure(**kwargs):
+    '''
+    This function replaces the fake switch, for example configure(stack_amount=8, sleep=True), and returns it
+    '''
+    global switch
+    switch = FakeSwitch(**kwargs)
+    return switch
+
+def clicmd(command, capture=False, xml=False, args=None):
+    return switch.clicmd(command, capture, xml, args)
@@ -9,12 +9,27 @@
 # Version: 1.4
 # Built: 05/26/2022
 
+import argparse
+import getpass
 import os
-import random
-import string
 import sys
-from crypt import crypt
 from exsh import clicmd
+from exoslib.answers import answer, ask, clear_screen, read_answers
+from exoslib.apply import apply_commands, command_text
+from exoslib.credentials import KEY_ENV, CredentialStore, exos_hash
+from exoslib.diff import compute_delta, read_running_config
+from exoslib.estimate import LatencyRecorder, LatencyStats, print_estimate
+from exoslib.journal import Journal, plan_hash
+from exoslib.optimize import optimize
+from exoslib.portmap import read_port_map
+from exoslib.ports import parse_uplink, stack_ports
+from exoslib.preflight import BUDGET, management_address, ping_check, print_results, run_checks, targets
+from exoslib.rollback import SNAPSHOT_NAME, Rollback
+from exoslib.schedule import schedule
+from exoslib.snapshot import SwitchSnapshot
+from exoslib.templates import DEFAULT_VLANS, gateway_for, plan_1_4, site_servers
+from exoslib.trace import TracedCLI
+from exoslib.verify import print_report, verify_plan
 
 def get_severity(x):
     '''
@@ -29,27 +44,13 @@ def get_severity(x):
         7: 'debug-summary',
     }.get(x, 'info')
 
-def hash_password():
+def hash_password(password=None):
     '''
     This function returns a hashed password with the correct salt size for EXOS
     '''
-    salt = ''.join(random.choice(string.lowercase) for _ in range(6))
-    return crypt(raw_input('Admin password: '), '$5${}'.format(salt))
-
-def get_ports(edge_ports, x):
-    '''
-    This function returns a formatted port string depending on the number of switches in the stack
-    '''
-    return {
-        1: '1-{0}'.format(edge_ports),
-        2: '1:1-{0},2:1-{0}'.format(edge_ports),
-        3: '1:1-{0},2:1-{0},3:1-{0}'.format(edge_ports),
-        4: '1:1-{0},2:1-{0},3:1-{0},4:1-{0}'.format(edge_ports),
-        5: '1:1-{0},2:1-{0},3:1-{0},4:1-{0},5:1-{0}'.format(edge_ports),
-        6: '1:1-{0},2:1-{0},3:1-{0},4:1-{0},5:1-{0},6:1-{0}'.format(edge_ports),
-        7: '1:1-{0},2:1-{0},3:1-{0},4:1-{0},5:1-{0},6:1-{0},7:1-{0}'.format(edge_ports),
-        8: '1:1-{0},2:1-{0},3:1-{0},4:1-{0},5:1-{0},6:1-{0},7:1-{0},8:1-{0}'.format(edge_ports),
-    }.get(x, '1-48')
+    if password is None:
+        password = raw_input('Admin password: ')
+    return exos_hash(password)
 
 def get_vlans():
     '''
@@ -57,13 +58,8 @@ def get_vlans():
     '''
     selection = raw_input('Do you want the default VLAN set? (y/N): ')
     if selection.lower() == 'y':
-        return {
-            # You can define a default VLAN set here if you don't want to have to keep entering values when running this script. Examples are below:
-            'Staff': '10',
-            'Student': '5',
-            'AV': '15',
-            'VoIP': '99',
-        }
+        # The default VLAN set is defined in exoslib/templates.py
+        return dict(DEFAULT_VLANS)
     elif selection.lower() == 'n' or selection == '':
         vlans = {}
         while True:
@@ -104,7 +100,7 @@ def report_issues():
     '''
     This function displays the report issues tip
     '''
-    os.system('clear')
+    clear_screen()
     print('To report an issue, please use the GitHub repo issues page located at:')
     print('\033[4;94mhttps://github.com/Alex-Roland/exos_configurator/issues\033[0m')
     print('\nIf you get a traceback error, please include it in the issue report.')
@@ -135,70 +131,157 @@ edge_ports = None
 uplink = None
 is_stack = None
 vlans = {}
-copper_uplink = False
 done = False
+build_ok = True
+parser = argparse.ArgumentParser(description='Build the EXOS switch configuration')
+parser.add_argument('--answers', help='read the menu values from a JSON or YAML answer file and build without prompting')
+parser.add_argument('--per-command', action='store_true', help='send every command with its own clicmd call instead of one EXOS script')
+parser.add_argument('--incremental', action='store_true', help='only send what differs from the running configuration')
+parser.add_argument('--no-optimize', action='store_true', help='send the plan without merging or dropping commands')
+parser.add_argument('--no-verify', action='store_true', help='do not read the configuration back and check it after the build')
+parser.add_argument('--confirm', type=int, default=0, metavar='MINUTES', help='reboot into the configuration snapshot unless the new configuration is confirmed within MINUTES')
+parser.add_argument('--no-discover', action='store_true', help='ask for the switch quantity, edge ports and uplinks instead of reading them from the hardware')
+parser.add_argument('--credentials', metavar='FILE', help='look up the admin password hash and the SNMP and RADIUS secrets in an encrypted credential store')
+parser.add_argument('--epoch', help='credential rotation epoch to use (default: the current one of every credential)')
+parser.add_argument('--port-map', metavar='FILE', help='CSV file with per-port descriptions, untagged VLANs, PoE priorities and voice VLANs')
+parser.add_argument('--no-preflight', action='store_true', help='do not check that the gateway, RADIUS, syslog and NTP servers answer before the build')
+parser.add_argument('--preflight-timeout', type=float, default=BUDGET, metavar='SECONDS', help='time budget shared by all pre-flight checks (default: {})'.format(BUDGET))
+parser.add_argument('--dry-run', action='store_true', help='print the command plan and its estimated build time without changing the switch')
+parser.add_argument('--trace', action='store_true', help='time every call to the switch and write a trace file to /usr/local/ext')
+args = parser.parse_args()
+port_map = args.port_map
+credentials = args.credentials
+credential_epoch = args.epoch
+batch_apply = not args.per_command
+incremental = args.incremental
+optimize_plan = not args.no_optimize
+tracing = args.trace
+if tracing:
+    clicmd = TracedCLI(clicmd)
+snapshot = SwitchSnapshot(clicmd)
 
-ips = {
-    'radius_pri': '10.0.0.1',
-    'radius_sec': '10.0.0.2',
-    'syslog_pri': '10.0.0.3',
-    'syslog_sec': '10.0.0.4',
-}
+hardware = None
+if not args.no_discover:
+    try:
+        hardware = snapshot.hardware
+    except Exception as e:
+        print('\033[41mHardware discovery failed, enter the switch details by hand: {}\033[0m'.format(e))
+    if hardware and hardware.ports:
+        stack_amount = hardware.stack_amount
+        is_stack = stack_amount > 1
+        if hardware.edge_ports in (12, 24, 48):
+            edge_ports = hardware.edge_ports
+            ports = stack_ports(stack_amount, edge_ports)
+        if hardware.uplinks():
+            uplink = str(hardware.uplinks())
+    else:
+        hardware = None
 
-try:
-    os.system('clear')
-    acknowlegement = raw_input('\nAre you configuring a stack consisting of more than one switch? (y/N): ')
-    if str(acknowlegement).lower() == 'y':
-        verification = raw_input('Did you already run "enable stacking" on the primary member? (y/N): ')    
-        if str(verification).lower() == 'y':
-            is_stack = True
+answers = None
+if args.answers:
+    try:
+        answers = read_answers(args.answers)
+        port_map = answer(answers, 'port_map', port_map)
+        credentials = answer(answers, 'credentials', credentials)
+        credential_epoch = answer(answers, 'credential_epoch', credential_epoch)
+        switch_ip = answer(answers, 'switch_ip')
+        gateway_ip = answer(answers, 'gateway_ip', gateway_for(switch_ip) if switch_ip else None)
+        snmp_auth = answer(answers, 'snmp_auth')
+        snmp_priv = answer(answers, 'snmp_priv')
+        snmp_name = answer(answers, 'snmp_name')
+        snmp_location = answer(answers, 'snmp_location', snmp_name)
+        servers = site_servers(snmp_name or '') or (None, None, None)
+        syslog_ip = answer(answers, 'syslog_ip', servers[0])
+        facility = answer(answers, 'facility', facility)
+        severity = get_severity(int(answer(answers, 'severity', 6)))
+        radius_primary = answer(answers, 'radius_primary', servers[1])
+        radius_secondary = answer(answers, 'radius_secondary', servers[2])
+        radius_secret = answer(answers, 'radius_secret')
+        admin_password = answer(answers, 'admin_password_hash')
+        if not admin_password and answer(answers, 'admin_password'):
+            admin_password = hash_password(answer(answers, 'admin_password'))
+        stack_amount = int(answer(answers, 'stack_amount', stack_amount or 1))
+        edge_ports = int(answer(answers, 'edge_ports', edge_ports or 48))
+        if stack_amount not in range(1,9) or edge_ports not in (12, 24, 48):
+            raise ValueError('stack_amount must be 1-8 and edge_ports 12, 24 or 48')
+        is_stack = stack_amount > 1
+        ports = stack_ports(stack_amount, edge_ports)
+        uplink = str(parse_uplink(answer(answers, 'uplink', uplink or ''), stack_amount))
+        if answers.get('vlans') == 'default':
+            vlans = dict(DEFAULT_VLANS)
         else:
-            stacking = raw_input('Would you like to run "enable stacking" now? This will reboot the switch! (y/N): ')
-            if str(stacking).lower() == 'y':
-                print('Enabling stacking support...please wait...')
-                clicmd('enable stacking')
-                sys.exit(0)
-            else:
-                print('Please enable stacking first before running this script')
-                sys.exit(0)
-    elif str(acknowlegement).lower() == 'n' or acknowlegement == '':
-        pass
-    else:
-        print('Exiting...')
-        sys.exit(0)
-except TypeError:
-    sys.exit(0)
-except KeyboardInterrupt:
-    sys.exit(0)
+            vlans = dict((str(vlan), str(tag)) for vlan, tag in (answers.get('vlans') or {}).items())
+    except (IOError, OSError, ValueError, AttributeError) as e:
+        print('\033[41mUnable to use the answer file {}: {}\033[0m'.format(args.answers, e))
+        sys.exit(1)
 
-while True:
-    os.system('clear')
-    menu()
+if credentials:
+    # Look the credentials up instead of prompting for them and hashing the password again
     try:
-        choice = int(raw_input('Enter your selection [1-12]: '))
-    except ValueError:
-        raw_input('\nPlease enter a number for selection')
-        continue
+        found = CredentialStore(credentials, os.environ.get(KEY_ENV) or getpass.getpass('Passphrase for {}: '.format(credentials))).lookup_all(credential_epoch)
+    except (IOError, OSError, ValueError) as e:
+        print('\033[41mUnable to use the credential store {}: {}\033[0m'.format(credentials, e))
+        sys.exit(1)
+    admin_password = admin_password or found.get('admin_password')
+    radius_secret = radius_secret or found.get('radius_secret')
+    snmp_auth = snmp_auth or found.get('snmp_auth')
+    snmp_priv = snmp_priv or found.get('snmp_priv')
+    del found
+
+if answers is None and not is_stack:
+    try:
+        clear_screen()
+        acknowlegement = raw_input('\nAre you configuring a stack consisting of more than one switch? (y/N): ')
+        if str(acknowlegement).lower() == 'y':
+            verification = raw_input('Did you already run "enable stacking" on the primary member? (y/N): ')    
+            if str(verification).lower() == 'y':
+                is_stack = True
+            else:
+                stacking = raw_input('Would you like to run "enable stacking" now? This will reboot the switch! (y/N): ')
+                if str(stacking).lower() == 'y':
+                    print('Enabling stacking support...please wait...')
+                    clicmd('enable stacking')
+                    sys.exit(0)
+                else:
+                    print('Please enable stacking first before running this script')
+                    sys.exit(0)
+        elif str(acknowlegement).lower() == 'n' or acknowlegement == '':
+            pass
+        else:
+            print('Exiting...')
+            sys.exit(0)
     except TypeError:
         sys.exit(0)
     except KeyboardInterrupt:
         sys.exit(0)
+
+while True:
+    if answers is not None:
+        # Everything comes from the answer file, go straight to the build
+        choice = 10
+    else:
+        clear_screen()
+        menu()
+        try:
+            choice = int(raw_input('Enter your selection [1-12]: '))
+        except ValueError:
+            raw_input('\nPlease enter a number for selection')
+            continue
+        except TypeError:
+            sys.exit(0)
+        except KeyboardInterrupt:
+            sys.exit(0)
     if choice == 1:
         switch_ip = raw_input('IP: ')
-        gateway_ip = '254'.join(switch_ip.rsplit(switch_ip.split('.')[3], 1))
+        gateway_ip = gateway_for(switch_ip)
     elif choice == 2:
         snmp_auth = raw_input('Auth: ')
         snmp_priv = raw_input('Priv: ')
         snmp_name = raw_input('Hostname: ')
         snmp_location = raw_input('Location: ')
-        if 'hmd' in snmp_name.lower():
-            syslog_ip = ips['syslog_pri']
-            radius_primary = ips['radius_pri']
-            radius_secondary = ips['radius_sec']
-        elif 'wst' in snmp_name.lower():
-            syslog_ip = ips['syslog_sec']
-            radius_primary = ips['radius_sec']
-            radius_secondary = ips['radius_pri']
+        servers = site_servers(snmp_name)
+        if servers:
+            syslog_ip, radius_primary, radius_secondary = servers
         else:
             raw_input('Unable to determine location based IPs\nMust have "pri" or "sec" in the hostname')
     elif choice == 3:
@@ -229,144 +312,137 @@ while True:
                 stack_amount = None
                 edge_ports = None
                 continue
-            ports = get_ports(edge_ports, stack_amount)
+            ports = stack_ports(stack_amount, edge_ports)
         else:
             raw_input('\nInvalid selection...')
     elif choice == 8:
-        uplink = str(raw_input('Uplink port(s): '))
-        if stack_amount > 1 and ':' not in uplink:
-            raw_input('\nSince there is more than one switch in the stack, please input the uplink with the colon format\n\ti.e: 1:48')
+        if not stack_amount:
+            raw_input('\nPlease enter the switch quantity (option 7) before the uplink port(s)')
+            continue
+        try:
+            uplink = str(parse_uplink(raw_input('Uplink port(s): '), stack_amount))
+        except ValueError as e:
+            raw_input('\nInvalid uplink port(s): {}\n\ti.e: 1:48 or 1:48,2:48'.format(e))
             uplink = None
             continue
-        elif stack_amount == 1 and ':' in uplink:
-            uplink = int(uplink.split(':')[1])
-            if uplink < 49:
-                copper_uplink = True
-            else:
-                copper_uplink = False
-        elif stack_amount == 1 and ':' not in uplink:
-            if int(uplink) < 49:
-                copper_uplink = True
-            else:
-                copper_uplink = False
-        elif stack_amount > 1 and ',' in uplink:
-            primary_uplink = uplink.split(',')[0]
-            secondary_uplink = uplink.split(',')[1]
-            if int(primary_uplink.split(':')[1]) < 49 or int(secondary_uplink.split(':')[1]) < 49:
-                copper_uplink = True
-            else:
-                copper_uplink = False
-        elif stack_amount > 1 and ',' not in uplink:
-            if int(uplink.split(':')[1]) < 49:
-                copper_uplink = True
-            else:
-                copper_uplink = False
     elif choice == 9:
         vlans = get_vlans()
     elif choice == 10:
         if switch_ip and gateway_ip and snmp_auth and snmp_priv and snmp_name and snmp_location and syslog_ip and radius_primary and radius_secondary and facility and severity and radius_secret and admin_password and stack_amount and ports and edge_ports and uplink:
             print('Building configuration...this may take a couple minutes...')
-            commands = [
-                'configure Default delete ports all',
-                'configure vlan NetMgmt ipaddress {} 255.255.255.0'.format(switch_ip),
-                'configure iproute add default {}'.format(gateway_ip),
-                'configure snmp sysContact hostmaster@example.com',
-                'configure snmp sysName {}'.format(snmp_name.lower()),
-                'configure snmp sysLocation {}'.format(snmp_location.lower()),
-                'configure snmpv3 add user snmpuser authentication md5 {} privacy des {}'.format(snmp_auth, snmp_priv),
-                'configure snmpv3 add group public user snmpuser sec-model usm',
-                'configure snmpv3 add access public sec-model usm sec-level priv read-view "defaultAdminView" write-view "defaultAdminView" notify-view "defaultAdminView"',
-                'enable snmp access snmpv3',
-                'enable ssh2',
-                'disable telnet',
-                'disable web http',
-                'enable igmp snooping',
-                'configure ports {} rate-limit flood broadcast 500'.format(ports),
-                'create stpd s1',
-                'disable s0 auto-bind Default',
-                'configure mstp revision 3',
-                'configure stpd s1 mode mstp msti 1',
-                'enable s1 auto-bind vlan 1-4094',
-                'enable stpd s1',
-                'enable mac-locking',
-                'enable mac-locking ports {}'.format(ports),
-                'configure mac-locking ports {} first-arrival limit-learning 8'.format(ports),
-                'configure stpd s0 ports link-type edge {} edge-safeguard enable bpdu-restrict'.format(ports),
-                'configure stpd s1 ports link-type edge {} edge-safeguard enable bpdu-restrict'.format(ports),
-                'create vlan nt_login',
-                'enable policy',
-                'enable netlogin mac',
-                'configure netlogin mac authentication database-order radius',
-                'configure netlogin add mac-list ff:ff:ff:ff:ff:ff 48',
-                'configure netlogin mac timers reauth-period 3600',
-                'enable netlogin ports {} mac'.format(ports),
-                'enable lldp port all',
-                'configure vlan VoIP add ports {} tagged'.format(ports),
-                'configure lldp ports {} advertise port-description'.format(ports),
-                'configure lldp ports {} advertise system-capabilities'.format(ports),
-                'configure lldp ports {} advertise management-address'.format(ports),
-                'configure lldp ports {} advertise vendor-specific dot3 power-via-mdi'.format(ports),
-                'configure lldp ports {} advertise vendor-specific med capabilities'.format(ports),
-                'configure sntp-client primary 10.1.1.1',
-                'configure sntp-client secondary 10.1.1.2',
-                'enable sntp-client',
-                'configure timezone name CST -360 autodst name CDT begins every second sunday march at 2 0 ends every first sunday november at 2 0',
-                'configure syslog {} vr VR-Default {}'.format(syslog_ip, facility),
-                'configure syslog {} vr VR-Default {} severity {}'.format(syslog_ip, facility, severity),
-                'enable log target syslog {} vr VR-Default {}'.format(syslog_ip, facility),
-                'configure radius mgmt-access 3 server {} 1812 client-ip {} vr VR-Default'.format(radius_primary, switch_ip),
-                'configure radius mgmt-access 4 server {} 1812 client-ip {} vr VR-Default'.format(radius_secondary, switch_ip),
-                'configure radius 3 shared-secret {}'.format(radius_secret),
-                'configure radius 4 shared-secret {}'.format(radius_secret),
-                'enable radius mgmt-access',
-                'configure account admin encrypted {}'.format(admin_password),
-            ]
-            uplink_commands = [
-                'configure ports {} rate-limit flood broadcast no-limit'.format(uplink),
-                'disable mac-locking ports {}'.format(uplink),
-                'configure mac-locking ports {} first-arrival limit-learning 600'.format(uplink),
-                'configure stpd s0 ports link-type auto {}'.format(uplink),
-                'configure stpd s0 ports edge-safeguard disable {}'.format(uplink),
-                'configure stpd s0 ports bpdu-restrict disable {}'.format(uplink),
-                'configure stpd s1 ports link-type auto {}'.format(uplink),
-                'configure stpd s1 ports edge-safeguard disable {}'.format(uplink),
-                'configure stpd s1 ports bpdu-restrict disable {}'.format(uplink),
-                'disable netlogin ports {} mac'.format(uplink),
-                'unconfigure lldp ports {}'.format(uplink),
-            ]
-
-            try:
-                if 'user' in clicmd('show accounts', True):
-                    clicmd('delete account user')
-            except:
-                print('\033[41mThere were errors deleting the user account\033[0m')
+            settings = dict(
+                switch_ip=switch_ip,
+                gateway_ip=gateway_ip,
+                snmp_name=snmp_name,
+                snmp_location=snmp_location,
+                snmp_auth=snmp_auth,
+                snmp_priv=snmp_priv,
+                ports=ports,
+                syslog_ip=syslog_ip,
+                facility=facility,
+                severity=severity,
+                radius_primary=radius_primary,
+                radius_secondary=radius_secondary,
+                radius_secret=radius_secret,
+                admin_password=admin_password,
+            )
 
-            for vlan in vlans:
-                if vlan in clicmd('show vlan | include ^{}'.format(vlan), True):
-                    continue
-                else:
-                    try:
-                        clicmd('create vlan {} tag {}'.format(vlan, vlans[vlan]))
-                        clicmd('configure vlan {} add ports {} tagged'.format(vlan, uplink))
-                    except:
-                        print('\033[41mThere were issues adding VLAN {}\033[0m'.format(vlan))
+            journal = Journal(observer=snapshot.note_command)
+            port_commands = []
+            if port_map:
+                try:
+                    port_commands = read_port_map(port_map, vlans, hardware.all_ports() if hardware else None)
+                except (IOError, OSError, ValueError) as e:
+                    print('\033[41mUnable to use the port map {}: {}\033[0m'.format(port_map, e))
+                    sys.exit(1)
+                print('Port map: {} range command(s) from {}'.format(len(port_commands), port_map))
+            intended = plan_1_4(vlans, uplink, **settings) + port_commands
+            key = plan_hash(intended)
+            if not args.dry_run and not args.no_preflight:
+                if not management_address(snapshot.show('show vlan')):
+                    print('\033[41mPre-flight checks skipped, NetMgmt has no IP address yet so the switch cannot reach the servers. Check them after the build\033[0m')
+                elif not print_results(run_checks(targets(intended), ping_check(clicmd), args.preflight_timeout)):
+                    print('\033[41mPre-flight checks failed, nothing was changed on the switch. Fix the servers above or use --no-preflight\033[0m')
+                    sys.exit(1)
+            plan = journal.resume(key, intended) if not args.dry_run else None
+            if plan is not None:
+                # In batch mode progress is only recorded per script chunk, skip what the interrupted build already applied
+                plan = compute_delta(plan, read_running_config(clicmd), hardware.all_ports() if hardware else None)
+            if plan is not None and ask(answers, 'resume', 'A previous build of this configuration did not finish, {} of {} command(s) are not on the switch yet. Resume it? (Y/n): '.format(len(plan), len(journal.plan)), 'y').lower() == 'n':
+                plan = None
+            resumed = plan is not None
 
-            for command in commands:
+            if plan is None:
+                plan = []
                 try:
-                    clicmd('{}'.format(command))
+                    if snapshot.has_account('user'):
+                        plan.append('delete account user')
                 except:
-                    print('\033[41mThere were errors running this command: {}\033[0m'.format(command))
+                    print('\033[41mThere were errors deleting the user account\033[0m')
+
+                missing_vlans = dict((vlan, vlans[vlan]) for vlan in vlans if not snapshot.has_vlan(vlan))
+                plan.extend(plan_1_4(missing_vlans, uplink, **settings))
+                plan.extend(port_commands)
+
+                if incremental:
+                    plan = compute_delta(plan, read_running_config(clicmd), hardware.all_ports() if hardware else None)
+                    print('{} command(s) differ from the running configuration'.format(len(plan)))
+                if optimize_plan:
+                    plan, removed = optimize(plan)
+                    print('Optimizer removed {} command(s), sending {}'.format(removed, len(plan)))
+                if args.dry_run:
+                    steps = ['save configuration {}'.format(SNAPSHOT_NAME)] + schedule(plan) + ['save'] if plan else []
+                    print('Dry run, nothing is sent to the switch. The build would send:')
+                    for command in steps:
+                        print('  {}'.format(command_text(command)))
+                    print_estimate(LatencyStats(), steps, batch_apply)
+                    sys.exit(0)
+                journal.start(key, plan)
 
-            if copper_uplink:
-                for command in uplink_commands:
-                    try:
-                        clicmd('{}'.format(command))
-                    except:
-                        print('\033[41mThere were errors running this command: {}\033[0m'.format(command))
-            clicmd('save')
+            rollback = Rollback(clicmd)
+            if plan or resumed:
+                rollback.save(keep_existing=resumed)
+                if args.confirm:
+                    rollback.arm(args.confirm)
+                    print('The switch reboots into the configuration snapshot in {} minute(s) unless the new configuration is confirmed'.format(args.confirm))
+            stats = LatencyStats()
+            recorder = LatencyRecorder(clicmd, stats)
+            try:
+                failures = apply_commands(plan, recorder, batch=batch_apply, observer=journal.record)
+            except KeyboardInterrupt:
+                if rollback.armed:
+                    journal.finish()
+                    print('\n\033[41mBuild interrupted, the switch reboots into the configuration snapshot at the scheduled time\033[0m')
+                    sys.exit(1)
+                print('\n\033[41mBuild interrupted, run the script again to resume with the commands that are not on the switch yet\033[0m')
+                sys.exit(1)
+            for command, error in failures:
+                print('\033[41mThere were errors running this command: {}\033[0m'.format(command))
+            if (plan or resumed) and not rollback.armed:
+                recorder('save')
+            stats.save()
+            if not args.no_verify:
+                build_ok = print_report(verify_plan(intended, read_running_config(clicmd), hardware.all_ports() if hardware else None)) and not failures
+            else:
+                build_ok = not failures
+            journal.finish()
+            if rollback.armed:
+                keep = ask(answers, 'confirm', 'Keep the new configuration? Without a yes the switch reboots into the snapshot in {} minute(s) (y/N): '.format(args.confirm), 'y' if build_ok else 'n')
+                if str(keep).lower() == 'y':
+                    rollback.confirm()
+                    print('\033[92mNew configuration confirmed and saved\033[0m')
+                else:
+                    print('\033[41mRolling back to the configuration snapshot, the switch will reboot...\033[0m')
+                    rollback.restore()
+                    sys.exit(1)
+            if tracing:
+                clicmd.summary()
             done = True
             break
         else:
+            if answers is not None:
+                print('\033[41mThe answer file {} does not define every value, make sure all variables have the correct value before proceeding\033[0m'.format(args.answers))
+                sys.exit(1)
             raw_input('\033[41m\nAt least one variable is not defined, make sure all variables have the correct value before proceeding\033[0m\n')
     elif choice == 11:
         report_issues()
@@ -376,4 +452,7 @@ while True:
         raw_input('\nInvalid selection, please try again...')
 
 if done:
-    print('\033[92m\nConfiguration built\033[0m')
\ No newline at end of file
+    if build_ok:
+        print('\033[92m\nConfiguration built\033[0m')
+    else:
+        print('\033[41m\nConfiguration built with errors, check the commands and settings above\033[0m')
\ No newline at end of file
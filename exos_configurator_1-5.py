@@ -9,24 +9,25 @@
 # Version: 1.5
 # Built: 10/05/2023
 
-import os
+import argparse
 import sys
 from exsh import clicmd
-
-def get_ports(x):
-    '''
-    This function returns a formatted port string depending on the number of switches in the stack
-    '''
-    return {
-        1: '1:1-48',
-        2: '1:1-48,2:1-48',
-        3: '1:1-48,2:1-48,3:1-48',
-        4: '1:1-48,2:1-48,3:1-48,4:1-48',
-        5: '1:1-48,2:1-48,3:1-48,4:1-48,5:1-48',
-        6: '1:1-48,2:1-48,3:1-48,4:1-48,5:1-48,6:1-48',
-        7: '1:1-48,2:1-48,3:1-48,4:1-48,5:1-48,6:1-48,7:1-48',
-        8: '1:1-48,2:1-48,3:1-48,4:1-48,5:1-48,6:1-48,7:1-48,8:1-48',
-    }.get(x, None)
+from exoslib.answers import answer, ask, clear_screen, read_answers
+from exoslib.apply import apply_commands, command_text
+from exoslib.diff import compute_delta, read_running_config
+from exoslib.estimate import LatencyRecorder, LatencyStats, print_estimate
+from exoslib.firmware import IMAGE_VERSION, FAILED, STAGED, stage_image
+from exoslib.journal import Journal, plan_hash
+from exoslib.optimize import optimize
+from exoslib.portmap import read_port_map
+from exoslib.ports import stack_ports
+from exoslib.preflight import BUDGET, management_address, ping_check, print_results, run_checks, targets
+from exoslib.rollback import SNAPSHOT_NAME, Rollback
+from exoslib.schedule import schedule
+from exoslib.snapshot import SwitchSnapshot
+from exoslib.templates import DEFAULT_VLANS, gateway_for, plan_1_5
+from exoslib.trace import TracedCLI
+from exoslib.verify import print_report, verify_plan
 
 def menu():
     '''
@@ -36,6 +37,8 @@ def menu():
     print('1. Switch IP: \033[92m{}\033[0m'.format(switch_ip if switch_ip else ''))
     print('2. Switch Name: \033[92m{}\033[0m'.format(snmp_name if snmp_name else ''))
     print('3. Switches: \033[92m{}\033[0m'.format(str(stack_amount) if stack_amount else ''))
+    if hardware and not hardware.has_ports('1:57-60'):
+        print('\033[41m   This switch has no ports 1:57-60 for the LACP uplinks\033[0m')
     print('4. Build the configuration')
     print('5. Exit')
     print(46 * "-")
@@ -44,109 +47,190 @@ switch_ip = None
 snmp_name = None
 stack_amount = None
 done = False
+build_ok = True
+firmware = None
+parser = argparse.ArgumentParser(description='Build the EXOS switch configuration')
+parser.add_argument('--answers', help='read the menu values from a JSON or YAML answer file and build without prompting')
+parser.add_argument('--per-command', action='store_true', help='send every command with its own clicmd call instead of one EXOS script')
+parser.add_argument('--incremental', action='store_true', help='only send what differs from the running configuration')
+parser.add_argument('--no-optimize', action='store_true', help='send the plan without merging or dropping commands')
+parser.add_argument('--no-firmware', action='store_true', help='do not check or stage the firmware image before the build')
+parser.add_argument('--no-verify', action='store_true', help='do not read the configuration back and check it after the build')
+parser.add_argument('--confirm', type=int, default=0, metavar='MINUTES', help='reboot into the configuration snapshot unless the new configuration is confirmed within MINUTES')
+parser.add_argument('--no-discover', action='store_true', help='ask for the switch quantity instead of reading it from the hardware')
+parser.add_argument('--port-map', metavar='FILE', help='CSV file with per-port descriptions, untagged VLANs, PoE priorities and voice VLANs')
+parser.add_argument('--no-preflight', action='store_true', help='do not check that the gateway, RADIUS, syslog and NTP servers answer before the build')
+parser.add_argument('--preflight-timeout', type=float, default=BUDGET, metavar='SECONDS', help='time budget shared by all pre-flight checks (default: {})'.format(BUDGET))
+parser.add_argument('--dry-run', action='store_true', help='print the command plan and its estimated build time without changing the switch')
+parser.add_argument('--trace', action='store_true', help='time every call to the switch and write a trace file to /usr/local/ext')
+args = parser.parse_args()
+port_map = args.port_map
+batch_apply = not args.per_command
+incremental = args.incremental
+optimize_plan = not args.no_optimize
+tracing = args.trace
+if tracing:
+    clicmd = TracedCLI(clicmd)
+snapshot = SwitchSnapshot(clicmd)
+
+hardware = None
+if not args.no_discover:
+    try:
+        hardware = snapshot.hardware
+    except Exception as e:
+        print('\033[41mHardware discovery failed, enter the switch details by hand: {}\033[0m'.format(e))
+    if hardware and hardware.ports:
+        stack_amount = hardware.stack_amount
+        edge_ports = stack_ports(stack_amount, hardware.edge_ports or 48, slotted=True)
+    else:
+        hardware = None
+
+answers = None
+if args.answers:
+    try:
+        answers = read_answers(args.answers)
+        port_map = answer(answers, 'port_map', port_map)
+        switch_ip = answer(answers, 'switch_ip')
+        gateway_ip = answer(answers, 'gateway_ip', gateway_for(switch_ip) if switch_ip else None)
+        snmp_name = answer(answers, 'snmp_name')
+        stack_amount = int(answer(answers, 'stack_amount', stack_amount or 1))
+        if stack_amount not in range(1,9):
+            raise ValueError('stack_amount must be 1-8')
+        edge_ports = stack_ports(stack_amount, (hardware.edge_ports or 48) if hardware else 48, slotted=True)
+    except (IOError, OSError, ValueError, AttributeError) as e:
+        print('\033[41mUnable to use the answer file {}: {}\033[0m'.format(args.answers, e))
+        sys.exit(1)
 
 # This is a dictionary of VLAN name to ID mappings
-vlans = {
-    'Staff': '10',
-    'Student': '5',
-    'AV': '15',
-    'VoIP': '99',
-}
+vlans = DEFAULT_VLANS
 
 while True:
-    os.system('clear')
-    menu()
-    try:
-        choice = int(raw_input('Enter your selection [1-5]: '))
-    except ValueError:
-        raw_input('\nPlease enter a number for selection')
-        continue
-    except TypeError:
-        sys.exit(0)
-    except KeyboardInterrupt:
-        sys.exit(0)
+    if answers is not None:
+        # Everything comes from the answer file, go straight to the build
+        choice = 4
+    else:
+        clear_screen()
+        menu()
+        try:
+            choice = int(raw_input('Enter your selection [1-5]: '))
+        except ValueError:
+            raw_input('\nPlease enter a number for selection')
+            continue
+        except TypeError:
+            sys.exit(0)
+        except KeyboardInterrupt:
+            sys.exit(0)
     if choice == 1:
         switch_ip = raw_input('IP: ')
-        gateway_ip = '254'.join(switch_ip.rsplit(switch_ip.split('.')[3], 1))
+        gateway_ip = gateway_for(switch_ip)
     elif choice == 2:
         snmp_name = raw_input('Hostname: ')
     elif choice == 3:
         stack_amount = int(raw_input('Switch Quantity [1-8]: '))
         if stack_amount in range(1,9):
-            edge_ports = get_ports(stack_amount)
+            edge_ports = stack_ports(stack_amount, (hardware.edge_ports or 48) if hardware else 48, slotted=True)
         else:
             raw_input('\nInvalid selection...')
     elif choice == 4:
         if switch_ip and gateway_ip and snmp_name and stack_amount and edge_ports:
             print('Building configuration...this may take a couple minutes...')
-            commands = [
-                'configure ports 1:57,{}:57 partition 4x10G'.format(stack_amount),
-                'configure ports 1:57-60,{}:57-60 auto off speed 10000 duplex full'.format(stack_amount),
-                'enable sharing 1:57 grouping 1:57,{}:57 lacp'.format(stack_amount),
-                'enable sharing 1:58 grouping 1:58,{}:58 lacp'.format(stack_amount),
-                'enable sharing 1:59 grouping 1:59,{}:59 lacp'.format(stack_amount),
-                'enable sharing 1:60 grouping 1:60,{}:60 lacp'.format(stack_amount),
-                'configure vlan Default delete ports all',
-                'create qosprofile "QP6"',
-                'configure qosprofile QP6 maxbuffer 100 use-strict-priority',
-                'configure qosprofile QP6 minbw 0 maxbw 100 ports {}'.format(edge_ports),
-                'configure diffserv examination code-point 24 qosprofile QP6',
-                'configure diffserv examination code-point 46 qosprofile QP6',
-                'enable diffserv examination ports {}'.format(edge_ports),
-                'disable dot1p examination ports all',
-                'configure vlan untagged-ports auto-move inform',
-                'configure cli moved-keywords show',
-                'configure cli idle-timeout 240',
-                'configure log target memory-buffer format timestamp hundredths date mm/dd/yyyy event-name condition severity',
-                'configure log target nvram format timestamp hundredths date mm/dd/yyyy event-name condition severity',
-                'configure log target console format timestamp hundredths date mm/dd/yyyy event-name condition severity',
-                'configure vlan Staff add ports {} untagged'.format(edge_ports),
-                'configure vlan NetMgmt ipaddress {}/23'.format(switch_ip),
-                'configure iproute add default {}'.format(gateway_ip),
-                'configure snmp sysContact "hostmaster@example.com, 999-888-7777"',
-                'configure snmp sysName {}'.format(snmp_name),
-                'configure snmp sysLocation {}'.format(snmp_name),
-                'disable snmpv3 default-group',
-                'enable snmp access snmpv3',
-                'enable ssh2',
-                'enable igmp snooping',
-                'enable lldp ports all',
-                'configure lldp ports all advertise all-tlvs',
-                'configure lldp ports all advertise vendor-specific med capabilities',
-                'configure lldp management-address vlan NetMgmt',
-                'configure ntp server add pool.ntp.org vr VR-Default',
-                'enable ntp vlan NetMgmt',
-                'configure vlan ElrpVlan add ports all tagged',
-                'configure timezone name EDT -300 autodst name EDT begins every second sunday march at 2 0 ends every first sunday november at 2 0',
-                'enable tech-support collector',
-                'enable loopback-mode vlan NetMgmt',
-                'configure stacking slot 2 master-capability off',
-                'configure stacking slot {} master-capability on'.format(stack_amount),
-            ]
+            settings = dict(switch_ip=switch_ip, gateway_ip=gateway_ip, snmp_name=snmp_name, stack_amount=stack_amount, edge_ports=edge_ports)
+            journal = Journal(observer=snapshot.note_command)
+            port_commands = []
+            if port_map:
+                try:
+                    port_commands = read_port_map(port_map, vlans, hardware.all_ports() if hardware else None)
+                except (IOError, OSError, ValueError) as e:
+                    print('\033[41mUnable to use the port map {}: {}\033[0m'.format(port_map, e))
+                    sys.exit(1)
+                print('Port map: {} range command(s) from {}'.format(len(port_commands), port_map))
+            intended = plan_1_5(vlans, **settings) + port_commands
+            key = plan_hash(intended)
+            if not args.dry_run and not args.no_preflight:
+                if not management_address(snapshot.show('show vlan')):
+                    print('\033[41mPre-flight checks skipped, NetMgmt has no IP address yet so the switch cannot reach the servers. Check them after the build\033[0m')
+                elif not print_results(run_checks(targets(intended), ping_check(clicmd), args.preflight_timeout)):
+                    print('\033[41mPre-flight checks failed, nothing was changed on the switch. Fix the servers above or use --no-preflight\033[0m')
+                    sys.exit(1)
+            if not args.no_firmware and not args.dry_run and IMAGE_VERSION not in snapshot.image:
+                # Stage the firmware before a --confirm reboot is scheduled, so the reboot never lands in the download
+                print('Staging firmware {}, this may take a few minutes...'.format(IMAGE_VERSION))
+                try:
+                    firmware = stage_image(clicmd)
+                except Exception as e:
+                    firmware = FAILED, 'Firmware staging failed: {}'.format(e)
+            plan = journal.resume(key, intended) if not args.dry_run else None
+            if plan is not None:
+                # In batch mode progress is only recorded per script chunk, skip what the interrupted build already applied
+                plan = compute_delta(plan, read_running_config(clicmd), hardware.all_ports() if hardware else None)
+            if plan is not None and ask(answers, 'resume', 'A previous build of this configuration did not finish, {} of {} command(s) are not on the switch yet. Resume it? (Y/n): '.format(len(plan), len(journal.plan)), 'y').lower() == 'n':
+                plan = None
+            resumed = plan is not None
 
-            for vlan in vlans:
-                if vlan in clicmd('show vlan | include "^{} "'.format(vlan), capture=True):
-                    continue
-                else:
-                    try:
-                        clicmd('create vlan {} tag {}'.format(vlan, vlans[vlan]))
-                        clicmd('configure vlan {} add ports 1:57-60 tagged'.format(vlan))
-                    except:
-                        print('\033[41mThere were issues adding VLAN {}\033[0m'.format(vlan))
+            if plan is None:
+                missing_vlans = dict((vlan, vlans[vlan]) for vlan in vlans if not snapshot.has_vlan(vlan))
+                plan = plan_1_5(missing_vlans, **settings) + port_commands
 
-            for command in commands:
-                try:
-                    if 'configure banner before-login save-to-configuration' in command:
-                        clicmd('{}'.format(command), args='*****Unauthorized access is prohibited:  All attempts logged*****')
-                    else:
-                        clicmd('{}'.format(command))
-                except:
-                    print('\033[41mThere were errors running this command: {}\033[0m'.format(command))
-                        
-            clicmd('save')
+                if incremental:
+                    plan = compute_delta(plan, read_running_config(clicmd), hardware.all_ports() if hardware else None)
+                    print('{} command(s) differ from the running configuration'.format(len(plan)))
+                if optimize_plan:
+                    plan, removed = optimize(plan)
+                    print('Optimizer removed {} command(s), sending {}'.format(removed, len(plan)))
+                if args.dry_run:
+                    steps = ['save configuration {}'.format(SNAPSHOT_NAME)] + schedule(plan) + ['save'] if plan else []
+                    print('Dry run, nothing is sent to the switch. The build would send:')
+                    for command in steps:
+                        print('  {}'.format(command_text(command)))
+                    print_estimate(LatencyStats(), steps, batch_apply)
+                    sys.exit(0)
+                journal.start(key, plan)
+
+            rollback = Rollback(clicmd)
+            if plan or resumed:
+                rollback.save(keep_existing=resumed)
+                if args.confirm:
+                    rollback.arm(args.confirm)
+                    print('The switch reboots into the configuration snapshot in {} minute(s) unless the new configuration is confirmed'.format(args.confirm))
+            stats = LatencyStats()
+            recorder = LatencyRecorder(clicmd, stats)
+            try:
+                failures = apply_commands(plan, recorder, batch=batch_apply, observer=journal.record)
+            except KeyboardInterrupt:
+                if rollback.armed:
+                    journal.finish()
+                    print('\n\033[41mBuild interrupted, the switch reboots into the configuration snapshot at the scheduled time\033[0m')
+                    sys.exit(1)
+                print('\n\033[41mBuild interrupted, run the script again to resume with the commands that are not on the switch yet\033[0m')
+                sys.exit(1)
+            for command, error in failures:
+                print('\033[41mThere were errors running this command: {}\033[0m'.format(command))
+
+            if (plan or resumed) and not rollback.armed:
+                recorder('save')
+            stats.save()
+            if not args.no_verify:
+                build_ok = print_report(verify_plan(intended, read_running_config(clicmd), hardware.all_ports() if hardware else None)) and not failures
+            else:
+                build_ok = not failures
+            journal.finish()
+            if rollback.armed:
+                keep = ask(answers, 'confirm', 'Keep the new configuration? Without a yes the switch reboots into the snapshot in {} minute(s) (y/N): '.format(args.confirm), 'y' if build_ok else 'n')
+                if str(keep).lower() == 'y':
+                    rollback.confirm()
+                    print('\033[92mNew configuration confirmed and saved\033[0m')
+                else:
+                    print('\033[41mRolling back to the configuration snapshot, the switch will reboot...\033[0m')
+                    rollback.restore()
+                    sys.exit(1)
+            if tracing:
+                clicmd.summary()
             done = True
             break
         else:
+            if answers is not None:
+                print('\033[41mThe answer file {} does not define every value, make sure all variables have the correct value before proceeding\033[0m'.format(args.answers))
+                sys.exit(1)
             raw_input('\033[41m\nAt least one variable is not defined, make sure all variables have the correct value before proceeding\033[0m\n')
     elif choice == 5:
         sys.exit(0)
@@ -154,13 +238,17 @@ while True:
         raw_input('\nInvalid selection, please try again...')
 
 if done:
-    print('\033[92m\nConfiguration built!\033[0m\n')
-    firmware = clicmd('show version | include Image', capture=True)
-    if '31.7.1.4-patch1-98' in firmware:
-        sys.exit(0)
+    if build_ok:
+        print('\033[92m\nConfiguration built!\033[0m\n')
     else:
-        upgrade = raw_input('Would you like to upgrade firmware now? (y/N): ')
-        if str(upgrade).lower() == 'y':
-            print('Beginning firmware upgrade. Switch will reboot.')
-            clicmd('download url file:///usr/local/ext/summit_arm-31.7.1.4-patch1-98.xos')
-            clicmd('reboot')
\ No newline at end of file
+        print('\033[41m\nConfiguration built with errors, check the commands and settings above\033[0m\n')
+    if firmware:
+        status, message = firmware
+        if status == FAILED:
+            print('\033[41m{}\033[0m'.format(message))
+        elif status == STAGED:
+            print(message)
+            reboot = ask(answers, 'reboot', 'Reboot now to finish the firmware upgrade? (y/N): ', 'n')
+            if str(reboot).lower() == 'y':
+                print('Rebooting to finish the firmware upgrade...')
+                clicmd('reboot')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+# Created by Alex Roland
+# For support, email alex.roland@peacefulnetworks.com
+# or open an issue on GitHub at https://github.com/Alex-Roland/exos_configurator/issues
+#
+# This script manages the encrypted credential store used by the configurator and the fleet compiler. Rotating to a new epoch
+# hashes the new admin passwords in parallel and stores them with the SNMP and RADIUS secrets, so builds look them up instead of
+# prompting for them. The passphrase is read from EXOS_CREDENTIALS_KEY or prompted for.
+#
+# Usage: python exos_credentials.py credentials.json rotate 2026-10 --create            (new store, prompts for every credential)
+#        python exos_credentials.py credentials.json rotate 2026-10                     (prompts for every credential)
+#        python exos_credentials.py credentials.json rotate 2026-10 --from secrets.yaml
+#        python exos_credentials.py credentials.json list
+#
+
+import argparse
+import getpass
+import json
+import os
+import sys
+
+from exoslib.answers import read_answers
+from exoslib.credentials import CREDENTIAL_IDS, KEY_ENV, CredentialStore
+
+# str and, on the switch's Python 2, the unicode strings json returns
+STRING_TYPES = (str, type(u''))
+
+def read_credentials(path):
+    '''
+    This function returns the plaintext credentials in a JSON or YAML file, every value must be a string
+    YAML values are always read as the text that was typed. A JSON number or boolean is rejected rather than turned into a
+    different password, such as 83 for 0123 or True for yes.
+    '''
+    values = {}
+    for key, value in read_answers(path).items():
+        if not isinstance(value, STRING_TYPES):
+            raise ValueError('{} in {} must be a string, quote it: {}'.format(key, path, json.dumps(value)))
+        values[str(key)] = str(value)
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the encrypted EXOS credential store')
+    parser.add_argument('store', help='credential store file, created by rotate --create')
+    commands = parser.add_subparsers(dest='command')
+    rotate = commands.add_parser('rotate', help='store new credentials under a rotation epoch and make it the current one')
+    rotate.add_argument('epoch', help='rotation epoch, such as 2026-10')
+    rotate.add_argument('credentials', nargs='*', help='credential IDs to prompt for (default: {})'.format(', '.join(CREDENTIAL_IDS)))
+    rotate.add_argument('--from', dest='source', metavar='FILE', help='read the plaintext credentials from a JSON or YAML file instead of prompting')
+    rotate.add_argument('--create', action='store_true', help='create the store if it does not exist yet')
+    rotate.add_argument('-w', '--workers', type=int, default=None, help='worker processes for hashing (default: one per CPU)')
+    commands.add_parser('list', help='list the credentials and their epochs without showing them')
+    show = commands.add_parser('show', help='print the stored hash or secret of one credential')
+    show.add_argument('credential')
+    show.add_argument('--epoch', help='epoch to show (default: the current one)')
+    args = parser.parse_args()
+    if not args.command:
+        parser.error('choose rotate, list or show')
+
+    create = args.command == 'rotate' and args.create and not os.path.exists(args.store)
+    passphrase = os.environ.get(KEY_ENV) or getpass.getpass('Passphrase for {}: '.format(args.store))
+    if create and not os.environ.get(KEY_ENV) and getpass.getpass('Repeat the passphrase: ') != passphrase:
+        print('\033[41mThe passphrases do not match, {} was not created\033[0m'.format(args.store))
+        sys.exit(1)
+    try:
+        store = CredentialStore(args.store, passphrase, create)
+        if args.command == 'rotate':
+            if args.source:
+                values = read_credentials(args.source)
+            else:
+                values = {}
+                for credential in args.credentials or CREDENTIAL_IDS:
+                    values[credential] = getpass.getpass('{}: '.format(credential))
+            hashed, reused = store.rotate(values, args.epoch, args.workers)
+            store.save()
+            print('\033[92m{} credential(s) stored for epoch {}\033[0m ({} hashed, {} reused from an earlier epoch)'.format(len(values), args.epoch, hashed, reused))
+        elif args.command == 'list':
+            for credential in store.credentials():
+                print('{:<20} current {:<12} epochs {}'.format(credential, store.current(credential), ', '.join(store.epochs(credential))))
+        else:
+            print(store.lookup(args.credential, args.epoch))
+    except (IOError, OSError, ValueError, KeyError, RuntimeError) as e:
+        print('\033[41m{}\033[0m'.format(e.args[0] if isinstance(e, KeyError) else e))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
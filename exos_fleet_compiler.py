@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+#
+# Created by Alex Roland
+# For support, email alex.roland@peacefulnetworks.com
+# or open an issue on GitHub at https://github.com/Alex-Roland/exos_configurator/issues
+#
+# This script runs off-switch and renders one EXOS script (.xsf) per switch from an inventory file, using the same command
+# templates as the configurator. It does not need exsh. Rendering is spread across all CPU cores, the inventory is handed to the
+# workers in bounded batches and every config is written to disk as soon as it is rendered, so memory use stays flat no matter how
+# large a CSV inventory is. YAML inventories are read one document at a time, and a document that is one list of switches is
+# loaded whole, so use CSV for very large fleets.
+#
+# Usage: python exos_fleet_compiler.py inventory.csv -o configs/ --set snmp_auth=... --set admin_password='$5$...'
+#
+
+import argparse
+import csv
+import getpass
+import itertools
+import multiprocessing
+import os
+import sys
+
+from exoslib.apply import command_text
+from exoslib.credentials import KEY_ENV, CredentialStore
+from exoslib.estimate import LatencyStats, format_duration
+from exoslib.optimize import optimize
+from exoslib.ports import parse_uplink, stack_ports
+from exoslib.schedule import schedule
+from exoslib.templates import gateway_for, plan_1_4, plan_1_5, site_servers
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+PROFILES = ('1.4', '1.5')
+COLUMNS = {
+    'hostname': 'snmp_name',
+    'ip': 'switch_ip',
+    'gateway': 'gateway_ip',
+    'location': 'snmp_location',
+}
+# Inventory rows handed to the worker pool at a time, Pool.imap_unordered reads its whole input up front
+BATCH_SIZE = 1024
+_stats = {}
+
+def parse_vlans(value):
+    '''
+    This function returns a dictionary of VLAN name to ID from an inventory value such as "Staff:10;VoIP:99"
+    '''
+    if isinstance(value, dict):
+        return dict((str(name), str(tag)) for name, tag in value.items())
+    vlans = {}
+    for entry in (value or '').replace(';', ' ').split():
+        name, tag = entry.split(':', 1)
+        vlans[name] = tag
+    return vlans
+
+def read_inventory(path):
+    '''
+    This function yields one dictionary per switch from a CSV or YAML inventory
+    A CSV inventory is streamed row by row. YAML is read a document at a time with the base loader, which keeps every value the
+    text that was typed (uplinks: 1:49 is not the sexagesimal 109), so a single-document list is loaded whole.
+    '''
+    if path.endswith(('.yaml', '.yml')):
+        if yaml is None:
+            sys.exit('PyYAML is required to read YAML inventories, install it or use a CSV inventory')
+        with open(path) as inventory:
+            for document in yaml.load_all(inventory, Loader=yaml.BaseLoader):
+                for row in (document if isinstance(document, list) else [document]):
+                    if row:
+                        yield row
+    else:
+        with open(path) as inventory:
+            for row in csv.DictReader(inventory):
+                yield row
+
+def batches(iterable, size=BATCH_SIZE):
+    '''
+    This function yields lists of at most size items, reading the iterable only as far as the current list
+    '''
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def build_settings(row, defaults, profile):
+    '''
+    This function returns the template settings for one inventory row, filling in the values the menu would derive
+    '''
+    settings = dict(defaults)
+    for key, value in row.items():
+        if value in (None, ''):
+            continue
+        settings[COLUMNS.get(key, key)] = value
+    settings.setdefault('profile', profile)
+    settings.setdefault('gateway_ip', gateway_for(settings['switch_ip']))
+    settings.setdefault('snmp_location', settings['snmp_name'])
+    settings.setdefault('facility', 'local4')
+    settings.setdefault('severity', 'info')
+    settings['stack_amount'] = int(settings.get('stack', settings.get('stack_amount', 1)))
+    settings['vlans'] = parse_vlans(settings.get('vlans')) or None
+    servers = site_servers(settings['snmp_name'])
+    if servers:
+        settings.setdefault('syslog_ip', servers[0])
+        settings.setdefault('radius_primary', servers[1])
+        settings.setdefault('radius_secondary', servers[2])
+    return settings
+
+def render_plan(settings):
+    '''
+    This function returns the plan for one switch using the template of its profile
+    '''
+    if str(settings['profile']) == '1.5':
+        settings['edge_ports'] = stack_ports(settings['stack_amount'], 48, slotted=True)
+        return plan_1_5(**settings)
+    edge = int(settings.get('edge_ports', 48))
+    settings['ports'] = stack_ports(settings['stack_amount'], edge)
+    uplink = parse_uplink(str(settings.pop('uplinks', settings.pop('uplink', ''))), settings['stack_amount'])
+    return plan_1_4(settings.pop('vlans') or {}, str(uplink), **settings)
+
+def render_switch(job):
+    '''
+    This function renders one switch to an .xsf file and returns (hostname, path, command count, estimated seconds, error)
+    Runs in a worker process, so errors are returned instead of raised to keep the rest of the fleet going.
+    '''
+    row, defaults, profile, output, optimize_plan, latency = job
+    hostname = row.get('hostname') or row.get('snmp_name') or row.get('ip')
+    try:
+        plan = render_plan(build_settings(row, defaults, profile))
+        if optimize_plan:
+            plan = optimize(plan)[0]
+        plan = schedule(plan)
+        path = os.path.join(output, '{}.xsf'.format(hostname))
+        with open(path, 'w') as script:
+            for command in plan:
+                script.write(command_text(command) + '\n')
+            script.write('save\n')
+        seconds = None
+        if latency is not None:
+            if latency not in _stats:
+                _stats[latency] = LatencyStats(latency or None)
+            seconds = _stats[latency].estimate(plan + ['save'])[0]
+        return hostname, path, len(plan), seconds, None
+    except Exception as e:
+        return hostname, None, 0, None, '{}: {}'.format(type(e).__name__, e)
+
+def main():
+    parser = argparse.ArgumentParser(description='Render EXOS configurations for a fleet of switches')
+    parser.add_argument('inventory', help='CSV or YAML inventory, one switch per row')
+    parser.add_argument('-o', '--output', default='configs', help='directory for the rendered .xsf files')
+    parser.add_argument('-p', '--profile', default='1.4', choices=PROFILES, help='template for rows without a profile column')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='KEY=VALUE', help='value shared by every switch, such as snmp_auth or admin_password')
+    parser.add_argument('--no-optimize', action='store_true', help='write the plan without merging or dropping commands')
+    parser.add_argument('--credentials', metavar='FILE', help='take admin_password, radius_secret, snmp_auth and snmp_priv from an encrypted credential store')
+    parser.add_argument('--epoch', help='credential rotation epoch to use (default: the current one of every credential)')
+    parser.add_argument('--estimate', nargs='?', const='', default=None, metavar='LATENCY_FILE', help='estimate the build time of every switch, from a latency file copied from /usr/local/ext or the defaults')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    defaults = dict(item.split('=', 1) for item in args.set)
+    if args.credentials:
+        # Looked up once for the whole fleet, --set values win
+        try:
+            store = CredentialStore(args.credentials, os.environ.get(KEY_ENV) or getpass.getpass('Passphrase for {}: '.format(args.credentials)))
+            for credential, value in store.lookup_all(args.epoch).items():
+                defaults.setdefault(credential, value)
+        except (IOError, OSError, ValueError) as e:
+            print('\033[41mUnable to use the credential store {}: {}\033[0m'.format(args.credentials, e))
+            sys.exit(1)
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+
+    jobs = ((row, defaults, args.profile, args.output, not args.no_optimize, args.estimate) for row in read_inventory(args.inventory))
+    pool = multiprocessing.Pool(args.workers)
+    rendered = failed = 0
+    estimates = []
+    try:
+        for batch in batches(jobs):
+            for hostname, path, count, seconds, error in pool.imap_unordered(render_switch, batch, chunksize=16):
+                if error:
+                    failed += 1
+                    print('\033[41mThere were errors rendering {}: {}\033[0m'.format(hostname, error))
+                else:
+                    rendered += 1
+                    if seconds is not None:
+                        estimates.append((seconds, hostname))
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        sys.exit(1)
+    finally:
+        pool.join()
+    if estimates:
+        slowest = max(estimates)
+        print('Estimated build time: {} for the fleet, {} on average, slowest {} ({})'.format(format_duration(sum(seconds for seconds, _ in estimates)), format_duration(sum(seconds for seconds, _ in estimates) / len(estimates)), slowest[1], format_duration(slowest[0])))
+    print('\033[92m{} configuration(s) rendered to {}\033[0m{}'.format(rendered, args.output, ', {} failed'.format(failed) if failed else ''))
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+# Created by Alex Roland
+# For support, email alex.roland@peacefulnetworks.com
+# or open an issue on GitHub at https://github.com/Alex-Roland/exos_configurator/issues
+#
+# This script runs off-switch and pushes the .xsf files rendered by exos_fleet_compiler.py to many switches at once. Each switch
+# gets one CLI session that is kept open and reused, a dropped session is retried with backoff, and every host ends with a
+# summary line plus the same red error lines the configurator prints.
+#
+# Usage: python exos_fleet_push.py configs/ --inventory inventory.csv --username admin
+#        python exos_fleet_push.py configs/ --fake    (load test against a local fake switch, no network needed)
+#
+
+import argparse
+import getpass
+import glob
+import os
+import sys
+import time
+
+from exos_fleet_compiler import read_inventory
+from exoslib.push import SessionPool, push_fleet
+
+def read_addresses(path):
+    '''
+    This function returns a dictionary of hostname to IP from the inventory used to render the configs
+    '''
+    return dict((row.get('hostname'), row.get('ip')) for row in read_inventory(path))
+
+def read_commands(path):
+    '''
+    This function returns the commands of one .xsf file
+    '''
+    with open(path) as script:
+        return [line.strip() for line in script if line.strip() and not line.startswith('#')]
+
+def main():
+    parser = argparse.ArgumentParser(description='Push rendered EXOS configurations to a fleet of switches')
+    parser.add_argument('configs', help='directory of .xsf files named after the switch hostname')
+    parser.add_argument('-i', '--inventory', help='inventory with hostname and ip columns (default: connect to the hostname)')
+    parser.add_argument('-t', '--transport', default='ssh', choices=('ssh', 'tcp'))
+    parser.add_argument('--port', type=int, default=None, help='CLI port (default: 22 for ssh)')
+    parser.add_argument('-u', '--username', default='admin')
+    parser.add_argument('-w', '--workers', type=int, default=32, help='switches pushed at the same time')
+    parser.add_argument('-r', '--retries', type=int, default=3, help='reconnect attempts per switch')
+    parser.add_argument('--backoff', type=float, default=2.0, help='seconds before the first retry, doubled every retry')
+    parser.add_argument('--fake', action='store_true', help='push every config to a local fake switch instead')
+    parser.add_argument('--fake-latency', type=float, default=0.0, help='seconds the fake switch adds to every command')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.configs, '*.xsf')))
+    if not paths:
+        sys.exit('No .xsf files found in {}'.format(args.configs))
+
+    addresses = read_addresses(args.inventory) if args.inventory else {}
+    if args.fake:
+        from exoslib.fakeswitch import FakeSwitch
+        server = FakeSwitch(latency=args.fake_latency)
+        args.transport, args.port = 'tcp', server.start()
+        password = None
+    else:
+        password = os.environ.get('EXOS_PASSWORD') or getpass.getpass('Password for {}: '.format(args.username))
+
+    pool = SessionPool(args.transport, args.port or 22, args.username, password)
+    jobs = []
+    for path in paths:
+        host = os.path.splitext(os.path.basename(path))[0]
+        jobs.append((host, '127.0.0.1' if args.fake else addresses.get(host, host), read_commands(path)))
+
+    def show(result):
+        for line in result.report():
+            print(line)
+
+    started = time.time()
+    try:
+        results = push_fleet(jobs, pool, args.workers, args.retries, args.backoff, callback=show)
+    except KeyboardInterrupt:
+        sys.exit(1)
+    finally:
+        pool.close_all()
+    failed = [result for result in results if not result.ok]
+    print('\n{} switch(es) pushed in {:.1f}s over {} session(s), {} with errors'.format(len(results), time.time() - started, pool.opened, len(failed)))
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
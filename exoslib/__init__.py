@@ -0,0 +1,7 @@
+#
+# Created by Alex Roland
+# For support, email alex.roland@peacefulnetworks.com
+# or open an issue on GitHub at https://github.com/Alex-Roland/exos_configurator/issues
+#
+# Helper library shared by the exos_configurator scripts. Copy the whole exoslib folder next to the script in /usr/local/ext.
+#
@@ -0,0 +1,103 @@
+#
+# Answer files and screen handling for the exos_configurator scripts.
+#
+# An answer file fills in every menu value so the whole build runs with one command and no prompts, for example
+# "run script exos_configurator.py --answers site.yaml". JSON files are read with the json module. YAML files are read with PyYAML
+# when it is installed; EXOS does not ship it, so flat "key: value" files with one level of nesting (used for vlans) are read by
+# a small built-in reader instead. Both keep every YAML value a string, the way it was typed: "uplink: 1:52" must not become a
+# sexagesimal 112 and "admin_password: 0123" not the octal 83. Only the yes/no questions read yes, no, true and false as answers.
+#
+
+import json
+import sys
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+CLEAR = '\033[2J\033[H'
+YES_NO = {'y': 'y', 'yes': 'y', 'true': 'y', 'n': 'n', 'no': 'n', 'false': 'n'}
+
+def clear_screen():
+    '''
+    This function clears the terminal with ANSI codes instead of starting a shell to run clear
+    '''
+    sys.stdout.write(CLEAR)
+    sys.stdout.flush()
+
+def scalar(value):
+    '''
+    This function returns a YAML scalar without its quotes
+    '''
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
+
+def parse_simple_yaml(text):
+    '''
+    This function returns a dictionary from "key: value" lines, where a key without a value starts an indented mapping
+    '''
+    answers = {}
+    section = None
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith('#') or line.strip() == '---':
+            continue
+        if ':' not in line:
+            raise ValueError('line {}: expected "key: value"'.format(number))
+        key, value = line.split(':', 1)
+        if ' #' in value:
+            value = value.split(' #', 1)[0]
+        if line[0] in ' \t':
+            if section is None:
+                raise ValueError('line {}: indented value without a parent key'.format(number))
+            section[scalar(key)] = scalar(value)
+        elif value.strip():
+            answers[scalar(key)] = scalar(value)
+            section = None
+        else:
+            section = answers[scalar(key)] = {}
+    return answers
+
+def read_answers(path):
+    '''
+    This function returns the answers in a JSON or YAML answer file as a dictionary
+    YAML is read with the PyYAML base loader, which resolves no types, so every value is the string that was typed.
+    '''
+    with open(path) as answer_file:
+        text = answer_file.read()
+    if path.endswith('.json'):
+        answers = json.loads(text)
+    elif yaml is not None:
+        try:
+            answers = yaml.load(text, Loader=yaml.BaseLoader)
+        except yaml.YAMLError as e:
+            raise ValueError(str(e))
+    else:
+        answers = parse_simple_yaml(text)
+    if not isinstance(answers, dict):
+        raise ValueError('{} does not contain a mapping of answers'.format(path))
+    return answers
+
+def answer(answers, key, default=None):
+    '''
+    This function returns an answer as the string the prompt would have returned, or default when it is missing or empty
+    '''
+    value = answers.get(key)
+    if value is None or value == '':
+        return default
+    return str(value)
+
+def ask(answers, key, prompt, default=''):
+    '''
+    This function returns the answer to a yes/no question from the answer file as 'y' or 'n', otherwise it prompts for it
+    JSON true and false and the words yes, no, true and false answer the question as well.
+    '''
+    if answers is not None:
+        value = answers.get(key)
+        if isinstance(value, bool):
+            return 'y' if value else 'n'
+        value = answer(answers, key, default)
+        return YES_NO.get(value.strip().lower(), value)
+    return raw_input(prompt)
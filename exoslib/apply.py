@@ -0,0 +1,152 @@
+#
+# Apply engine for the exos_configurator scripts.
+#
+# Commands are rendered into EXOS CLI scripts (.xsf) and sent with a single "load script" call per chunk instead of one clicmd() per
+# command. Every command in the script is followed by a $STATUS check that prints a marker with the command index, which is how
+# failures are mapped back to the exact command that caused them. Per-command mode is kept as a fallback. Every plan goes
+# through the scheduler in exoslib/schedule.py on the way in.
+#
+
+import os
+import re
+
+from exoslib.commands import command_text
+from exoslib.schedule import schedule
+
+SCRIPT_DIR = '/usr/local/ext'
+CHUNK_SIZE = 200
+MARKER = 'EXOSCFG-FAILED-'
+MARKER_RE = re.compile(re.escape(MARKER) + r'(\d+)')
+
+def render_script(commands, first=0):
+    '''
+    This function returns the text of an EXOS CLI script that runs the commands and prints a marker for every command that fails
+    '''
+    lines = ['enable cli scripting']
+    for index, command in enumerate(commands, first):
+        lines.append(command)
+        lines.append('if ($STATUS != 0) then')
+        lines.append('set var EXOSCFG_FAILED "{}{}"'.format(MARKER, index))
+        lines.append('show var EXOSCFG_FAILED')
+        lines.append('endif')
+    return '\n'.join(lines) + '\n'
+
+def script_commands(text):
+    '''
+    This function returns the commands of a script written by render_script, without the status checks
+    '''
+    return text.splitlines()[1::5]
+
+def parse_failures(output):
+    '''
+    This function returns a dictionary of failed command index to the error output printed before its marker
+    '''
+    failures = {}
+    previous = []
+    for line in (output or '').splitlines():
+        match = MARKER_RE.search(line)
+        if match:
+            failures[int(match.group(1))] = '\n'.join(l for l in previous if l.strip() and 'EXOSCFG_FAILED' not in l)
+            previous = []
+        else:
+            previous.append(line)
+    return failures
+
+def chunks(commands, size):
+    '''
+    This function yields (offset, commands) pairs of at most size commands each
+    '''
+    for offset in range(0, len(commands), size):
+        yield offset, commands[offset:offset + size]
+
+def run_command(clicmd, command):
+    '''
+    This function runs a single command and returns None on success or the error text on failure
+    Commands can be plain strings or (command, args) tuples for commands that prompt for input.
+    '''
+    try:
+        if isinstance(command, tuple):
+            clicmd(command[0], args=command[1])
+        else:
+            clicmd(command)
+    except Exception as e:
+        return str(e)
+    return None
+
+def apply_per_command(commands, clicmd, observer=None):
+    '''
+    This function sends every command on its own and returns a list of (command, error) tuples for the ones that failed
+    '''
+    failures = []
+    for command in commands:
+        error = run_command(clicmd, command)
+        if error is None:
+            if observer:
+                observer(command_text(command))
+        else:
+            failures.append((command_text(command), error))
+    return failures
+
+def apply_batch(commands, clicmd, chunk_size=CHUNK_SIZE, script_dir=None, observer=None):
+    '''
+    This function sends the commands as EXOS scripts and returns a list of (command, error) tuples for the ones that failed
+    Commands that need interactive arguments cannot be scripted and are sent on their own in plan order.
+    '''
+    failures = []
+    pending = []
+
+    def flush():
+        for offset, chunk in chunks(pending, chunk_size):
+            failures.extend(load_chunk(chunk, offset, clicmd, script_dir, observer))
+        del pending[:]
+
+    for command in commands:
+        if isinstance(command, tuple):
+            flush()
+            failures.extend(apply_per_command([command], clicmd, observer))
+        else:
+            pending.append(command)
+    flush()
+    return failures
+
+def load_chunk(chunk, offset, clicmd, script_dir, observer=None):
+    '''
+    This function writes one chunk to an .xsf file, runs it with "load script" and maps the markers back to commands
+    If the script file cannot be written nothing was sent yet and the chunk is sent one command at a time instead. When
+    "load script" itself fails, part of the script may have run, so every command of the chunk is reported as failed rather
+    than sent a second time.
+    '''
+    path = os.path.join(script_dir or SCRIPT_DIR, 'exos_configurator_{}.xsf'.format(offset))
+    try:
+        with open(path, 'w') as script:
+            script.write(render_script(chunk, offset))
+    except (IOError, OSError):
+        return apply_per_command(chunk, clicmd, observer)
+    try:
+        output = clicmd('load script {}'.format(path), True)
+    except Exception as e:
+        return [(command, 'load script failed, the command may not have been applied: {}'.format(e)) for command in chunk]
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    failed = parse_failures(output)
+    results = []
+    for index, command in enumerate(chunk, offset):
+        if index in failed:
+            results.append((command, failed[index]))
+        elif observer:
+            observer(command)
+    return results
+
+def apply_commands(commands, clicmd, batch=True, chunk_size=CHUNK_SIZE, script_dir=None, observer=None):
+    '''
+    This function applies a list of commands and returns a list of (command, error) tuples for the ones that failed
+    observer is called with every command that was applied successfully. The commands are scheduled first, so protocols are
+    enabled after their port settings whether or not the plan was optimized.
+    '''
+    commands = schedule(commands)
+    if batch:
+        return apply_batch(commands, clicmd, chunk_size, script_dir, observer)
+    return apply_per_command(commands, clicmd, observer)
@@ -0,0 +1,123 @@
+#
+# Command model for the exos_configurator scripts.
+#
+# Splits a CLI command into a template and the port list it targets, and knows which port attributes a command sets so that a
+# later command setting the same attributes (for example the uplink exceptions) can be recognised as overriding an earlier one.
+# redact() masks the secrets a command carries (SNMPv3 keys, RADIUS shared secrets, account hashes) before it is written to flash.
+#
+
+import re
+
+from exoslib.ports import PortSet, is_port_list
+
+PORTS_TOKEN = '{ports}'
+PORT_KEYWORDS = ('ports', 'port')
+SECRET_RE = re.compile(r'(\b(?:authentication (?:md5|sha)|privacy (?:des|aes(?: 128)?)|shared-secret|encrypted)\s+)("[^"]*"|\S+)', re.IGNORECASE)
+REDACTED = '********'
+
+ATTRIBUTE_RULES = [
+    (re.compile(r'^configure ports \{ports\} rate-limit flood (\S+) '), lambda m: ['rate-limit flood ' + m.group(1)]),
+    (re.compile(r'^(?:enable|disable) mac-locking ports \{ports\}$'), lambda m: ['mac-locking']),
+    (re.compile(r'^configure mac-locking ports \{ports\} first-arrival limit-learning '), lambda m: ['mac-locking limit-learning']),
+    (re.compile(r'^configure stpd (\S+) ports link-type \S+ \{ports\}(.*)$'), lambda m: stp_attributes(m.group(1), m.group(2))),
+    (re.compile(r'^configure stpd (\S+) ports (edge-safeguard|bpdu-restrict) (?:enable|disable) \{ports\}'), lambda m: ['stpd {} {}'.format(m.group(1), m.group(2))]),
+    (re.compile(r'^(?:enable|disable) netlogin ports \{ports\} (\S+)$'), lambda m: ['netlogin ' + m.group(1)]),
+    (re.compile(r'^configure lldp ports \{ports\} advertise (.+)$'), lambda m: ['lldp advertise ' + m.group(1)]),
+    (re.compile(r'^unconfigure lldp ports \{ports\}$'), lambda m: ['lldp advertise *']),
+    (re.compile(r'^configure vlan \S+ add ports \{ports\} untagged$'), lambda m: ['untagged vlan']),
+    (re.compile(r'^configure inline-power priority \S+ ports \{ports\}$'), lambda m: ['inline-power priority']),
+    (re.compile(r'^configure ports \{ports\} description-string '), lambda m: ['description']),
+]
+
+def command_text(command):
+    '''
+    This function returns the CLI text of a plan entry
+    '''
+    return command[0] if isinstance(command, tuple) else command
+
+def stp_attributes(domain, rest):
+    '''
+    This function returns the attributes set by a "configure stpd <domain> ports link-type" command
+    '''
+    attributes = ['stpd {} link-type'.format(domain)]
+    for option in ('edge-safeguard', 'bpdu-restrict'):
+        if option in rest:
+            attributes.append('stpd {} {}'.format(domain, option))
+    return attributes
+
+def normalize(command):
+    '''
+    This function returns a command in the form used for comparisons: lowercase, no quotes and single spaces
+    '''
+    return ' '.join(command.replace('"', '').split()).lower()
+
+def redact(command):
+    '''
+    This function returns a command with every secret argument replaced by asterisks
+    '''
+    return SECRET_RE.sub(lambda match: match.group(1) + REDACTED, command)
+
+def split_ports(command):
+    '''
+    This function returns (template, port list) for a command, with the port list replaced by {ports} in the template
+    The port list is the first port-looking token after a "ports" keyword. Commands without one return (command, None).
+    '''
+    words = command.split()
+    for index, word in enumerate(words):
+        if word.lower() in PORT_KEYWORDS:
+            for position in range(index + 1, len(words)):
+                if is_port_list(words[position]):
+                    ports = words[position]
+                    words[position] = PORTS_TOKEN
+                    return ' '.join(words), ports
+            break
+    return command, None
+
+def attributes(template):
+    '''
+    This function returns the list of port attributes a command template sets, or an empty list if it is not known
+    '''
+    template = normalize(template)
+    for pattern, build in ATTRIBUTE_RULES:
+        match = pattern.match(template)
+        if match:
+            return build(match)
+    return []
+
+def overrides(attribute, other):
+    '''
+    This function returns True if setting other replaces whatever attribute set
+    '''
+    if other.endswith(' *'):
+        return attribute.startswith(other[:-1])
+    return attribute == other
+
+def effective_ports(commands):
+    '''
+    This function returns a list of (command, template, ports) where ports is the set of ports the command still decides
+    A port is dropped from a command when every attribute the command sets on it is set again by a later command. ports is a
+    PortSet, or None for commands that do not target a port list.
+    '''
+    later = []
+    results = []
+    for command in reversed(commands):
+        template, ports = split_ports(command)
+        if ports is None:
+            results.append((command, template, None))
+            continue
+        ports = PortSet.parse(ports)
+        owned = attributes(template)
+        remaining = ports
+        if owned:
+            overridden = None
+            for attribute in owned:
+                covered = PortSet()
+                for later_owned, later_ports in later:
+                    if any(overrides(attribute, other) for other in later_owned):
+                        covered = covered | later_ports
+                overridden = covered if overridden is None else overridden & covered
+            remaining = ports - overridden
+            later.append((owned, ports))
+        results.append((command, template, remaining))
+    results.reverse()
+    return results
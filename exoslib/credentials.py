@@ -0,0 +1,174 @@
+#
+# Credential store for the exos_configurator scripts.
+#
+# Keeps the EXOS admin password hashes and the SNMP and RADIUS secrets of a fleet in one local file, keyed by credential ID and
+# rotation epoch, so the configurator and the fleet compiler look them up instead of prompting and hashing again. Credential IDs
+# containing "password" are stored as EXOS SHA-256 crypt hashes, everything else as the secret itself. Every entry also keeps a
+# keyed fingerprint of its plaintext, so rotating to an epoch with a password that was hashed before reuses that hash, and the
+# hashes that are new are computed in parallel.
+#
+# The file is encrypted with the standard library only, so it can be read on the switch as well: the key is derived from a
+# passphrase with PBKDF2-SHA256, each entry is encrypted with an HMAC-SHA256 keystream under its own random nonce and
+# authenticated with an HMAC-SHA256 tag over the nonce and ciphertext (encrypt-then-MAC).
+#
+
+import binascii
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import random
+import string
+import struct
+
+try:
+    from crypt import crypt
+except ImportError:
+    crypt = None
+
+STORE_DIR = '/usr/local/ext'
+STORE_NAME = 'exos_configurator_credentials.json'
+KEY_ENV = 'EXOS_CREDENTIALS_KEY'
+ITERATIONS = 100000
+CREDENTIAL_IDS = ('admin_password', 'radius_secret', 'snmp_auth', 'snmp_priv')
+
+def is_password(credential):
+    return 'password' in credential
+
+def exos_hash(password):
+    '''
+    This function returns a SHA-256 crypt hash with the 6 character salt EXOS expects in "configure account ... encrypted"
+    '''
+    if crypt is None:
+        raise RuntimeError('hashing passwords needs the crypt module, which this Python does not have')
+    salt = ''.join(random.SystemRandom().choice(string.ascii_lowercase) for _ in range(6))
+    return crypt(password, '$5${}'.format(salt))
+
+def to_bytes(text):
+    return text if isinstance(text, bytes) else text.encode('utf-8')
+
+def keystream(key, nonce, length):
+    blocks = []
+    for counter in range((length + 31) // 32):
+        blocks.append(hmac.new(key, nonce + struct.pack('>I', counter), hashlib.sha256).digest())
+    return bytearray(b''.join(blocks)[:length])
+
+def xor(data, stream):
+    return bytes(bytearray(a ^ b for a, b in zip(bytearray(data), stream)))
+
+class CredentialStore(object):
+    '''
+    This class is the encrypted credential file, opened with its passphrase
+    '''
+    def __init__(self, path=None, passphrase='', create=False):
+        self.path = path or os.path.join(STORE_DIR, STORE_NAME)
+        if os.path.exists(self.path):
+            with open(self.path) as store:
+                self.data = json.load(store)
+        elif not create:
+            raise IOError('{} does not exist, create it with "exos_credentials.py {} rotate EPOCH --create"'.format(self.path, self.path))
+        else:
+            self.data = {'version': 1, 'salt': binascii.hexlify(os.urandom(16)).decode('ascii'), 'iterations': ITERATIONS, 'credentials': {}}
+        key = hashlib.pbkdf2_hmac('sha256', to_bytes(passphrase), binascii.unhexlify(self.data['salt']), self.data['iterations'], 64)
+        self.encryption_key, self.mac_key = key[:32], key[32:]
+        check = hmac.new(self.mac_key, b'exos_configurator credentials', hashlib.sha256).hexdigest()
+        if self.data.setdefault('check', check) != check:
+            raise ValueError('wrong passphrase for {}'.format(self.path))
+
+    def fingerprint(self, credential, plaintext):
+        return hmac.new(self.mac_key, to_bytes(credential) + b'\0' + to_bytes(plaintext), hashlib.sha256).hexdigest()
+
+    def encrypt(self, value):
+        nonce = os.urandom(16)
+        data = xor(to_bytes(value), keystream(self.encryption_key, nonce, len(to_bytes(value))))
+        tag = hmac.new(self.mac_key, nonce + data, hashlib.sha256).hexdigest()
+        return {'nonce': binascii.hexlify(nonce).decode('ascii'), 'data': binascii.hexlify(data).decode('ascii'), 'tag': tag}
+
+    def decrypt(self, entry):
+        nonce = binascii.unhexlify(entry['nonce'])
+        data = binascii.unhexlify(entry['data'])
+        if not hmac.compare_digest(hmac.new(self.mac_key, nonce + data, hashlib.sha256).hexdigest(), str(entry['tag'])):
+            raise ValueError('a credential in {} was modified'.format(self.path))
+        plaintext = xor(data, keystream(self.encryption_key, nonce, len(data)))
+        return plaintext if isinstance(plaintext, str) else plaintext.decode('utf-8')
+
+    def credentials(self):
+        return sorted(self.data['credentials'])
+
+    def epochs(self, credential):
+        return sorted(self.data['credentials'].get(credential, {}).get('epochs', {}))
+
+    def current(self, credential):
+        return self.data['credentials'].get(credential, {}).get('current')
+
+    def lookup(self, credential, epoch=None):
+        '''
+        This function returns the stored hash or secret of a credential for an epoch, by default its current one
+        Raises KeyError when the store does not have it.
+        '''
+        entry = self.data['credentials'].get(credential)
+        epoch = epoch or (entry and entry['current'])
+        if not entry or epoch not in entry['epochs']:
+            raise KeyError('{} has no {} for epoch {}'.format(self.path, credential, epoch))
+        return self.decrypt(entry['epochs'][epoch])
+
+    def lookup_all(self, epoch=None):
+        '''
+        This function returns a dictionary of credential ID to value for every credential that has the epoch
+        '''
+        found = {}
+        for credential in self.credentials():
+            try:
+                found[credential] = self.lookup(credential, epoch)
+            except KeyError:
+                pass
+        return found
+
+    def rotate(self, values, epoch, workers=None):
+        '''
+        This function stores new plaintext credentials under an epoch and makes it their current one
+        Passwords that were stored before (same fingerprint) reuse their hash, the others are hashed in parallel.
+        Returns (hashed, reused) counts.
+        '''
+        entries = {}
+        pending = []
+        reused = 0
+        for credential, plaintext in sorted(values.items()):
+            fingerprint = self.fingerprint(credential, plaintext)
+            known = self.data['credentials'].get(credential, {}).get('epochs', {})
+            match = [entry for entry in known.values() if entry['fingerprint'] == fingerprint]
+            if match:
+                entries[credential] = (fingerprint, self.decrypt(match[0]))
+                reused += 1
+            elif is_password(credential):
+                pending.append((credential, fingerprint, plaintext))
+            else:
+                entries[credential] = (fingerprint, plaintext)
+        if pending:
+            if len(pending) > 1 and workers != 1:
+                pool = multiprocessing.Pool(workers)
+                try:
+                    hashes = pool.map(exos_hash, [plaintext for _, _, plaintext in pending])
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                hashes = [exos_hash(plaintext) for _, _, plaintext in pending]
+            for (credential, fingerprint, _), value in zip(pending, hashes):
+                entries[credential] = (fingerprint, value)
+        for credential, (fingerprint, value) in entries.items():
+            stored = self.data['credentials'].setdefault(credential, {'epochs': {}})
+            stored['epochs'][epoch] = dict(self.encrypt(value), fingerprint=fingerprint)
+            stored['current'] = epoch
+        return len(pending), reused
+
+    def save(self):
+        '''
+        This function writes the store readable by its owner only, replacing the old file in one step
+        '''
+        temporary = self.path + '.tmp'
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'w') as store:
+            json.dump(self.data, store, indent=1, sort_keys=True)
+        os.rename(temporary, self.path)
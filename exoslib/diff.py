@@ -0,0 +1,144 @@
+#
+# Incremental apply for the exos_configurator scripts.
+#
+# Reads "show configuration detail" once, indexes it and returns only the commands (and for port commands, only the ports) that
+# are not already in place. Secrets are stored encrypted on the switch and cannot be compared, so commands carrying them are
+# treated as satisfied once the object they belong to exists. Run a full build to rotate a secret. Addresses are compared with
+# dotted masks, the form EXOS prints them in, so "ipaddress 10.1.1.5/23" matches "ipaddress 10.1.1.5 255.255.254.0", and
+# commands on "ports all" are compared as the switch's port list, which is how EXOS prints them.
+#
+
+import re
+
+from exoslib.apply import command_text
+from exoslib.commands import effective_ports, normalize, split_ports
+from exoslib.ports import PortSet, format_ports
+
+OPAQUE_RULES = [
+    (re.compile(r'^configure snmpv3 add user (\S+) '), r'^configure snmpv3 add user {} '),
+    (re.compile(r'^configure radius (?:mgmt-access )?(\d+) shared-secret '), r'^configure radius (mgmt-access )?{} shared-secret '),
+    (re.compile(r'^configure account (\S+) encrypted '), r'^configure account {} encrypted '),
+]
+CREATE_VLAN_TAG_RE = re.compile(r'^create vlan (\S+) tag (\d+)$')
+DELETE_ALL_RE = re.compile(r'^configure (?:vlan )?(\S+) delete ports all$')
+DELETE_ACCOUNT_RE = re.compile(r'^delete account (\S+)$')
+UNCONFIGURE_RE = re.compile(r'^unconfigure (.+) ports \{ports\}$')
+DISABLE_RE = re.compile(r'^disable (.+)$')
+CIDR_RE = re.compile(r'\bipaddress (\d+\.\d+\.\d+\.\d+)/(\d+)\b')
+ALL_PORTS_RE = re.compile(r'\bports? all\b', re.IGNORECASE)
+
+def dotted_mask(match):
+    bits = (0xffffffff << (32 - int(match.group(2)))) & 0xffffffff
+    return 'ipaddress {} {}'.format(match.group(1), '.'.join(str(bits >> shift & 0xff) for shift in (24, 16, 8, 0)))
+
+def canonical(line):
+    '''
+    This function returns a normalized line with a CIDR address written with a dotted mask
+    '''
+    return CIDR_RE.sub(dotted_mask, normalize(line))
+
+def expand_all(command, all_ports):
+    '''
+    This function returns a command with "ports all" replaced by the switch's ports, or None when they are not known
+    EXOS prints "ports all" as the port list of the switch, this is the form it can be compared in.
+    '''
+    if not ALL_PORTS_RE.search(command) or DELETE_ALL_RE.match(normalize(command)):
+        return command
+    if not all_ports:
+        return None
+    return ALL_PORTS_RE.sub('ports {}'.format(all_ports), command)
+
+class RunningConfig(object):
+    '''
+    This class indexes the running configuration by normalized line and by port command template
+    '''
+    def __init__(self, text):
+        self.lines = set()
+        self.ports = {}
+        for line in text.splitlines():
+            line = canonical(line)
+            if not line or line.startswith('#'):
+                continue
+            self.lines.add(line)
+            template, ports = split_ports(line)
+            if ports is not None:
+                self.ports[template] = self.ports.get(template, PortSet()) | PortSet.parse(ports)
+
+    def has_line(self, line):
+        if line in self.lines:
+            return True
+        return any(existing.startswith(line + ' ') for existing in self.lines)
+
+    def has_match(self, pattern):
+        pattern = re.compile(pattern)
+        return any(pattern.match(existing) for existing in self.lines)
+
+    def covered(self, template):
+        return self.ports.get(template, PortSet())
+
+def line_satisfied(command, running):
+    '''
+    This function returns True if a command without a port list is already in the running configuration
+    '''
+    line = canonical(command)
+    for pattern, existing in OPAQUE_RULES:
+        match = pattern.match(line)
+        if match:
+            return running.has_match(existing.format(re.escape(match.group(1))))
+    match = CREATE_VLAN_TAG_RE.match(line)
+    if match:
+        return running.has_line('create vlan {}'.format(match.group(1))) and running.has_line('configure vlan {} tag {}'.format(match.group(1), match.group(2)))
+    match = DELETE_ALL_RE.match(line)
+    if match:
+        return not running.has_match(r'^configure vlan {} add ports '.format(re.escape(match.group(1))))
+    match = DELETE_ACCOUNT_RE.match(line)
+    if match:
+        return not running.has_match(r'^(?:create|configure) account (?:admin |user )?{}(?: |$)'.format(re.escape(match.group(1))))
+    return running.has_line(line)
+
+def missing_ports(template, ports, running):
+    '''
+    This function returns the ports a port command still has to be sent for
+    '''
+    template = normalize(template)
+    match = UNCONFIGURE_RE.match(template)
+    if match:
+        prefix = 'configure {} ports '.format(match.group(1))
+        configured = PortSet()
+        for existing, existing_ports in running.ports.items():
+            if existing.startswith(prefix):
+                configured = configured | existing_ports
+        return ports & configured
+    missing = ports - running.covered(template)
+    match = DISABLE_RE.match(template)
+    if match and missing:
+        missing = missing & running.covered('enable ' + match.group(1))
+    return missing
+
+def compute_delta(plan, config, all_ports=None):
+    '''
+    This function returns the part of the plan that is not already in the running configuration text
+    Port commands are narrowed to the ports that still need them, so a re-run only touches what changed. all_ports is the
+    PortSet of the switch, used to compare commands on "ports all"; without it those commands are always sent.
+    '''
+    running = RunningConfig(config)
+    texts = [expand_all(command_text(command), all_ports) or command_text(command) for command in plan]
+    delta = []
+    for command, (text, template, ports) in zip(plan, effective_ports(texts)):
+        if ports is None:
+            if not line_satisfied(text, running):
+                delta.append(command)
+            continue
+        missing = missing_ports(template, ports, running)
+        if missing and text != command_text(command) and missing == all_ports:
+            # Nothing of "ports all" is in place yet, send the command as written
+            delta.append(command)
+        elif missing:
+            delta.append(template.replace('{ports}', format_ports(missing)))
+    return delta
+
+def read_running_config(clicmd):
+    '''
+    This function returns the running configuration with defaults included, read with one call
+    '''
+    return clicmd('show configuration detail', True) or ''
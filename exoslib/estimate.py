@@ -0,0 +1,188 @@
+#
+# Build time estimates for the exos_configurator scripts.
+#
+# Every command is put in a command type (STP domain creation, netlogin enablement, save, plain configure, ...) and the time a
+# type takes is learned from earlier builds. The measurements are kept as a running mean per type in a small JSON file in
+# /usr/local/ext. Commands sent inside an EXOS script run faster than one clicmd each, so for batch mode the file also keeps the
+# measured ratio between a chunk and the sum of its per-command estimates. Until something is measured the defaults below are
+# used, which are in line with the latency model in bench/exsh.py.
+#
+
+import json
+import os
+import re
+import time
+
+from exoslib.apply import CHUNK_SIZE, command_text, script_commands
+
+STATS_DIR = '/usr/local/ext'
+STATS_NAME = 'exos_configurator_latency.json'
+MAX_WEIGHT = 50
+
+CATEGORIES = [
+    ('stpd create', re.compile(r'^create stpd\b', re.IGNORECASE)),
+    ('stpd enable', re.compile(r'^enable stpd\b', re.IGNORECASE)),
+    ('stpd', re.compile(r'\bstpd\b|^(enable|disable) s\d+ auto-bind', re.IGNORECASE)),
+    ('netlogin enable', re.compile(r'^enable netlogin\b', re.IGNORECASE)),
+    ('netlogin', re.compile(r'\bnetlogin\b', re.IGNORECASE)),
+    ('mac-locking', re.compile(r'\bmac-locking\b', re.IGNORECASE)),
+    ('save', re.compile(r'^save\b', re.IGNORECASE)),
+    ('download', re.compile(r'^download\b', re.IGNORECASE)),
+    ('show', re.compile(r'^show\b', re.IGNORECASE)),
+    ('create', re.compile(r'^create\b', re.IGNORECASE)),
+    ('enable', re.compile(r'^(enable|disable)\b', re.IGNORECASE)),
+    ('configure', re.compile(r'^(configure|unconfigure)\b', re.IGNORECASE)),
+]
+
+DEFAULT_SECONDS = {
+    'stpd create': 0.40,
+    'stpd enable': 0.38,
+    'stpd': 0.36,
+    'netlogin enable': 0.43,
+    'netlogin': 0.41,
+    'mac-locking': 0.31,
+    'save': 3.05,
+    'download': 60.05,
+    'show': 0.20,
+    'create': 0.15,
+    'enable': 0.13,
+    'configure': 0.11,
+    'other': 0.10,
+}
+DEFAULT_BATCH_RATIO = 0.6
+
+def category_of(command):
+    '''
+    This function returns the command type used for the latency statistics
+    '''
+    text = command_text(command)
+    for category, pattern in CATEGORIES:
+        if pattern.search(text):
+            return category
+    return 'other'
+
+class LatencyStats(object):
+    '''
+    This class keeps the measured seconds per command type and the batch ratio, and estimates plans with them
+    '''
+    def __init__(self, path=None):
+        self.path = path or os.path.join(STATS_DIR, STATS_NAME)
+        self.categories = {}
+        self.batch = None
+        try:
+            with open(self.path) as stats:
+                data = json.load(stats)
+            self.categories = data.get('categories', {})
+            self.batch = data.get('batch')
+        except (IOError, OSError, ValueError):
+            pass
+
+    @property
+    def measured(self):
+        return sum(entry['count'] for entry in self.categories.values())
+
+    def seconds(self, command):
+        '''
+        This function returns the expected seconds of a command sent with its own clicmd call
+        '''
+        category = category_of(command)
+        entry = self.categories.get(category)
+        return entry['mean'] if entry else DEFAULT_SECONDS[category]
+
+    @property
+    def batch_ratio(self):
+        return self.batch['mean'] if self.batch else DEFAULT_BATCH_RATIO
+
+    def add(self, entry, value):
+        '''
+        This function adds a value to a running mean, weighting older values less once MAX_WEIGHT values are in
+        '''
+        entry = entry or {'count': 0, 'mean': 0.0}
+        weight = min(entry['count'], MAX_WEIGHT - 1)
+        entry['mean'] = round((entry['mean'] * weight + value) / (weight + 1), 5)
+        entry['count'] += 1
+        return entry
+
+    def observe(self, command, elapsed):
+        category = category_of(command)
+        self.categories[category] = self.add(self.categories.get(category), elapsed)
+
+    def observe_chunk(self, commands, elapsed):
+        '''
+        This function learns the batch ratio from one "load script" call and the commands that were in it
+        '''
+        expected = sum(self.seconds(command) for command in commands)
+        if expected > 0:
+            self.batch = self.add(self.batch, elapsed / expected)
+
+    def save(self):
+        '''
+        This function writes the statistics back, losing them is not worth failing a build over
+        '''
+        try:
+            with open(self.path, 'w') as stats:
+                json.dump({'categories': self.categories, 'batch': self.batch}, stats, indent=1, sort_keys=True)
+        except (IOError, OSError):
+            pass
+
+    def estimate(self, plan, batch=True, chunk_size=CHUNK_SIZE):
+        '''
+        This function returns (total seconds, steps) for a plan, where steps is a list of (seconds, command) in plan order
+        In batch mode only commands with prompts and save are sent on their own, the rest are scaled by the batch ratio.
+        '''
+        steps = []
+        for command in plan:
+            seconds = self.seconds(command)
+            if batch and not isinstance(command, tuple) and category_of(command) != 'save':
+                seconds *= self.batch_ratio
+            steps.append((seconds, command_text(command)))
+        return sum(seconds for seconds, _ in steps), steps
+
+class LatencyRecorder(object):
+    '''
+    This class is a drop-in replacement for clicmd that feeds the time of every successful call into LatencyStats
+    '''
+    def __init__(self, clicmd, stats):
+        self.clicmd = clicmd
+        self.stats = stats
+
+    def __call__(self, command, *args, **kwargs):
+        chunk = None
+        if command.startswith('load script '):
+            try:
+                with open(command[len('load script '):]) as script:
+                    chunk = script_commands(script.read())
+            except (IOError, OSError):
+                pass
+        start = time.time()
+        output = self.clicmd(command, *args, **kwargs)
+        elapsed = time.time() - start
+        if chunk is not None:
+            self.stats.observe_chunk(chunk, elapsed)
+        else:
+            self.stats.observe(command, elapsed)
+        return output
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return '{}m {:02d}s'.format(minutes, seconds) if minutes else '{}s'.format(seconds)
+
+def print_estimate(stats, plan, batch=True, count=5):
+    '''
+    This function prints the estimated build time, the most expensive steps and the time per command type
+    '''
+    total, steps = stats.estimate(plan, batch)
+    source = 'from {} measured call(s)'.format(stats.measured) if stats.measured else 'default latencies, nothing measured yet'
+    print('Estimated build time: {} for {} command(s) ({}, {})'.format(format_duration(total), len(plan), 'batch' if batch else 'per-command', source))
+    print('Most expensive steps:')
+    for seconds, command in sorted(steps, key=lambda step: step[0], reverse=True)[:count]:
+        print('  {:7.2f}s  {}'.format(seconds, command))
+    types = {}
+    for seconds, command in steps:
+        category = category_of(command)
+        commands, time_spent = types.get(category, (0, 0.0))
+        types[category] = (commands + 1, time_spent + seconds)
+    print('By command type:')
+    for category, (commands, time_spent) in sorted(types.items(), key=lambda item: item[1][1], reverse=True):
+        print('  {:<16} {:>4} command(s) {:8.2f}s'.format(category, commands, time_spent))
+    return total
@@ -0,0 +1,154 @@
+#
+# Local fake switch for the exos_configurator tools.
+#
+# A threaded TCP server that behaves like the EXOS CLI closely enough to load-test the fleet push driver without network access
+# or hardware: it prints a prompt, accepts commands, asks for confirmation on save and reboot, answers commands matching --fail with
+# an EXOS style error and can add latency or drop connections at random or at given commands.
+#
+# Usage: python -m exoslib.fakeswitch --port 2323 --latency 0.05 --fail "^configure bogus" --drop-rate 0.001
+#
+
+import argparse
+import random
+import re
+import socket
+import threading
+import time
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+INVALID = "\n%% Invalid input detected at '^' marker.\n"
+CONFIRMATIONS = {
+    'save': 'Do you want to save configuration to primary.cfg and overwrite it? (y/N) ',
+    'reboot': 'Are you sure you want to reboot the switch? (y/N) ',
+    'unconfigure switch all': 'Restore all factory defaults and reboot? (y/N) ',
+}
+
+class FakeSwitchHandler(socketserver.StreamRequestHandler):
+    '''
+    This class runs one CLI session on the fake switch
+    '''
+    def write(self, text):
+        self.wfile.write(text.encode())
+        self.wfile.flush()
+
+    def prompt(self):
+        self.write('{}.{} # '.format(self.server.hostname, self.server.next_prompt()))
+
+    def setup(self):
+        socketserver.StreamRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        self.server.track(1)
+        try:
+            self.write('\nExtremeXOS fake switch\n\n')
+            self.prompt()
+            for raw in iter(self.rfile.readline, b''):
+                command = raw.decode(errors='replace').strip()
+                self.write(command + '\n')
+                if command in ('exit', 'logout', 'quit'):
+                    return
+                if self.server.dropped():
+                    return
+                if self.server.latency:
+                    time.sleep(self.server.latency)
+                self.server.record(command)
+                if command in CONFIRMATIONS:
+                    self.write(CONFIRMATIONS[command])
+                    reply = self.rfile.readline().decode(errors='replace').strip()
+                    self.server.answer(command, reply)
+                    if command == 'save' and reply.lower() == 'y':
+                        self.write('Saving configuration on master ....... done!\n')
+                elif command and self.server.fail and self.server.fail.search(command):
+                    self.write(INVALID)
+                self.prompt()
+        except socket.error:
+            pass
+        finally:
+            self.server.track(-1)
+
+class FakeSwitch(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    '''
+    This class is the fake switch server. Commands received are counted so load tests can check what arrived, and with keep_log
+    every command and confirmation answer is kept as well.
+    drops is a list of positions (1 for the first command the server receives, counting every session) where the connection is
+    dropped instead of running the command.
+    '''
+    allow_reuse_address = True
+    request_queue_size = 256
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), hostname='fake-switch', latency=0.0, fail=None, drop_rate=0.0, drops=(), keep_log=False):
+        socketserver.TCPServer.__init__(self, address, FakeSwitchHandler)
+        self.hostname = hostname
+        self.latency = latency
+        self.fail = re.compile(fail) if fail else None
+        self.drop_rate = drop_rate
+        self.drops = set(drops)
+        self.lock = threading.Lock()
+        self.received = 0
+        self.commands = 0
+        self.keep_log = keep_log
+        self.log = []
+        self.answers = []
+        self.sessions = 0
+        self.active = 0
+        self.prompts = 0
+
+    def next_prompt(self):
+        with self.lock:
+            self.prompts += 1
+            return self.prompts
+
+    def dropped(self):
+        with self.lock:
+            self.received += 1
+            return self.received in self.drops or (self.drop_rate and random.random() < self.drop_rate)
+
+    def record(self, command):
+        with self.lock:
+            self.commands += 1
+            if self.keep_log:
+                self.log.append(command)
+
+    def answer(self, command, reply):
+        with self.lock:
+            if self.keep_log:
+                self.answers.append((command, reply))
+
+    def track(self, change):
+        with self.lock:
+            self.active += change
+            if change > 0:
+                self.sessions += 1
+
+    def start(self):
+        '''
+        This function serves in a background thread and returns the port the server listens on
+        '''
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self.server_address[1]
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake EXOS CLI for load testing the fleet push driver')
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2323)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every command')
+    parser.add_argument('--fail', default=None, help='regular expression of commands that return an error')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='chance of dropping the connection on each command')
+    args = parser.parse_args()
+    server = FakeSwitch((args.address, args.port), latency=args.latency, fail=args.fail, drop_rate=args.drop_rate)
+    print('Fake switch listening on {}:{}'.format(args.address, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
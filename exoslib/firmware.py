@@ -0,0 +1,79 @@
+#
+# Firmware staging for the exos_configurator scripts.
+#
+# The image is checked and installed on the alternate partition before the build starts and before a --confirm reboot is
+# scheduled, so the download and "use image" never run inside the confirm window where the scheduled reboot could hit them. The
+# image is only downloaded when neither partition already has the target version, and the download is only started once the
+# image file matches the SHA-256 checksum in the .sha256 file next to it. The switch is not rebooted here; the script asks once
+# at the end of the build.
+#
+
+import hashlib
+import os
+import re
+
+IMAGE_VERSION = '31.7.1.4-patch1-98'
+IMAGE_FILE = 'summit_arm-31.7.1.4-patch1-98.xos'
+IMAGE_DIR = '/usr/local/ext'
+PARTITION_RE = re.compile(r'^(Image Selected|Image Booted|Primary ver|Secondary ver):\s*(\S+)', re.MULTILINE)
+
+CURRENT = 'current'
+STAGED = 'staged'
+FAILED = 'failed'
+
+def parse_partitions(output):
+    '''
+    This function returns the selected and booted partition and the version on each partition from "show switch"
+    '''
+    partitions = {}
+    for key, value in PARTITION_RE.findall(output or ''):
+        partitions[key.lower().replace('image ', '').replace(' ver', '')] = value.lower() if key.startswith('Image') else value
+    return partitions
+
+def expected_checksum(path):
+    '''
+    This function returns the SHA-256 checksum from the .sha256 file next to the image, or None if there is none
+    '''
+    try:
+        with open(path + '.sha256') as checksum:
+            words = checksum.read().split()
+    except (IOError, OSError):
+        return None
+    return words[0].lower() if words else None
+
+def file_checksum(path, block_size=1024 * 1024):
+    '''
+    This function returns the SHA-256 checksum of a file, read in blocks so the image never has to fit in memory
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as image:
+        for block in iter(lambda: image.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def stage_image(clicmd, version=IMAGE_VERSION, image=IMAGE_FILE, directory=None):
+    '''
+    This function installs the image on the alternate partition and selects it for the next boot if that is needed
+    It returns (status, message) where status is CURRENT, STAGED or FAILED.
+    '''
+    partitions = parse_partitions(clicmd('show switch', True))
+    booted = partitions.get('booted', 'primary')
+    alternate = 'secondary' if booted == 'primary' else 'primary'
+    if version in partitions.get(booted, ''):
+        return CURRENT, 'Firmware {} is already running'.format(version)
+    if version in partitions.get(alternate, ''):
+        if partitions.get('selected') != alternate:
+            clicmd('use image {}'.format(alternate))
+        return STAGED, 'Firmware {} is already installed on the {} partition, download skipped'.format(version, alternate)
+
+    path = os.path.join(directory or IMAGE_DIR, image)
+    if not os.path.exists(path):
+        return FAILED, 'Firmware image {} not found'.format(path)
+    expected = expected_checksum(path)
+    if not expected:
+        return FAILED, 'No checksum for {}, put its SHA-256 in {}.sha256'.format(path, path)
+    if file_checksum(path) != expected:
+        return FAILED, 'Checksum mismatch for {}, the image is corrupt'.format(path)
+    clicmd('download url file://{}'.format(path))
+    clicmd('use image {}'.format(alternate))
+    return STAGED, 'Firmware {} installed on the {} partition'.format(version, alternate)
@@ -0,0 +1,110 @@
+#
+# Hardware discovery for the exos_configurator scripts.
+#
+# Reads "show stacking", "show slot" and "show ports information detail" once and builds a model of the stack members, their
+# ports, the media type of every port and its link state. The scripts use it to fill in the switch quantity, edge ports and
+# uplinks instead of asking for them, telling the copper edge ports from the fiber uplinks by the actual media.
+#
+
+import re
+
+from exoslib.ports import PortSet
+
+STACK_MEMBER_RE = re.compile(r'^[\s*]*(?:[0-9a-f]{2}:){5}[0-9a-f]{2}\s+(\d+)\s+(\S+)', re.IGNORECASE | re.MULTILINE)
+SLOT_RE = re.compile(r'^Slot-(\d+)\s+(\S+)', re.MULTILINE)
+PORT_RE = re.compile(r'^Port:\s*(\S+)', re.MULTILINE)
+FIELD_RE = re.compile(r'^\s+(Type|Link State):\s*(.*?)\s*$', re.MULTILINE)
+COPPER_MEDIA = ('UTP', 'BASE-T')
+
+class Port(object):
+    '''
+    This class is one front panel port with its media type and link state
+    '''
+    __slots__ = ('name', 'media', 'link')
+
+    def __init__(self, name, media='', link=''):
+        self.name = name
+        self.media = media
+        self.link = link
+
+    @property
+    def slot(self):
+        return int(self.name.split(':')[0]) if ':' in self.name else 0
+
+    @property
+    def copper(self):
+        return any(media in self.media.upper() for media in COPPER_MEDIA)
+
+    @property
+    def active(self):
+        return self.link.lower().startswith('active')
+
+class Hardware(object):
+    '''
+    This class is the discovered stack: its members, their models and their ports
+    '''
+    def __init__(self, members, models, ports):
+        self.members = members
+        self.models = models
+        self.ports = ports
+        self.by_name = dict((port.name, port) for port in ports)
+
+    @property
+    def stack_amount(self):
+        return len(self.members) or 1
+
+    @property
+    def edge_ports(self):
+        '''
+        This property returns the number of copper ports per switch, or None when the members differ or have none
+        '''
+        counts = set()
+        for slot in set(port.slot for port in self.ports):
+            counts.add(sum(1 for port in self.ports if port.slot == slot and port.copper))
+        if len(counts) != 1 or 0 in counts:
+            return None
+        return counts.pop()
+
+    def uplinks(self):
+        '''
+        This function returns the fiber ports with link up, which is where the uplinks are on an edge closet stack
+        '''
+        names = [port.name for port in self.ports if port.active and not port.copper]
+        return PortSet.parse(','.join(names)) if names else PortSet()
+
+    def all_ports(self):
+        return PortSet.parse(','.join(port.name for port in self.ports)) if self.ports else PortSet()
+
+    def has_ports(self, ports):
+        return all(name in self.by_name for name in PortSet.parse(ports))
+
+def parse_stacking(output):
+    '''
+    This function returns the slot numbers of the active stack members from "show stacking"
+    '''
+    return sorted(int(slot) for slot, state in STACK_MEMBER_RE.findall(output or '') if state.lower() == 'active')
+
+def parse_slots(output):
+    '''
+    This function returns a dictionary of slot number to model from "show slot"
+    '''
+    return dict((int(slot), model) for slot, model in SLOT_RE.findall(output or ''))
+
+def parse_port_information(output):
+    '''
+    This function returns the ports listed by "show ports information detail" with their media type and link state
+    '''
+    ports = []
+    starts = [(match.start(), match.group(1)) for match in PORT_RE.finditer(output or '')]
+    for index, (start, name) in enumerate(starts):
+        end = starts[index + 1][0] if index + 1 < len(starts) else len(output)
+        fields = dict(FIELD_RE.findall(output[start:end]))
+        ports.append(Port(name, fields.get('Type', ''), fields.get('Link State', '')))
+    return ports
+
+def discover(show):
+    '''
+    This function reads the hardware with three bulk show commands and returns a Hardware model
+    show is called with the command and returns its output, like SwitchSnapshot.show.
+    '''
+    return Hardware(parse_stacking(show('show stacking')), parse_slots(show('show slot')), parse_port_information(show('show ports information detail')))
@@ -0,0 +1,133 @@
+#
+# Checkpoint journal for the exos_configurator scripts.
+#
+# Before a build is applied the plan is written to a journal file on flash together with a hash of the build it came from. Every
+# command that is applied successfully is appended by its index, so when the session drops or the build is interrupted, running
+# the script again with the same answers can resume with the commands that were not applied yet. In batch mode progress is
+# recorded once per script chunk, so the scripts compare what is left with the running configuration before resuming. The
+# journal is removed when a build runs to the end.
+#
+# Secrets (SNMPv3 keys, RADIUS shared secrets, the admin hash) are masked in the journal, it can stay on flash after an
+# interrupted build. On resume they are filled back in from the plan rendered from the same answers.
+#
+
+import hashlib
+import json
+import os
+import re
+
+from exoslib.apply import command_text
+from exoslib.commands import REDACTED, normalize, redact
+
+JOURNAL_DIR = '/usr/local/ext'
+JOURNAL_NAME = 'exos_configurator_journal.jsonl'
+# Password hashes get a new salt every time they are entered, only the account they belong to is part of the plan hash
+ENCRYPTED_RE = re.compile(r'^(configure account \S+ encrypted) ')
+
+def plan_hash(plan):
+    '''
+    This function returns a SHA-256 hash that identifies a plan
+    '''
+    digest = hashlib.sha256()
+    for command in plan:
+        text = normalize(command_text(command))
+        match = ENCRYPTED_RE.match(text)
+        if match:
+            text = match.group(1)
+        digest.update((text + '\n').encode('utf-8'))
+    return digest.hexdigest()
+
+def masked(command):
+    '''
+    This function returns a plan entry with its secrets masked, in the form it is written to the journal
+    '''
+    if isinstance(command, tuple):
+        return [redact(command[0])] + list(command[1:])
+    return redact(command)
+
+class Journal(object):
+    '''
+    This class records which commands of a plan have been applied
+    observer is called with every command that is recorded, so the journal can stand in for another apply observer.
+    '''
+    def __init__(self, path=None, observer=None):
+        self.path = path or os.path.join(JOURNAL_DIR, JOURNAL_NAME)
+        self.observer = observer
+        self.key = None
+        self.plan = []
+        self.done = set()
+        self.cursor = 0
+        self.journal = None
+
+    def resume(self, key, intended):
+        '''
+        This function returns the commands that were not applied by an unfinished build with the same key, or None
+        intended is the plan rendered from the current answers, the masked secrets are taken from it.
+        '''
+        try:
+            with open(self.path) as journal:
+                header = json.loads(journal.readline())
+                done = set(int(line) for line in journal if line.strip())
+        except (IOError, OSError, ValueError):
+            return None
+        if header.get('key') != key:
+            return None
+        secrets = {}
+        for command in intended:
+            if redact(command_text(command)) != command_text(command):
+                secrets[redact(command_text(command))] = command
+        plan = []
+        for command in header['plan']:
+            command = tuple(command) if isinstance(command, list) else command
+            if REDACTED in command_text(command):
+                if command_text(command) not in secrets:
+                    return None
+                command = secrets[command_text(command)]
+            plan.append(command)
+        self.key = key
+        self.plan = plan
+        self.done = done
+        self.cursor = 0
+        self.journal = open(self.path, 'a')
+        return [command for index, command in enumerate(self.plan) if index not in done]
+
+    def start(self, key, plan):
+        '''
+        This function starts a new journal for a plan, replacing any previous one
+        Only the plan hash, the masked plan and the applied indexes are written.
+        '''
+        self.key = key
+        self.plan = list(plan)
+        self.done = set()
+        self.cursor = 0
+        self.journal = open(self.path, 'w')
+        self.journal.write(json.dumps({'key': key, 'plan': [masked(command) for command in self.plan]}) + '\n')
+        self.journal.flush()
+
+    def record(self, command):
+        '''
+        This function marks the next pending occurrence of a command as applied
+        Commands are mostly applied in plan order, so the search starts after the last recorded command and wraps around for
+        the ones the scheduler moved.
+        '''
+        for index in list(range(self.cursor, len(self.plan))) + list(range(self.cursor)):
+            if index not in self.done and command_text(self.plan[index]) == command:
+                self.done.add(index)
+                self.cursor = index + 1
+                self.journal.write('{}\n'.format(index))
+                self.journal.flush()
+                break
+        if self.observer:
+            self.observer(command)
+
+    def finish(self):
+        '''
+        This function removes the journal once the build has completed
+        '''
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,166 @@
+#
+# Command optimizer for the exos_configurator scripts.
+#
+# Sits between rendering and the apply engine and makes the plan shorter without changing the end result:
+#   - ports whose settings are overridden later (for example edge protections undone by the uplink exceptions) are removed from
+#     the earlier command, and commands left without ports are dropped
+#   - repeated commands are dropped
+#   - the basic LLDP advertisements for the same ports are merged into one command
+#   - VLANs tagged on the same ports are added with one VLAN list command using their tags
+#   - commands with the same template are merged into one command with the combined port list
+#   - objects are created before the first command that uses them
+#
+
+import re
+
+from exoslib.apply import command_text
+from exoslib.commands import PORTS_TOKEN, attributes, effective_ports, normalize
+from exoslib.ports import format_ports
+
+BASIC_LLDP_TLVS = ('port-description', 'system-name', 'system-description', 'system-capabilities', 'management-address')
+LLDP_RE = re.compile(r'^configure lldp ports \{ports\} advertise (\S+)$')
+CREATE_VLAN_RE = re.compile(r'^create vlan "?([^"\s]+)"? tag (\d+)$', re.IGNORECASE)
+VLAN_ADD_RE = re.compile(r'^configure vlan "?([^"\s]+)"? add ports \{ports\} (tagged|untagged)$', re.IGNORECASE)
+CREATE_RE = re.compile(r'^create (vlan|stpd|qosprofile) "?([^"\s]+)"?', re.IGNORECASE)
+# An object is used where it is the target of a command: after its kind (configure vlan Staff, enable stpd s1, qosprofile QP6),
+# or right after the verb for the commands EXOS accepts without the kind (configure Default delete ports, enable s1 auto-bind)
+TARGET_RE = r'(?:\b{kind}\s+|^(?:configure|unconfigure|enable|disable|delete)\s+)"?{name}"?(?:\s|$)'
+
+class Entry(object):
+    '''
+    This class is one command in the plan being optimized. Port commands keep their template and port set so they can be merged.
+    '''
+    def __init__(self, command, template=None, ports=None):
+        self.command = command
+        self.template = template
+        self.ports = ports
+
+    def text(self):
+        if self.ports is None:
+            return self.command
+        return self.template.replace(PORTS_TOKEN, format_ports(self.ports))
+
+def drop_overridden(plan):
+    '''
+    This function returns the plan as entries, narrowed to the ports each command still decides
+    '''
+    entries = []
+    texts = [command_text(command) for command in plan]
+    for command, (text, template, ports) in zip(plan, effective_ports(texts)):
+        if isinstance(command, tuple) or ports is None:
+            entries.append(Entry(command))
+        elif ports:
+            entries.append(Entry(command, template, ports))
+    return entries
+
+def drop_duplicates(entries):
+    '''
+    This function drops commands that repeat an earlier command with nothing of the same kind in between
+    '''
+    kept = []
+    last = {}
+    for entry in entries:
+        text = normalize(command_text(entry.text()))
+        kind = normalize(entry.template) if entry.ports is not None else text
+        if not isinstance(entry.command, tuple) and last.get(kind) == text:
+            continue
+        last[kind] = text
+        kept.append(entry)
+    return kept
+
+def merge_lldp(entries):
+    '''
+    This function merges the basic LLDP advertisements for the same ports into one command
+    '''
+    kept = []
+    first = {}
+    for entry in entries:
+        match = LLDP_RE.match(normalize(entry.template)) if entry.ports is not None else None
+        if match and match.group(1) in BASIC_LLDP_TLVS:
+            key = entry.ports
+            if key in first:
+                target = first[key]
+                target.template = target.template + ' ' + match.group(1)
+                continue
+            first[key] = entry
+        kept.append(entry)
+    return kept
+
+def merge_vlans(entries):
+    '''
+    This function adds VLANs created in the plan to the same ports with one VLAN list command using their tags
+    The merged command takes the place of the last VLAN it replaces so every VLAN already exists when it runs.
+    '''
+    tags = {}
+    for entry in entries:
+        match = CREATE_VLAN_RE.match(command_text(entry.text()))
+        if match:
+            tags[match.group(1).lower()] = match.group(2)
+    groups = {}
+    for index, entry in enumerate(entries):
+        match = VLAN_ADD_RE.match(entry.template or '') if entry.ports is not None else None
+        if match and match.group(1).lower() in tags:
+            groups.setdefault((entry.ports, match.group(2)), []).append(index)
+    replace = {}
+    for (ports, mode), indexes in groups.items():
+        if len(indexes) < 2:
+            continue
+        vlan_tags = sorted(int(tags[VLAN_ADD_RE.match(entries[index].template).group(1).lower()]) for index in indexes)
+        merged = Entry(None, 'configure vlan {} add ports {} {}'.format(','.join(str(tag) for tag in vlan_tags), PORTS_TOKEN, mode), ports)
+        for index in indexes:
+            replace[index] = None
+        replace[indexes[-1]] = merged
+    return [replace.get(index, entry) for index, entry in enumerate(entries) if replace.get(index, entry) is not None]
+
+def merge_ports(entries):
+    '''
+    This function merges commands with the same template into the first one when nothing in between sets the same attributes
+    '''
+    kept = []
+    for entry in entries:
+        if entry.ports is not None:
+            owned = attributes(entry.template)
+            for target in reversed(kept):
+                if target.ports is not None and target.template == entry.template:
+                    target.ports = target.ports | entry.ports
+                    entry = None
+                    break
+                if target.ports is not None and set(owned) & set(attributes(target.template)):
+                    break
+                if target.ports is None or isinstance(target.command, tuple):
+                    break
+        if entry is not None:
+            kept.append(entry)
+    return kept
+
+def dependency_order(entries):
+    '''
+    This function moves every create command in front of the first command that uses the object it creates
+    A command uses the object when it is the command's target, a name that only shows up elsewhere in a command (a VLAN named
+    voice and an LLDP voice policy) does not count.
+    '''
+    ordered = list(entries)
+    for entry in list(ordered):
+        match = CREATE_RE.match(command_text(entry.text()))
+        if not match:
+            continue
+        target = re.compile(TARGET_RE.format(kind=match.group(1), name=re.escape(match.group(2))), re.IGNORECASE)
+        position = ordered.index(entry)
+        for index in range(position):
+            if target.search(command_text(ordered[index].text())):
+                ordered.insert(index, ordered.pop(position))
+                break
+    return ordered
+
+def optimize(plan):
+    '''
+    This function returns (optimized plan, number of commands removed)
+    '''
+    entries = drop_overridden(plan)
+    entries = drop_duplicates(entries)
+    entries = merge_lldp(entries)
+    entries = merge_vlans(entries)
+    entries = merge_ports(entries)
+    entries = dependency_order(entries)
+    optimized = [entry.command if entry.ports is None else entry.text() for entry in entries]
+    return optimized, len(plan) - len(optimized)
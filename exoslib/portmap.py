@@ -0,0 +1,110 @@
+#
+# Per-port settings from a port map file for the exos_configurator scripts.
+#
+# The port map is a CSV file with a port column and optional description, vlan (untagged VLAN), poe_priority and voice_vlan
+# columns. It is read one row at a time and every port is only added to the group of ports sharing the same setting, kept as
+# intervals per slot, so a stack of 384 ports in order ends up as a handful of ranges. Each group becomes a single range command,
+# for example every port with untagged Staff in one "configure vlan Staff add ports 1:1-24,2:1-12 untagged".
+#
+
+import csv
+
+from exoslib.ports import PortSet
+
+COLUMNS = ('port', 'description', 'vlan', 'poe_priority', 'voice_vlan')
+POE_PRIORITIES = ('low', 'high', 'critical')
+VOICE_DSCP = 46
+
+class PortGroups(object):
+    '''
+    This class collects the ports of every distinct setting as intervals, growing the last interval while ports come in order
+    '''
+    def __init__(self):
+        self.groups = {}
+        self.order = []
+
+    def add(self, key, ports):
+        slots = self.groups.get(key)
+        if slots is None:
+            slots = self.groups[key] = {}
+            self.order.append(key)
+        for slot, intervals in ports.slots.items():
+            current = slots.setdefault(slot, [])
+            for start, end in intervals:
+                if current and current[-1][0] <= start <= current[-1][1] + 1:
+                    current[-1] = (current[-1][0], max(current[-1][1], end))
+                else:
+                    current.append((start, end))
+
+    def ports(self, key):
+        return PortSet(self.groups[key])
+
+def group_commands(kind, value, ports):
+    '''
+    This function returns the commands for one group of ports sharing a setting
+    '''
+    if kind == 'vlan':
+        return ['configure vlan {} add ports {} untagged'.format(value, ports)]
+    if kind == 'voice_vlan':
+        return [
+            'configure vlan {} add ports {} tagged'.format(value, ports),
+            'configure lldp ports {} advertise vendor-specific med policy application voice vlan {} dscp {}'.format(ports, value, VOICE_DSCP),
+        ]
+    if kind == 'poe_priority':
+        return ['configure inline-power priority {} ports {}'.format(value, ports)]
+    return ['configure ports {} description-string "{}"'.format(ports, value)]
+
+def check_value(kind, value, vlans):
+    '''
+    This function returns a port map value in the form used in commands, raising ValueError if the switch would reject it
+    '''
+    if kind in ('vlan', 'voice_vlan'):
+        if vlans is not None:
+            names = dict((name.lower(), name) for name in vlans)
+            if value.lower() not in names:
+                raise ValueError('VLAN {} is not in the VLAN list'.format(value))
+            return names[value.lower()]
+        return value
+    if kind == 'poe_priority':
+        if value.lower() not in POE_PRIORITIES:
+            raise ValueError('PoE priority must be one of {}, not {}'.format(', '.join(POE_PRIORITIES), value))
+        return value.lower()
+    if '"' in value:
+        raise ValueError('descriptions cannot contain double quotes')
+    return value
+
+def read_port_map(path, vlans=None, valid=None):
+    '''
+    This function reads a port map CSV file and returns the range commands for it, raising ValueError on a bad row
+    vlans is the list of VLAN names the build creates and valid the PortSet of ports on the switch; either can be None.
+    '''
+    groups = PortGroups()
+    with open(path) as port_map:
+        reader = csv.DictReader(port_map)
+        if 'port' not in [column.strip().lower() for column in reader.fieldnames or []]:
+            raise ValueError('{} has no port column'.format(path))
+        for row in reader:
+            row = dict((str(key).strip().lower(), (value or '').strip()) for key, value in row.items() if key)
+            if not row.get('port'):
+                continue
+            try:
+                ports = PortSet.parse(row['port'])
+                if valid is not None and not ports.issubset(valid):
+                    raise ValueError('port {} is not on this switch'.format(ports - valid))
+                for kind in COLUMNS[1:]:
+                    if row.get(kind):
+                        groups.add((kind, check_value(kind, row[kind], vlans)), ports)
+            except ValueError as e:
+                raise ValueError('line {}: {}'.format(reader.line_num, e))
+
+    commands = []
+    for kind in COLUMNS[1:]:
+        keys = [key for key in groups.order if key[0] == kind]
+        seen = PortSet()
+        for key in keys:
+            ports = groups.ports(key)
+            if ports & seen:
+                raise ValueError('port(s) {} have more than one {} in {}'.format(ports & seen, kind.replace('_', ' '), path))
+            seen = seen | ports
+            commands.extend(group_commands(kind, key[1], ports))
+    return commands
@@ -0,0 +1,190 @@
+#
+# Port sets for the exos_configurator scripts.
+#
+# A PortSet stores ports as sorted, non-overlapping (start, end) intervals per slot, so a full 8 x 48 stack is 8 intervals no
+# matter how many ports it covers. It parses and prints EXOS port lists (1-48, 1:1-48,2:1-48, 1:57,2:57) for any stack size and
+# port count, supports union, difference and intersection, and always prints the shortest list of ranges. Slot 0 stands for a
+# standalone switch, whose ports are written without a slot.
+#
+
+import re
+
+PORT_LIST_RE = re.compile(r'^(\d+:)?\d+(-\d+)?(,(\d+:)?\d+(-\d+)?)*$')
+PORT_RE = re.compile(r'^(?:(\d+):)?(\d+)(?:-(\d+))?$')
+
+class PortSet(object):
+    '''
+    This class is an immutable set of switch ports stored as intervals per slot
+    '''
+    __slots__ = ('slots',)
+
+    def __init__(self, slots=None):
+        self.slots = {}
+        for slot, intervals in (slots or {}).items():
+            merged = merge_intervals(intervals)
+            if merged:
+                self.slots[slot] = merged
+
+    @classmethod
+    def parse(cls, text):
+        '''
+        This function returns the PortSet for an EXOS port list, raising ValueError if the text is not one
+        '''
+        slots = {}
+        for part in str(text).replace(' ', '').split(','):
+            match = PORT_RE.match(part)
+            if not match:
+                raise ValueError('invalid port list: {}'.format(text))
+            start = int(match.group(2))
+            end = int(match.group(3) or start)
+            if end < start:
+                raise ValueError('invalid port range: {}'.format(part))
+            slots.setdefault(int(match.group(1) or 0), []).append((start, end))
+        return cls(slots)
+
+    @classmethod
+    def stack(cls, stack_amount, port_count, first=1, slotted=False):
+        '''
+        This function returns ports first to port_count on every switch of a stack
+        A single switch uses slot 0 (no slot in the port list) unless slotted is set.
+        '''
+        if stack_amount == 1 and not slotted:
+            return cls({0: [(first, port_count)]})
+        return cls(dict((slot, [(first, port_count)]) for slot in range(1, stack_amount + 1)))
+
+    def __iter__(self):
+        for slot in sorted(self.slots):
+            for start, end in self.slots[slot]:
+                for port in range(start, end + 1):
+                    yield '{}:{}'.format(slot, port) if slot else str(port)
+
+    def __len__(self):
+        return sum(end - start + 1 for intervals in self.slots.values() for start, end in intervals)
+
+    def __bool__(self):
+        return bool(self.slots)
+
+    __nonzero__ = __bool__
+
+    def __contains__(self, port):
+        match = PORT_RE.match(str(port))
+        if not match:
+            return False
+        number = int(match.group(2))
+        return any(start <= number <= end for start, end in self.slots.get(int(match.group(1) or 0), ()))
+
+    def __eq__(self, other):
+        return isinstance(other, PortSet) and self.slots == other.slots
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(sorted((slot, tuple(intervals)) for slot, intervals in self.slots.items())))
+
+    def __or__(self, other):
+        slots = dict((slot, list(intervals)) for slot, intervals in self.slots.items())
+        for slot, intervals in other.slots.items():
+            slots.setdefault(slot, []).extend(intervals)
+        return PortSet(slots)
+
+    def __and__(self, other):
+        slots = {}
+        for slot, intervals in self.slots.items():
+            for start, end in intervals:
+                for other_start, other_end in other.slots.get(slot, ()):
+                    if other_start <= end and start <= other_end:
+                        slots.setdefault(slot, []).append((max(start, other_start), min(end, other_end)))
+        return PortSet(slots)
+
+    def __sub__(self, other):
+        slots = {}
+        for slot, intervals in self.slots.items():
+            remaining = list(intervals)
+            for other_start, other_end in other.slots.get(slot, ()):
+                cut = []
+                for start, end in remaining:
+                    if other_end < start or end < other_start:
+                        cut.append((start, end))
+                        continue
+                    if start < other_start:
+                        cut.append((start, other_start - 1))
+                    if other_end < end:
+                        cut.append((other_end + 1, end))
+                remaining = cut
+            slots[slot] = remaining
+        return PortSet(slots)
+
+    def issubset(self, other):
+        return not (self - other)
+
+    def numbers(self):
+        '''
+        This function returns the set of port numbers regardless of slot, for checks such as "is any port a copper port"
+        '''
+        return set(int(port.split(':')[-1]) for port in self)
+
+    def __str__(self):
+        parts = []
+        for slot in sorted(self.slots):
+            prefix = '{}:'.format(slot) if slot else ''
+            for start, end in self.slots[slot]:
+                parts.append('{}{}'.format(prefix, start) if start == end else '{}{}-{}'.format(prefix, start, end))
+        return ','.join(parts)
+
+    def __repr__(self):
+        return 'PortSet({!r})'.format(str(self))
+
+def merge_intervals(intervals):
+    '''
+    This function returns sorted intervals with overlapping and adjacent ones joined
+    '''
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def is_port_list(text):
+    '''
+    This function returns True if the text looks like an EXOS port list such as 1:1-48,2:1-48
+    '''
+    return bool(PORT_LIST_RE.match(text or ''))
+
+def expand_ports(text):
+    '''
+    This function returns a list of single ports (1:5 or 5) from an EXOS port list
+    '''
+    return list(PortSet.parse(text))
+
+def format_ports(ports):
+    '''
+    This function returns the shortest EXOS port list for a PortSet or any iterable of single ports
+    '''
+    if not isinstance(ports, PortSet):
+        ports = PortSet.parse(','.join(ports)) if ports else PortSet()
+    return str(ports)
+
+def stack_ports(stack_amount, edge_ports, slotted=False):
+    '''
+    This function returns the edge port list for a stack, for example 1:1-48,2:1-48
+    '''
+    return str(PortSet.stack(stack_amount, edge_ports, slotted=slotted))
+
+def parse_uplink(text, stack_amount):
+    '''
+    This function returns the PortSet for the uplink port(s) entered in the menu, raising ValueError on bad input
+    A standalone switch accepts 1:52 as well as 52, a stack needs the slot:port format with a slot that is in the stack.
+    '''
+    uplink = PortSet.parse(text)
+    if stack_amount == 1:
+        if set(uplink.slots) - set([0, 1]):
+            raise ValueError('a single switch only has slot 1')
+        return PortSet({0: [interval for intervals in uplink.slots.values() for interval in intervals]})
+    if 0 in uplink.slots:
+        raise ValueError('use the slot:port format for a stack, for example 1:48')
+    if max(uplink.slots) > stack_amount:
+        raise ValueError('slot {} is not part of a {} switch stack'.format(max(uplink.slots), stack_amount))
+    return uplink
@@ -0,0 +1,98 @@
+#
+# Pre-flight reachability checks for the exos_configurator scripts.
+#
+# Before a build changes anything, the gateway, RADIUS, syslog and NTP servers the plan configures are pinged from the switch.
+# exsh gives no guarantee that clicmd can be called from two threads at once, so the checks run one after the other. They share
+# one time budget: every check gets an even share of what is left, and a ping sends one echo request per second of its share, so
+# the last server is still checked when the ones before it did not answer. A server that does not answer blocks the build: a
+# wrong RADIUS server together with the new admin password can lock everyone out of the switch. A switch without an address on
+# the management VLAN cannot reach any server before the build configures one, so the checks are skipped there instead of
+# blocking every new switch.
+#
+
+import re
+import time
+
+from exoslib.apply import command_text
+
+BUDGET = 10
+TARGETS = [
+    ('Gateway', re.compile(r'^configure iproute add default (\S+)', re.IGNORECASE)),
+    ('RADIUS', re.compile(r'^configure radius (?:mgmt-access|netlogin) \d+ server (\S+)', re.IGNORECASE)),
+    ('Syslog', re.compile(r'^configure syslog (\S+)', re.IGNORECASE)),
+    ('NTP', re.compile(r'^configure (?:sntp-client (?:primary|secondary)|ntp server add) (\S+)', re.IGNORECASE)),
+]
+RECEIVED_RE = re.compile(r'(\d+) packets received')
+IPV4_RE = re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$')
+
+def targets(plan):
+    '''
+    This function returns the (role, host) pairs of the servers a plan configures, in plan order and without repeats
+    '''
+    found = []
+    for command in plan:
+        text = command_text(command)
+        for role, pattern in TARGETS:
+            match = pattern.match(text)
+            if match and (role, match.group(1)) not in found:
+                found.append((role, match.group(1)))
+    return found
+
+def management_address(output, vlan='NetMgmt'):
+    '''
+    This function returns the IP address of the management VLAN from "show vlan" output, or None when it has none
+    '''
+    for line in (output or '').splitlines():
+        fields = line.split()
+        if fields and fields[0].lower() == vlan.lower():
+            return next((field for field in fields[1:] if IPV4_RE.match(field)), None)
+    return None
+
+def ping_check(clicmd, vr='VR-Default', count=2):
+    '''
+    This function returns a check that pings a host from the switch within timeout seconds and returns (reachable, detail)
+    EXOS sends one echo request per second, so the ping count is cut down to fit the timeout.
+    '''
+    def check(host, timeout):
+        sent = max(1, min(count, int(timeout)))
+        output = clicmd('ping count {} vr {} {}'.format(sent, vr, host), True)
+        match = RECEIVED_RE.search(output or '')
+        if match and int(match.group(1)) > 0:
+            return True, '{} of {} replies'.format(match.group(1), sent)
+        return False, 'no replies'
+    return check
+
+def run_checks(found, check, budget=BUDGET):
+    '''
+    This function checks the targets one after the other and returns a list of (role, host, reachable, detail)
+    check is called with the host and its share of the budget that is left. Checks that fail with an exception count as
+    unreachable. Host names are not checked (reachable is None), the switch may not be able to resolve them before the build.
+    '''
+    deadline = time.time() + budget
+    pending = len([host for _, host in found if IPV4_RE.match(host)])
+    results = []
+    for role, host in found:
+        if not IPV4_RE.match(host):
+            results.append((role, host, None, 'not checked, not an IP address'))
+            continue
+        timeout = max(0, deadline - time.time()) / pending
+        pending -= 1
+        try:
+            reachable, detail = check(host, timeout)
+        except Exception as e:
+            reachable, detail = False, str(e)
+        results.append((role, host, reachable, detail))
+    return results
+
+def print_results(results):
+    '''
+    This function prints the pre-flight results and returns True if every checked server is reachable
+    '''
+    checked = [result for result in results if result[2] is not None]
+    failed = [result for result in checked if not result[2]]
+    color = '\033[92m' if not failed else '\033[41m'
+    print('{}Pre-flight: {} of {} server(s) reachable\033[0m'.format(color, len(checked) - len(failed), len(checked)))
+    for role, host, reachable, detail in results:
+        status = 'SKIP' if reachable is None else ('\033[92mPASS\033[0m' if reachable else '\033[41mFAIL\033[0m')
+        print('  {:<8} {:<16} {} {}'.format(role, host, status, detail))
+    return not failed
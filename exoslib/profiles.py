@@ -0,0 +1,286 @@
+#
+# Template profile engine for the exos_configurator scripts.
+#
+# A profile is a named list of command fragments plus the constants that differ between sites (contact, time zone). Fragments
+# that both versions use, like SSH, IGMP snooping and the default route, are written once. Each profile is compiled the first
+# time it is used: the profile constants are filled in, lines without per-switch values become plain strings and the rest become
+# bound str.format calls with only the per-switch fields. The compiled form is cached per profile together with the content it
+# was compiled from. Rendering compares that content with ==, which costs far less than hashing it, so a changed profile is
+# compiled again and rendering a switch only substitutes the values that change per switch. {name!l} inserts the value in
+# lowercase.
+# Lines whose port list comes out empty (an edge range that is all uplinks) are left out instead of sent without ports.
+#
+
+import string
+
+FRAGMENTS = {
+    'management_1_4': [
+        'configure Default delete ports all',
+        'configure vlan NetMgmt ipaddress {switch_ip} 255.255.255.0',
+    ],
+    'management_1_5': [
+        'configure vlan NetMgmt ipaddress {switch_ip}/23',
+    ],
+    'default_route': [
+        'configure iproute add default {gateway_ip}',
+    ],
+    'snmp_identity_1_4': [
+        'configure snmp sysContact {contact}',
+        'configure snmp sysName {snmp_name!l}',
+        'configure snmp sysLocation {snmp_location!l}',
+    ],
+    'snmp_identity_1_5': [
+        'configure snmp sysContact {contact}',
+        'configure snmp sysName {snmp_name}',
+        'configure snmp sysLocation {snmp_name}',
+    ],
+    'snmpv3_user': [
+        'configure snmpv3 add user snmpuser authentication md5 {snmp_auth} privacy des {snmp_priv}',
+        'configure snmpv3 add group public user snmpuser sec-model usm',
+        'configure snmpv3 add access public sec-model usm sec-level priv read-view "defaultAdminView" write-view "defaultAdminView" notify-view "defaultAdminView"',
+    ],
+    'snmpv3_no_default_group': [
+        'disable snmpv3 default-group',
+    ],
+    'snmpv3_access': [
+        'enable snmp access snmpv3',
+    ],
+    'ssh': [
+        'enable ssh2',
+    ],
+    'no_plaintext_management': [
+        'disable telnet',
+        'disable web http',
+    ],
+    'igmp_snooping': [
+        'enable igmp snooping',
+    ],
+    'edge_storm_control': [
+        'configure ports {ports} rate-limit flood broadcast 500',
+    ],
+    'mstp': [
+        'create stpd s1',
+        'disable s0 auto-bind Default',
+        'configure mstp revision 3',
+        'configure stpd s1 mode mstp msti 1',
+        'enable s1 auto-bind vlan 1-4094',
+        'enable stpd s1',
+    ],
+    'edge_mac_locking': [
+        'enable mac-locking',
+        'enable mac-locking ports {ports}',
+        'configure mac-locking ports {ports} first-arrival limit-learning 8',
+    ],
+    'edge_stp': [
+        'configure stpd s0 ports link-type edge {ports} edge-safeguard enable bpdu-restrict',
+        'configure stpd s1 ports link-type edge {ports} edge-safeguard enable bpdu-restrict',
+    ],
+    'netlogin_mac': [
+        'create vlan nt_login',
+        'enable policy',
+        'enable netlogin mac',
+        'configure netlogin mac authentication database-order radius',
+        'configure netlogin add mac-list ff:ff:ff:ff:ff:ff 48',
+        'configure netlogin mac timers reauth-period 3600',
+        'enable netlogin ports {ports} mac',
+    ],
+    'lldp_voice_1_4': [
+        'enable lldp port all',
+        'configure vlan VoIP add ports {ports} tagged',
+        'configure lldp ports {ports} advertise port-description',
+        'configure lldp ports {ports} advertise system-capabilities',
+        'configure lldp ports {ports} advertise management-address',
+        'configure lldp ports {ports} advertise vendor-specific dot3 power-via-mdi',
+        'configure lldp ports {ports} advertise vendor-specific med capabilities',
+    ],
+    'lldp_1_5': [
+        'enable lldp ports all',
+        'configure lldp ports all advertise all-tlvs',
+        'configure lldp ports all advertise vendor-specific med capabilities',
+        'configure lldp management-address vlan NetMgmt',
+    ],
+    'sntp': [
+        'configure sntp-client primary 10.1.1.1',
+        'configure sntp-client secondary 10.1.1.2',
+        'enable sntp-client',
+    ],
+    'ntp': [
+        'configure ntp server add pool.ntp.org vr VR-Default',
+        'enable ntp vlan NetMgmt',
+    ],
+    'timezone': [
+        'configure timezone name {timezone} {utc_offset} autodst name {dst_timezone} begins every second sunday march at 2 0 ends every first sunday november at 2 0',
+    ],
+    'syslog': [
+        'configure syslog {syslog_ip} vr VR-Default {facility}',
+        'configure syslog {syslog_ip} vr VR-Default {facility} severity {severity}',
+        'enable log target syslog {syslog_ip} vr VR-Default {facility}',
+    ],
+    'radius_mgmt_access': [
+        'configure radius mgmt-access 3 server {radius_primary} 1812 client-ip {switch_ip} vr VR-Default',
+        'configure radius mgmt-access 4 server {radius_secondary} 1812 client-ip {switch_ip} vr VR-Default',
+        'configure radius 3 shared-secret {radius_secret}',
+        'configure radius 4 shared-secret {radius_secret}',
+        'enable radius mgmt-access',
+    ],
+    'admin_password': [
+        'configure account admin encrypted {admin_password}',
+    ],
+    'lacp_uplinks': [
+        'configure ports 1:57,{stack_amount}:57 partition 4x10G',
+        'configure ports 1:57-60,{stack_amount}:57-60 auto off speed 10000 duplex full',
+        'enable sharing 1:57 grouping 1:57,{stack_amount}:57 lacp',
+        'enable sharing 1:58 grouping 1:58,{stack_amount}:58 lacp',
+        'enable sharing 1:59 grouping 1:59,{stack_amount}:59 lacp',
+        'enable sharing 1:60 grouping 1:60,{stack_amount}:60 lacp',
+    ],
+    'default_vlan_cleanup': [
+        'configure vlan Default delete ports all',
+    ],
+    'voice_qos': [
+        'create qosprofile "QP6"',
+        'configure qosprofile QP6 maxbuffer 100 use-strict-priority',
+        'configure qosprofile QP6 minbw 0 maxbw 100 ports {edge_ports}',
+        'configure diffserv examination code-point 24 qosprofile QP6',
+        'configure diffserv examination code-point 46 qosprofile QP6',
+        'enable diffserv examination ports {edge_ports}',
+        'disable dot1p examination ports all',
+    ],
+    'cli_defaults': [
+        'configure vlan untagged-ports auto-move inform',
+        'configure cli moved-keywords show',
+        'configure cli idle-timeout 240',
+    ],
+    'log_format': [
+        'configure log target memory-buffer format timestamp hundredths date mm/dd/yyyy event-name condition severity',
+        'configure log target nvram format timestamp hundredths date mm/dd/yyyy event-name condition severity',
+        'configure log target console format timestamp hundredths date mm/dd/yyyy event-name condition severity',
+    ],
+    'edge_access_vlan': [
+        'configure vlan {access_vlan} add ports {edge_ports} untagged',
+    ],
+    'elrp': [
+        'configure vlan ElrpVlan add ports all tagged',
+    ],
+    'support': [
+        'enable tech-support collector',
+        'enable loopback-mode vlan NetMgmt',
+    ],
+    'stack_master_capability': [
+        'configure stacking slot 2 master-capability off',
+        'configure stacking slot {stack_amount} master-capability on',
+    ],
+}
+
+PROFILES = {
+    '1.4 edge closet': ({
+        'contact': 'hostmaster@example.com',
+        'timezone': 'CST',
+        'utc_offset': '-360',
+        'dst_timezone': 'CDT',
+    }, [
+        'management_1_4', 'default_route', 'snmp_identity_1_4', 'snmpv3_user', 'snmpv3_access', 'ssh', 'no_plaintext_management',
+        'igmp_snooping', 'edge_storm_control', 'mstp', 'edge_mac_locking', 'edge_stp', 'netlogin_mac', 'lldp_voice_1_4', 'sntp',
+        'timezone', 'syslog', 'radius_mgmt_access', 'admin_password',
+    ]),
+    '1.5 LACP uplink stack': ({
+        'contact': '"hostmaster@example.com, 999-888-7777"',
+        'timezone': 'EDT',
+        'utc_offset': '-300',
+        'dst_timezone': 'EDT',
+        'access_vlan': 'Staff',
+    }, [
+        'lacp_uplinks', 'default_vlan_cleanup', 'voice_qos', 'cli_defaults', 'log_format', 'edge_access_vlan', 'management_1_5',
+        'default_route', 'snmp_identity_1_5', 'snmpv3_no_default_group', 'snmpv3_access', 'ssh', 'igmp_snooping', 'lldp_1_5', 'ntp',
+        'elrp', 'timezone', 'support', 'stack_master_capability',
+    ]),
+}
+
+FORMATTER = string.Formatter()
+LOWER_SUFFIX = '__lower'
+PORT_FIELDS = ('ports', 'edge_ports', 'uplink')
+_compiled = {}
+
+def escape(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+def compile_lines(lines, constants):
+    '''
+    This function returns (lines, lowered) where every line is (format, text, fields) and lowered is the fields used with !l
+    Constants are filled in here, so a line that only uses constants compiles to its final text with no format. The other
+    lines become the bound format method of a template with only the per-switch fields left in it.
+    '''
+    compiled = []
+    lowered = set()
+    for line in lines:
+        template = ''
+        text = ''
+        used = set()
+        for literal, field, spec, conversion in FORMATTER.parse(line):
+            template += escape(literal)
+            text += literal
+            if field is None:
+                continue
+            if spec or conversion not in (None, 'l'):
+                raise ValueError('only {{name}} and {{name!l}} are supported in profile lines: {}'.format(line))
+            if field in constants:
+                value = str(constants[field])
+                value = value.lower() if conversion == 'l' else value
+                template += escape(value)
+                text += value
+            else:
+                used.add(field)
+                if conversion == 'l':
+                    lowered.add(field)
+                    field += LOWER_SUFFIX
+                template += '{' + field + '}'
+        compiled.append((template.format if used else None, text, frozenset(used)))
+    return compiled, lowered
+
+def profile_lines(name, profiles=None):
+    '''
+    This function returns (constants, lines) of a profile with its fragments expanded
+    '''
+    constants, fragments = (profiles or PROFILES)[name]
+    lines = []
+    for fragment in fragments:
+        lines.extend(FRAGMENTS[fragment])
+    return constants, lines
+
+def compile_profile(name, profiles=None):
+    '''
+    This function returns the compiled form of a profile, compiling it again only when its content changed
+    '''
+    constants, lines = profile_lines(name, profiles)
+    cached = _compiled.get(name)
+    if cached is None or cached[0] != constants or cached[1] != lines:
+        cached = _compiled[name] = (dict(constants), lines, compile_lines(lines, constants))
+    return cached[2]
+
+def fields(name, profiles=None):
+    '''
+    This function returns the names of the values a profile needs for every switch
+    '''
+    lines, lowered = compile_profile(name, profiles)
+    names = set()
+    for _, _, used in lines:
+        names.update(used)
+    return names
+
+def render(name, settings, profiles=None):
+    '''
+    This function returns the commands of a profile for one switch
+    Lines that use a port list field set to an empty list are skipped.
+    '''
+    lines, lowered = compile_profile(name, profiles)
+    values = settings
+    if lowered:
+        values = dict(settings)
+        for field in lowered:
+            if field in values:
+                values[field + LOWER_SUFFIX] = str(values[field]).lower()
+    empty = frozenset(field for field in PORT_FIELDS if field in settings and not str(settings[field]))
+    try:
+        return [line(**values) if line else text for line, text, used in lines if not (empty and used & empty)]
+    except KeyError as e:
+        raise KeyError('the {} profile needs a value for {}'.format(name, e.args[0].replace(LOWER_SUFFIX, '')))
@@ -0,0 +1,288 @@
+#
+# Fleet push driver for the exos_configurator tools.
+#
+# Pushes rendered configurations to many switches at once from a workstation. Every host gets one long-lived CLI session that is
+# kept in a pool and reused for everything sent to that host, including retries. A bounded set of worker threads works through
+# the hosts, and a dropped connection is retried with exponential backoff, resuming from the command that was interrupted.
+#
+
+import re
+import socket
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+PROMPT_RE = re.compile(r'(?:^|\n)[^\n]*[#>] ?\Z')
+CONFIRM_RE = re.compile(r'\([yY]/[nN]\)[:\s]*$')
+# The only confirmations a rendered plan is known to raise, from save and save configuration <name>
+EXPECTED_CONFIRM_RE = re.compile(r'Do you want to save configuration to \S+(?: and overwrite it)?\? \([yY]/[nN]\)[:\s]*$')
+DECLINED = 'Error: declined an unexpected confirmation'
+ERROR_MARKERS = ('Error:', 'Invalid input detected', 'Incomplete command', 'Ambiguous command')
+
+class SessionError(Exception):
+    pass
+
+class CLISession(object):
+    '''
+    This class is an interactive CLI session to one switch. Subclasses provide connect, send, recv and close.
+    '''
+    def __init__(self, address, port, username=None, password=None, timeout=30):
+        self.address = address
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.buffer = ''
+
+    def open(self):
+        self.connect()
+        self.read_until_prompt()
+        self.run('disable clipaging')
+        return self
+
+    def read_until_prompt(self):
+        '''
+        This function reads until the switch prompt and answers the (y/N) confirmations of save with y
+        Any other confirmation is answered with n and marked as an error, so a command that would reboot or erase the switch
+        is never confirmed by accident.
+        '''
+        deadline = time.time() + self.timeout
+        while True:
+            if EXPECTED_CONFIRM_RE.search(self.buffer):
+                self.send('y\n')
+                self.buffer += 'y\n'
+            elif CONFIRM_RE.search(self.buffer):
+                self.send('n\n')
+                self.buffer += 'n\n{}\n'.format(DECLINED)
+            match = PROMPT_RE.search(self.buffer)
+            if match:
+                output = self.buffer[:match.start()]
+                self.buffer = ''
+                return output
+            if time.time() > deadline:
+                raise SessionError('timed out waiting for the prompt from {}'.format(self.address))
+            data = self.recv()
+            if not data:
+                raise SessionError('connection to {} closed'.format(self.address))
+            self.buffer += data.replace('\r', '')
+
+    def run(self, command):
+        '''
+        This function sends one command and returns its output without the echoed command
+        '''
+        self.send(command + '\n')
+        lines = self.read_until_prompt().split('\n')
+        if lines and lines[0].strip() == command.strip():
+            lines = lines[1:]
+        return '\n'.join(lines).strip()
+
+class TCPSession(CLISession):
+    '''
+    This class talks to a plain TCP CLI, such as the local fake switch used for load testing
+    '''
+    def connect(self):
+        try:
+            self.sock = socket.create_connection((self.address, self.port), self.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (socket.error, socket.timeout) as e:
+            raise SessionError('unable to connect to {}: {}'.format(self.address, e))
+
+    def send(self, data):
+        try:
+            self.sock.sendall(data.encode())
+        except socket.error as e:
+            raise SessionError('connection to {} lost: {}'.format(self.address, e))
+
+    def recv(self):
+        try:
+            return self.sock.recv(65536).decode(errors='replace')
+        except (socket.error, socket.timeout) as e:
+            raise SessionError('connection to {} lost: {}'.format(self.address, e))
+
+    def close(self):
+        try:
+            self.sock.close()
+        except socket.error:
+            pass
+
+class SSHSession(CLISession):
+    '''
+    This class talks to the switch CLI over SSH. paramiko is only needed when this transport is used.
+    '''
+    def connect(self):
+        if paramiko is None:
+            raise SessionError('paramiko is required for SSH, install it or use the tcp transport')
+        self.client = paramiko.SSHClient()
+        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            self.client.connect(self.address, self.port, self.username, self.password, timeout=self.timeout, look_for_keys=False, allow_agent=False)
+            self.client.get_transport().set_keepalive(30)
+            self.channel = self.client.invoke_shell(width=512)
+            self.channel.settimeout(self.timeout)
+        except (paramiko.SSHException, socket.error) as e:
+            raise SessionError('unable to connect to {}: {}'.format(self.address, e))
+
+    def send(self, data):
+        try:
+            self.channel.sendall(data)
+        except (paramiko.SSHException, socket.error) as e:
+            raise SessionError('connection to {} lost: {}'.format(self.address, e))
+
+    def recv(self):
+        try:
+            return self.channel.recv(65536).decode(errors='replace')
+        except (paramiko.SSHException, socket.error) as e:
+            raise SessionError('connection to {} lost: {}'.format(self.address, e))
+
+    def close(self):
+        self.client.close()
+
+TRANSPORTS = {
+    'ssh': SSHSession,
+    'tcp': TCPSession,
+}
+
+class SessionPool(object):
+    '''
+    This class keeps one open session per host and hands the same session back until it is discarded
+    '''
+    def __init__(self, transport='ssh', port=22, username=None, password=None, timeout=30):
+        self.factory = TRANSPORTS[transport]
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.opened = 0
+
+    def get(self, host, address):
+        with self.lock:
+            session = self.sessions.get(host)
+        if session is None:
+            session = self.factory(address, self.port, self.username, self.password, self.timeout).open()
+            with self.lock:
+                self.sessions[host] = session
+                self.opened += 1
+        return session
+
+    def discard(self, host):
+        with self.lock:
+            session = self.sessions.pop(host, None)
+        if session is not None:
+            session.close()
+
+    def close_all(self):
+        with self.lock:
+            sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            session.close()
+
+class HostResult(object):
+    '''
+    This class holds the outcome of a push to one host
+    '''
+    def __init__(self, host):
+        self.host = host
+        self.applied = 0
+        self.failures = []
+        self.error = None
+        self.attempts = 0
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None and not self.failures
+
+    def report(self):
+        '''
+        This function returns the result lines for the host, with failures in the same red form as the configurator
+        '''
+        status = '\033[92mOK\033[0m' if self.ok else '\033[41mFAILED\033[0m'
+        lines = ['{}: {} ({} applied, {} failed, {} attempt(s), {:.1f}s)'.format(self.host, status, self.applied, len(self.failures), self.attempts, self.elapsed)]
+        for command, output in self.failures:
+            lines.append('\033[41mThere were errors running this command: {}\033[0m'.format(command))
+        if self.error:
+            lines.append('\033[41m{}\033[0m'.format(self.error))
+        return lines
+
+def is_error(output):
+    '''
+    This function returns True if the command output contains an EXOS error
+    '''
+    return any(marker in output for marker in ERROR_MARKERS)
+
+def push_host(pool, host, address, commands, retries=3, backoff=1.0):
+    '''
+    This function pushes the commands to one host and returns a HostResult
+    A dropped session is reopened after an exponential backoff and the push resumes at the interrupted command.
+    '''
+    result = HostResult(host)
+    started = time.time()
+    index = 0
+    failed_attempts = 0
+    while index < len(commands):
+        result.attempts += 1
+        try:
+            session = pool.get(host, address)
+            while index < len(commands):
+                output = session.run(commands[index])
+                if is_error(output):
+                    result.failures.append((commands[index], output))
+                else:
+                    result.applied += 1
+                index += 1
+        except SessionError as e:
+            pool.discard(host)
+            failed_attempts += 1
+            if failed_attempts > retries:
+                result.error = '{} ({} command(s) not sent)'.format(e, len(commands) - index)
+                break
+            time.sleep(backoff * 2 ** (failed_attempts - 1))
+    result.elapsed = time.time() - started
+    return result
+
+def push_fleet(jobs, pool, workers=16, retries=3, backoff=1.0, callback=None):
+    '''
+    This function pushes (host, address, commands) jobs with a bounded number of worker threads and returns the HostResults
+    callback is called with each HostResult as soon as its host finishes.
+    '''
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                host, address, commands = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                result = push_host(pool, host, address, commands, retries, backoff)
+            except Exception as e:
+                result = HostResult(host)
+                result.error = '{}: {}'.format(type(e).__name__, e)
+            with lock:
+                results.append(result)
+                if callback:
+                    callback(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, min(workers, pending.qsize())))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(0.5)
+    return results
@@ -0,0 +1,94 @@
+#
+# Configuration snapshot and confirmed commit for the exos_configurator scripts.
+#
+# Before anything is applied the running configuration is saved to a named configuration file. With a confirm timer the snapshot
+# is also selected for the next boot and a reboot is scheduled on the switch itself, so the new configuration is only saved once
+# someone confirms it. When nobody confirms in time (including when the session is lost), the switch reboots into the snapshot.
+# A rollback also boots the image the switch is running, so firmware staged for the build is only selected once it is confirmed.
+#
+
+import re
+import time
+
+from exoslib.firmware import parse_partitions
+
+SNAPSHOT_NAME = 'exos_configurator_rollback'
+CONFIG_SELECTED_RE = re.compile(r'^Config Selected:\s*(\S+)', re.MULTILINE)
+
+def selected_config(output):
+    '''
+    This function returns the name of the configuration selected for the next boot from "show switch", without .cfg
+    '''
+    match = CONFIG_SELECTED_RE.search(output or '')
+    if not match:
+        return 'primary'
+    return re.sub(r'\.cfg$', '', match.group(1))
+
+class Rollback(object):
+    '''
+    This class saves the configuration snapshot and runs the confirm timer around a build
+    '''
+    def __init__(self, clicmd, name=SNAPSHOT_NAME):
+        self.clicmd = clicmd
+        self.name = name
+        self.selected = None
+        self.booted_image = None
+        self.selected_image = None
+        self.armed = False
+
+    def save(self, keep_existing=False):
+        '''
+        This function saves the running configuration to the snapshot file and remembers the selected configuration and image
+        A resumed build keeps the snapshot taken before the interrupted run, which is the configuration to go back to.
+        '''
+        output = self.clicmd('show switch', True)
+        partitions = parse_partitions(output)
+        self.booted_image = partitions.get('booted')
+        self.selected_image = partitions.get('selected')
+        self.selected = selected_config(output)
+        if self.selected == self.name:
+            # The switch was rolled back before, confirmed builds go back to the primary configuration
+            self.selected = 'primary'
+        if not keep_existing:
+            # Save asks to confirm and then whether to make the file the default database, which must stay as it was
+            self.clicmd('save configuration {}'.format(self.name), args='y\nn')
+            if selected_config(self.clicmd('show switch', True)) == self.name:
+                self.clicmd('use configuration {}'.format(self.selected))
+
+    def arm(self, minutes):
+        '''
+        This function selects the snapshot and the booted image for the next boot and schedules a reboot in minutes
+        '''
+        when = time.localtime(time.time() + minutes * 60)
+        self.clicmd('use configuration {}'.format(self.name))
+        self.use_booted_image()
+        self.clicmd('reboot time {} {} {} {} {} {}'.format(when.tm_mon, when.tm_mday, when.tm_year, when.tm_hour, when.tm_min, when.tm_sec))
+        self.armed = True
+
+    def confirm(self):
+        '''
+        This function cancels the scheduled reboot, selects the staged image again and saves the new configuration to the
+        previously selected file
+        '''
+        self.clicmd('reboot cancel')
+        if self.selected_image != self.booted_image:
+            self.clicmd('use image {}'.format(self.selected_image))
+        self.clicmd('use configuration {}'.format(self.selected))
+        self.clicmd('save')
+        self.armed = False
+
+    def restore(self):
+        '''
+        This function reboots into the snapshot and the booted image right away
+        '''
+        if not self.armed:
+            self.clicmd('use configuration {}'.format(self.name))
+            self.use_booted_image()
+        self.clicmd('reboot')
+
+    def use_booted_image(self):
+        '''
+        This function selects the image the switch is running for the next boot if another one was selected
+        '''
+        if self.selected_image != self.booted_image:
+            self.clicmd('use image {}'.format(self.booted_image))
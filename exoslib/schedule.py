@@ -0,0 +1,73 @@
+#
+# Command scheduler for the exos_configurator scripts.
+#
+# Tags the commands of the protocols that reconverge on port changes (STP, MAC locking and netlogin) with their effect:
+# configuration, enabling the protocol on ports, or enabling it globally. The scheduler has its own table of which commands
+# belong to which protocol, so it does not change when the verification report groups commands differently. Within each
+# protocol the commands are reordered so that all port settings, including the uplink exclusions, are in place before the
+# protocol is enabled on the ports, and the global enable comes last. The switch then computes STP, learning and authentication
+# state once with the final settings instead of once per command, and edge protections never hit the uplinks in between.
+# Commands only move within the slots their protocol already occupies, and never past another command that sets the same
+# attribute on the same ports. The apply engine schedules every plan, optimized or not.
+#
+
+import re
+
+from exoslib.commands import attributes, command_text, split_ports
+from exoslib.ports import PortSet
+
+FEATURES = [
+    ('STP', re.compile(r'^(?:(?:create|delete|configure|unconfigure|enable|disable) (?:stpd|mstp)\b|(?:enable|disable) \S+ auto-bind\b)', re.IGNORECASE)),
+    ('MAC locking', re.compile(r'^(?:configure|unconfigure|enable|disable) mac-locking\b', re.IGNORECASE)),
+    ('Netlogin', re.compile(r'^(?:configure|unconfigure|enable|disable) netlogin\b', re.IGNORECASE)),
+]
+CONFIG = 'config'
+PORT_ENABLE = 'port enable'
+GLOBAL_ENABLE = 'global enable'
+EFFECTS = (CONFIG, PORT_ENABLE, GLOBAL_ENABLE)
+PORT_ENABLE_RE = re.compile(r'^enable (?:stpd \S+|mac-locking|netlogin) ports ', re.IGNORECASE)
+GLOBAL_ENABLE_RE = re.compile(r'^enable (?:stpd \S+|mac-locking|netlogin (?:mac|dot1x|web-based))$', re.IGNORECASE)
+
+def tag(command):
+    '''
+    This function returns (feature, effect) for a command, where feature is None for commands that are not scheduled
+    '''
+    text = command_text(command).strip()
+    feature = next((name for name, pattern in FEATURES if pattern.match(text)), None)
+    if feature is None or isinstance(command, tuple):
+        return feature, CONFIG
+    if PORT_ENABLE_RE.match(text):
+        return feature, PORT_ENABLE
+    if GLOBAL_ENABLE_RE.match(text):
+        return feature, GLOBAL_ENABLE
+    return feature, CONFIG
+
+def conflicts(first, second):
+    '''
+    This function returns True if two commands set the same attribute on at least one common port, so their order matters
+    '''
+    first_template, first_ports = split_ports(command_text(first))
+    second_template, second_ports = split_ports(command_text(second))
+    if first_ports is None or second_ports is None:
+        return False
+    if not set(attributes(first_template)) & set(attributes(second_template)):
+        return False
+    return bool(PortSet.parse(first_ports) & PortSet.parse(second_ports))
+
+def schedule(plan):
+    '''
+    This function returns the plan with the commands of every protocol feature ordered by effect
+    '''
+    tags = [tag(command) for command in plan]
+    ordered = list(plan)
+    for feature, _ in FEATURES:
+        slots = [index for index, (command_feature, _) in enumerate(tags) if command_feature == feature]
+        current = [plan[index] for index in slots]
+        ranked = sorted(range(len(slots)), key=lambda position: EFFECTS.index(tags[slots[position]][1]))
+        moved = [current[position] for position in ranked]
+        swapped = [(ranked[a], ranked[b]) for a in range(len(ranked)) for b in range(a + 1, len(ranked)) if ranked[a] > ranked[b]]
+        if any(conflicts(current[later], current[earlier]) for later, earlier in swapped):
+            continue
+        for index, command in zip(slots, moved):
+            ordered[index] = command
+    return ordered
@@ -0,0 +1,206 @@
+#
+# Switch state snapshot for the exos_configurator scripts.
+#
+# Each part of the switch state (VLANs, port membership, accounts, image version, port state and hardware) is read with one
+# bulk show command the first time it is needed, parsed into indexed structures and answered from memory after that. Commands
+# applied by the script are fed back through note_command() so the cache stays in step with the switch without reading it again.
+#
+
+import re
+
+from exoslib.hardware import discover
+from exoslib.ports import expand_ports, is_port_list
+
+VLAN_MEMBER_RE = re.compile(r'^configure vlan "?([^"\s]+)"? (add|delete) ports (\S+)\s*(tagged|untagged)?', re.IGNORECASE)
+CREATE_VLAN_RE = re.compile(r'^create vlan "?([^"\s]+)"?(?: tag (\d+))?', re.IGNORECASE)
+VLAN_TAG_RE = re.compile(r'^configure vlan "?([^"\s]+)"? tag (\d+)', re.IGNORECASE)
+DELETE_VLAN_RE = re.compile(r'^delete vlan "?([^"\s]+)"?', re.IGNORECASE)
+DELETE_ACCOUNT_RE = re.compile(r'^delete account "?([^"\s]+)"?', re.IGNORECASE)
+PORT_STATES = ('E', 'D', 'F')
+LINK_STATES = ('A', 'R', 'NP', 'L', 'D', 'd')
+
+def parse_vlans(output):
+    '''
+    This function returns a dictionary of lowercase VLAN name to (name, tag) from "show vlan" output
+    '''
+    vlans = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) > 1 and fields[1].isdigit() and 0 < int(fields[1]) < 4096:
+            vlans[fields[0].lower()] = (fields[0], fields[1])
+    return vlans
+
+def parse_accounts(output):
+    '''
+    This function returns a set of lowercase account names from "show accounts" output
+    '''
+    accounts = set()
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) > 1 and fields[1] in ('RW', 'RO'):
+            accounts.add(fields[0].lower())
+    return accounts
+
+def parse_image(output):
+    '''
+    This function returns the "Image" line from "show version" output
+    '''
+    for line in output.splitlines():
+        if line.strip().startswith('Image'):
+            return line.strip()
+    return ''
+
+def parse_port_states(output):
+    '''
+    This function returns a dictionary of port to (port state, link state) from "show ports no-refresh" output
+    '''
+    states = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if not fields or not is_port_list(fields[0]) or ',' in fields[0] or '-' in fields[0]:
+            continue
+        state = next((f for f in fields[1:] if f in PORT_STATES), None)
+        if state is None:
+            continue
+        rest = fields[fields.index(state, 1) + 1:]
+        link = next((f for f in rest if f in LINK_STATES), None)
+        states[fields[0]] = (state, link)
+    return states
+
+def parse_vlan_ports(output):
+    '''
+    This function returns a dictionary of port to {lowercase VLAN name: tagged/untagged} from "show configuration vlan" output
+    '''
+    port_vlans = {}
+    for line in output.splitlines():
+        match = VLAN_MEMBER_RE.match(line.strip())
+        if match and match.group(2).lower() == 'add' and is_port_list(match.group(3)):
+            for port in expand_ports(match.group(3)):
+                port_vlans.setdefault(port, {})[match.group(1).lower()] = (match.group(4) or 'untagged').lower()
+    return port_vlans
+
+class SwitchSnapshot(object):
+    '''
+    This class caches the switch state read with one bulk show command per area
+    '''
+    def __init__(self, clicmd):
+        self.clicmd = clicmd
+        self.reads = 0
+        self._vlans = None
+        self._vlan_ports = None
+        self._accounts = None
+        self._image = None
+        self._port_states = None
+        self._hardware = None
+
+    def show(self, command):
+        self.reads += 1
+        return self.clicmd(command, True) or ''
+
+    @property
+    def vlans(self):
+        if self._vlans is None:
+            self._vlans = parse_vlans(self.show('show vlan'))
+        return self._vlans
+
+    @property
+    def vlan_ports(self):
+        if self._vlan_ports is None:
+            self._vlan_ports = parse_vlan_ports(self.show('show configuration vlan'))
+        return self._vlan_ports
+
+    @property
+    def accounts(self):
+        if self._accounts is None:
+            self._accounts = parse_accounts(self.show('show accounts'))
+        return self._accounts
+
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = parse_image(self.show('show version'))
+        return self._image
+
+    @property
+    def port_states(self):
+        if self._port_states is None:
+            self._port_states = parse_port_states(self.show('show ports no-refresh'))
+        return self._port_states
+
+    @property
+    def hardware(self):
+        if self._hardware is None:
+            self._hardware = discover(self.show)
+        return self._hardware
+
+    def has_vlan(self, name):
+        return name.lower() in self.vlans
+
+    def vlan_tags(self):
+        return set(tag for name, tag in self.vlans.values())
+
+    def has_account(self, name):
+        return name.lower() in self.accounts
+
+    def ports_in_vlan(self, name):
+        return sorted(port for port, vlans in self.vlan_ports.items() if name.lower() in vlans)
+
+    def invalidate(self):
+        '''
+        This function drops everything that was cached so the next lookup reads the switch again
+        '''
+        self._vlans = None
+        self._vlan_ports = None
+        self._accounts = None
+        self._image = None
+        self._port_states = None
+        self._hardware = None
+
+    def note_command(self, command):
+        '''
+        This function updates the cache for a command the script applied to the switch
+        Writes the cache does not understand drop the affected area instead of guessing.
+        '''
+        command = command.strip()
+        match = CREATE_VLAN_RE.match(command)
+        if match:
+            if self._vlans is not None:
+                self._vlans[match.group(1).lower()] = (match.group(1), match.group(2))
+            return
+        match = VLAN_TAG_RE.match(command)
+        if match:
+            if self._vlans is not None:
+                self._vlans[match.group(1).lower()] = (match.group(1), match.group(2))
+            return
+        match = DELETE_VLAN_RE.match(command)
+        if match:
+            if self._vlans is not None:
+                self._vlans.pop(match.group(1).lower(), None)
+            if self._vlan_ports is not None:
+                for vlans in self._vlan_ports.values():
+                    vlans.pop(match.group(1).lower(), None)
+            return
+        match = VLAN_MEMBER_RE.match(command)
+        if match and is_port_list(match.group(3)):
+            if self._vlan_ports is not None:
+                name = match.group(1).lower()
+                for port in expand_ports(match.group(3)):
+                    if match.group(2).lower() == 'add':
+                        self._vlan_ports.setdefault(port, {})[name] = (match.group(4) or 'untagged').lower()
+                    else:
+                        self._vlan_ports.get(port, {}).pop(name, None)
+            return
+        match = DELETE_ACCOUNT_RE.match(command)
+        if match:
+            if self._accounts is not None:
+                self._accounts.discard(match.group(1).lower())
+            return
+        words = command.lower().split()
+        if 'account' in words:
+            self._accounts = None
+        if 'vlan' in words or ('ports' in words and ('add' in words or 'delete' in words)):
+            self._vlan_ports = None
+        if words[:2] in (['enable', 'ports'], ['disable', 'ports']) or 'partition' in words:
+            self._port_states = None
+        if words and words[0] in ('download', 'install'):
+            self._image = None
@@ -0,0 +1,88 @@
+#
+# Command templates for the exos_configurator scripts.
+#
+# These are the plans built by option 10 of version 1.4 and option 4 of version 1.5. The command lines themselves are profiles in
+# exoslib/profiles.py; this module adds the VLANs and the uplink handling around them. Both the scripts on the switch and the
+# offline tools render from here, so a template change only has to be made once.
+#
+
+from exoslib.ports import PortSet
+from exoslib.profiles import render
+
+SITE_IPS = {
+    'radius_pri': '10.0.0.1',
+    'radius_sec': '10.0.0.2',
+    'syslog_pri': '10.0.0.3',
+    'syslog_sec': '10.0.0.4',
+}
+
+# This is the default VLAN name to ID mapping used by version 1.5
+DEFAULT_VLANS = {
+    'Staff': '10',
+    'Student': '5',
+    'AV': '15',
+    'VoIP': '99',
+}
+
+BANNER = '*****Unauthorized access is prohibited:  All attempts logged*****'
+
+def gateway_for(switch_ip):
+    '''
+    This function returns the default gateway for a switch IP, which is always .254 in the same subnet
+    '''
+    return '254'.join(switch_ip.rsplit(switch_ip.split('.')[3], 1))
+
+def site_servers(hostname):
+    '''
+    This function returns (syslog, radius primary, radius secondary) based on the location in the hostname, or None if unknown
+    '''
+    if 'hmd' in hostname.lower():
+        return SITE_IPS['syslog_pri'], SITE_IPS['radius_pri'], SITE_IPS['radius_sec']
+    elif 'wst' in hostname.lower():
+        return SITE_IPS['syslog_sec'], SITE_IPS['radius_sec'], SITE_IPS['radius_pri']
+    return None
+
+def commands_1_4(**settings):
+    '''
+    This function returns the version 1.4 edge closet commands
+    '''
+    return render('1.4 edge closet', settings)
+
+def commands_1_5(**settings):
+    '''
+    This function returns the version 1.5 LACP uplink stack commands
+    '''
+    return render('1.5 LACP uplink stack', settings)
+
+def vlan_commands(vlans, uplink):
+    '''
+    This function returns the commands that create the VLANs and tag them on the uplink
+    '''
+    commands = []
+    for vlan in vlans:
+        commands.append('create vlan {} tag {}'.format(vlan, vlans[vlan]))
+        commands.append('configure vlan {} add ports {} tagged'.format(vlan, uplink))
+    return commands
+
+def plan_1_4(vlans, uplink, **settings):
+    '''
+    This function returns the full version 1.4 plan for a switch that has none of the VLANs yet
+    The uplink is taken out of the edge port range, so the edge settings are never applied to it and there is nothing to undo
+    on a copper uplink. When every edge port is an uplink the edge port commands are left out.
+    '''
+    settings['ports'] = str(PortSet.parse(settings['ports']) - PortSet.parse(uplink))
+    plan = vlan_commands(vlans, uplink)
+    plan.extend(commands_1_4(**settings))
+    return plan
+
+def plan_1_5(vlans=None, **settings):
+    '''
+    This function returns the full version 1.5 plan for a switch that has none of the VLANs yet
+    '''
+    plan = vlan_commands(DEFAULT_VLANS if vlans is None else vlans, '1:57-60')
+    for command in commands_1_5(**settings):
+        if 'configure banner before-login save-to-configuration' in command:
+            plan.append((command, BANNER))
+        else:
+            plan.append(command)
+    return plan
@@ -0,0 +1,81 @@
+#
+# Build tracing for the exos_configurator scripts.
+#
+# TracedCLI wraps clicmd and records the wall time, result and output size of every call. It keeps a live progress line on the
+# console, appends one JSON object per call to a trace file in /usr/local/ext and prints the slowest calls at the end. In batch
+# mode a whole chunk is one "load script" call, so use --per-command together with --trace to time individual template lines.
+# Secrets are masked before a command is recorded, and calls from other threads are recorded one at a time.
+#
+
+import json
+import os
+import sys
+import threading
+import time
+
+from exoslib.commands import redact
+
+TRACE_DIR = '/usr/local/ext'
+
+class TracedCLI(object):
+    '''
+    This class is a drop-in replacement for clicmd that records every call
+    '''
+    def __init__(self, clicmd, path=None, progress=True):
+        self.clicmd = clicmd
+        self.path = path or os.path.join(TRACE_DIR, 'exos_configurator_trace_{}.jsonl'.format(time.strftime('%Y%m%d_%H%M%S')))
+        self.progress = progress
+        self.records = []
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.trace = open(self.path, 'a')
+
+    def __call__(self, command, *args, **kwargs):
+        start = time.time()
+        output = None
+        error = None
+        try:
+            output = self.clicmd(command, *args, **kwargs)
+            return output
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.record(command, time.time() - start, error, output)
+
+    def record(self, command, elapsed, error, output):
+        '''
+        This function stores one call, appends it to the trace file and updates the progress line
+        '''
+        command = redact(command)
+        with self.lock:
+            record = {
+                'seq': len(self.records) + 1,
+                'time': round(time.time(), 3),
+                'command': command,
+                'elapsed': round(elapsed, 4),
+                'ok': error is None,
+                'error': redact(error) if error else error,
+                'output_bytes': len(output) if isinstance(output, str) else 0,
+            }
+            self.records.append(record)
+            self.trace.write(json.dumps(record) + '\n')
+            self.trace.flush()
+            if self.progress:
+                line = '[{}] {:6.2f}s {}'.format(record['seq'], elapsed, command)[:78]
+                sys.stdout.write('\r{:<78}'.format(line))
+                sys.stdout.flush()
+
+    def summary(self, count=10):
+        '''
+        This function prints the totals and the slowest calls so far
+        '''
+        if self.progress:
+            sys.stdout.write('\n')
+        total = sum(record['elapsed'] for record in self.records)
+        failed = sum(1 for record in self.records if not record['ok'])
+        print('{} call(s) in {:.2f}s ({:.2f}s in clicmd), {} failed'.format(len(self.records), time.time() - self.started, total, failed))
+        print('Slowest calls:')
+        for record in sorted(self.records, key=lambda record: record['elapsed'], reverse=True)[:count]:
+            print('  {:8.3f}s  {}{}'.format(record['elapsed'], record['command'], '' if record['ok'] else '  \033[41mfailed\033[0m'))
+        print('Trace written to {}'.format(self.path))
@@ -0,0 +1,94 @@
+#
+# Post-apply verification for the exos_configurator scripts.
+#
+# After the build the running configuration is read back with one "show configuration detail" call and indexed the same way the
+# incremental apply does. Every setting the plan intended is then checked against that index, grouped by feature, and printed as
+# a pass/fail report. Actions that leave nothing in the configuration (save, deleting accounts, prompting commands) are not
+# checked. EXOS prints "ports all" as the switch's port list, so those commands are checked against the discovered ports, and
+# commands EXOS prints in another form, or "ports all" without discovered hardware, are reported as not checked instead of
+# failed.
+#
+
+import re
+
+from exoslib.apply import command_text
+from exoslib.commands import effective_ports
+from exoslib.diff import RunningConfig, expand_all, line_satisfied, missing_ports
+from exoslib.ports import format_ports
+
+FEATURES = [
+    ('VLAN', re.compile(r'\bvlan\b|^configure default delete ports', re.IGNORECASE)),
+    ('SNMP', re.compile(r'\bsnmp', re.IGNORECASE)),
+    ('Syslog', re.compile(r'\bsyslog\b|\blog\b', re.IGNORECASE)),
+    ('RADIUS', re.compile(r'\bradius\b', re.IGNORECASE)),
+    ('STP', re.compile(r'\bstpd\b|\bs1\b', re.IGNORECASE)),
+    ('LLDP', re.compile(r'\blldp\b', re.IGNORECASE)),
+    ('Netlogin', re.compile(r'\bnetlogin\b', re.IGNORECASE)),
+    ('MAC locking', re.compile(r'\bmac-locking\b', re.IGNORECASE)),
+    ('Accounts', re.compile(r'\baccount\b', re.IGNORECASE)),
+]
+UNVERIFIABLE_RE = re.compile(r'^(save|reboot|download|use image|delete account)\b', re.IGNORECASE)
+# EXOS expands these in the configuration (all-tlvs is printed as one line per TLV), they cannot be compared line by line
+REWRITTEN_RE = re.compile(r'\badvertise all-tlvs\b', re.IGNORECASE)
+
+def feature_of(command):
+    '''
+    This function returns the feature a command belongs to
+    '''
+    for feature, pattern in FEATURES:
+        if pattern.search(command):
+            return feature
+    return 'Other'
+
+def verify_plan(plan, config, all_ports=None):
+    '''
+    This function returns a list of (feature, command, missing ports, failed) for every setting of the plan
+    missing ports is None for commands without ports; failed is True when the setting is not in the running configuration and
+    None when it cannot be checked. all_ports is the PortSet of the switch, used for commands on "ports all".
+    '''
+    running = RunningConfig(config)
+    texts = []
+    unchecked = []
+    for command in plan:
+        expanded = expand_all(command_text(command), all_ports)
+        unchecked.append(expanded is None or bool(REWRITTEN_RE.search(command_text(command))))
+        texts.append(expanded or command_text(command))
+    results = []
+    for command, skip, (text, template, ports) in zip(plan, unchecked, effective_ports(texts)):
+        original = command_text(command)
+        if isinstance(command, tuple) or UNVERIFIABLE_RE.match(original):
+            continue
+        if skip:
+            results.append((feature_of(original), original, None, None))
+        elif ports is None:
+            results.append((feature_of(original), original, None, not line_satisfied(text, running)))
+        elif ports:
+            missing = missing_ports(template, ports, running)
+            results.append((feature_of(original), original, format_ports(missing) if missing else None, bool(missing)))
+    return results
+
+def print_report(results):
+    '''
+    This function prints the verification report per feature and returns True if every checked setting is in place
+    Settings that cannot be checked are listed but do not fail the build.
+    '''
+    checked = [result for result in results if result[3] is not None]
+    failed = [result for result in checked if result[3]]
+    unchecked = len(results) - len(checked)
+    color = '\033[92m' if not failed else '\033[41m'
+    print('{}Verification: {} of {} setting(s) in place{}\033[0m'.format(color, len(checked) - len(failed), len(checked), ', {} not checked'.format(unchecked) if unchecked else ''))
+    features = []
+    for feature, _, _, _ in results:
+        if feature not in features:
+            features.append(feature)
+    for feature in features:
+        checks = [result for result in checked if result[0] == feature]
+        missing = [result for result in checks if result[3]]
+        skipped = [result for result in results if result[0] == feature and result[3] is None]
+        status = 'SKIP' if not checks else ('\033[92mPASS\033[0m' if not missing else '\033[41mFAIL\033[0m')
+        print('  {:<12} {:>4}/{:<4} {}'.format(feature, len(checks) - len(missing), len(checks), status))
+        for _, command, ports, _ in missing:
+            print('    missing: {}{}'.format(command, ' (ports {})'.format(ports) if ports else ''))
+        for _, command, _, _ in skipped:
+            print('    not checked: {}'.format(command))
+    return not failed
@@ -0,0 +1,121 @@
+#
+# Shared helpers for the tests: the rendered version 1.4 and 1.5 plans and a fresh fake switch from bench/exsh.py.
+#
+
+import json
+import os
+import runpy
+import shutil
+import string
+import sys
+import tempfile
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+import exsh
+import exoslib.apply
+import exoslib.estimate
+import exoslib.journal
+from exoslib.apply import apply_commands
+from exoslib.diff import read_running_config
+from exoslib.hardware import discover
+from exoslib.templates import DEFAULT_VLANS, plan_1_4, plan_1_5
+
+# The scripts are written for the Python 2 interpreter on the switch
+if not hasattr(string, 'lowercase'):
+    string.lowercase = string.ascii_lowercase
+warnings.simplefilter('ignore', DeprecationWarning)
+
+SCRIPTS = {
+    '1.4': os.path.join(ROOT, 'exos_configurator_1-4.py'),
+    '1.5': os.path.join(ROOT, 'exos_configurator_1-5.py'),
+}
+ANSWERS = {
+    '1.4': {'switch_ip': '10.1.1.10', 'snmp_auth': 'authkey123', 'snmp_priv': 'privkey123', 'snmp_name': 'hmd-idf12', 'snmp_location': 'idf 12',
+            'radius_secret': 'radiussecret', 'admin_password': 'password', 'stack_amount': 2, 'edge_ports': 48, 'uplink': '1:49,2:49',
+            'vlans': {'Staff': 10, 'VoIP': 99}},
+    '1.5': {'switch_ip': '10.2.2.2', 'snmp_name': 'wst-a', 'stack_amount': 2},
+}
+# Only version 1.5 stages firmware
+OPTIONS = {'1.4': [], '1.5': ['--no-firmware']}
+VLANS_1_4 = {'Staff': '10', 'VoIP': '99'}
+ADMIN_HASH = '$5$abcdef$0123456789abcdefghijklmnopqrstuvwxyzABCDEFG'
+
+def settings_1_4(stack_amount=2):
+    return dict(
+        switch_ip='10.1.1.10',
+        gateway_ip='10.1.1.254',
+        snmp_name='hmd-idf12',
+        snmp_location='idf 12',
+        snmp_auth='authkey123',
+        snmp_priv='privkey123',
+        ports=','.join('{}:1-48'.format(slot) for slot in range(1, stack_amount + 1)),
+        syslog_ip='10.0.0.3',
+        facility='local4',
+        severity='info',
+        radius_primary='10.0.0.1',
+        radius_secondary='10.0.0.2',
+        radius_secret='radiussecret',
+        admin_password=ADMIN_HASH,
+    )
+
+def rendered_1_4(stack_amount=2):
+    '''
+    This function returns the version 1.4 plan for a stack with its uplinks on port 49 of the first and last member
+    '''
+    return plan_1_4(dict(VLANS_1_4), '1:49,{}:49'.format(stack_amount), **settings_1_4(stack_amount))
+
+def rendered_1_5(stack_amount=2):
+    '''
+    This function returns the version 1.5 plan for a stack with the default VLANs
+    '''
+    edge_ports = ','.join('{}:1-48'.format(slot) for slot in range(1, stack_amount + 1))
+    return plan_1_5(dict(DEFAULT_VLANS), switch_ip='10.2.2.2', gateway_ip='10.2.2.1', snmp_name='wst-a', stack_amount=stack_amount, edge_ports=edge_ports)
+
+class FakeBuild(object):
+    '''
+    This class is a fresh fake switch with a scratch folder for the scripts the apply engine writes
+    '''
+    def __init__(self, **kwargs):
+        self.switch = exsh.configure(**kwargs)
+        self.script_dir = tempfile.mkdtemp()
+
+    def close(self):
+        shutil.rmtree(self.script_dir, ignore_errors=True)
+
+    def apply(self, plan, **kwargs):
+        return apply_commands(plan, exsh.clicmd, script_dir=self.script_dir, **kwargs)
+
+    def running(self):
+        return read_running_config(exsh.clicmd)
+
+    def all_ports(self):
+        return discover(lambda command: exsh.clicmd(command, True)).all_ports()
+
+    def run(self, version, *options):
+        '''
+        This function runs a configurator script with an answer file against the fake switch and returns its exit code
+        '''
+        answers = os.path.join(self.script_dir, 'answers.json')
+        with open(answers, 'w') as answer_file:
+            json.dump(ANSWERS[version], answer_file)
+        saved = sys.argv, sys.stdout, exoslib.apply.SCRIPT_DIR, exoslib.journal.JOURNAL_DIR, exoslib.estimate.STATS_DIR
+        exoslib.apply.SCRIPT_DIR = exoslib.journal.JOURNAL_DIR = exoslib.estimate.STATS_DIR = self.script_dir
+        sys.argv = [SCRIPTS[version], '--answers', answers, '--no-preflight'] + OPTIONS[version] + list(options)
+        sys.stdout = self.output = open(os.path.join(self.script_dir, 'output.txt'), 'a')
+        try:
+            runpy.run_path(SCRIPTS[version], run_name='__main__')
+            code = 0
+        except SystemExit as e:
+            code = e.code or 0
+        finally:
+            self.output.close()
+            sys.argv, sys.stdout, exoslib.apply.SCRIPT_DIR, exoslib.journal.JOURNAL_DIR, exoslib.estimate.STATS_DIR = saved
+        return code
+
+    def output_text(self):
+        with open(os.path.join(self.script_dir, 'output.txt')) as output:
+            return output.read()
@@ -0,0 +1,69 @@
+#
+# Tests for reading answer files.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from exoslib import answers
+from exoslib.answers import answer, ask, parse_simple_yaml, read_answers
+
+SITE = '''switch_ip: 10.1.1.10
+uplink: 1:52
+admin_password: 0123
+snmp_location: yes
+stack_amount: 2
+reboot: yes
+confirm: false
+vlans:
+  Staff: 010
+  VoIP: 99
+'''
+
+class AnswersTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def read(self, name, text):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as answer_file:
+            answer_file.write(text)
+        return read_answers(path)
+
+    def check_site(self, values):
+        self.assertEqual(answer(values, 'uplink'), '1:52')
+        self.assertEqual(answer(values, 'admin_password'), '0123')
+        self.assertEqual(answer(values, 'snmp_location'), 'yes')
+        self.assertEqual(answer(values, 'stack_amount'), '2')
+        self.assertEqual(values['vlans'], {'Staff': '010', 'VoIP': '99'})
+        self.assertEqual(ask(values, 'reboot', ''), 'y')
+        self.assertEqual(ask(values, 'confirm', ''), 'n')
+
+    @unittest.skipIf(answers.yaml is None, 'PyYAML is not installed')
+    def test_yaml_values_stay_strings(self):
+        self.check_site(self.read('site.yaml', SITE))
+
+    def test_built_in_reader(self):
+        self.check_site(parse_simple_yaml(SITE))
+
+    def test_json_booleans_answer_questions(self):
+        values = self.read('site.json', '{"reboot": true, "confirm": false, "stack_amount": 2}')
+        self.assertEqual(ask(values, 'reboot', ''), 'y')
+        self.assertEqual(ask(values, 'confirm', ''), 'n')
+        self.assertEqual(ask(values, 'resume', '', 'y'), 'y')
+        self.assertEqual(answer(values, 'stack_amount'), '2')
+
+    def test_not_a_mapping(self):
+        self.assertRaises(ValueError, self.read, 'list.yaml', '- 10.1.1.10\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#
+# Tests for reading plaintext credentials for exos_credentials.py rotate --from.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from exoslib import answers
+from exos_credentials import read_credentials
+
+class ReadCredentialsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def write(self, name, text):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as source:
+            source.write(text)
+        return path
+
+    @unittest.skipIf(answers.yaml is None, 'PyYAML is not installed')
+    def test_yaml_values_are_kept_as_typed(self):
+        path = self.write('secrets.yaml', 'radius_secret: yes\nadmin_password: 0123\nsnmp_auth: 1:52\n')
+        self.assertEqual(read_credentials(path), {'radius_secret': 'yes', 'admin_password': '0123', 'snmp_auth': '1:52'})
+
+    def test_json_strings(self):
+        path = self.write('secrets.json', '{"radius_secret": "yes", "admin_password": "0123"}')
+        self.assertEqual(read_credentials(path), {'radius_secret': 'yes', 'admin_password': '0123'})
+
+    def test_json_numbers_and_booleans_are_rejected(self):
+        for text in ('{"admin_password": 123}', '{"radius_secret": true}', '{"snmp_auth": null}'):
+            self.assertRaises(ValueError, read_credentials, self.write('secrets.json', text))
+
+    @unittest.skipIf(answers.yaml is None, 'PyYAML is not installed')
+    def test_yaml_lists_are_rejected(self):
+        self.assertRaises(ValueError, read_credentials, self.write('secrets.yaml', 'radius_secret:\n  - one\n  - two\n'))
+
+if __name__ == '__main__':
+    unittest.main()
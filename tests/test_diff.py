@@ -0,0 +1,73 @@
+#
+# Tests for the incremental apply, run against the fake exsh in bench/exsh.py.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import unittest
+
+from plans import FakeBuild, rendered_1_4, rendered_1_5
+from exoslib.diff import compute_delta, expand_all
+from exoslib.ports import PortSet
+
+class DeltaTest(unittest.TestCase):
+    def build(self, **kwargs):
+        build = FakeBuild(**kwargs)
+        self.addCleanup(build.close)
+        return build
+
+    def test_expand_all(self):
+        ports = PortSet.parse('1:1-52,2:1-52')
+        self.assertEqual(expand_all('enable lldp port all', ports), 'enable lldp ports 1:1-52,2:1-52')
+        self.assertEqual(expand_all('configure Default delete ports all', ports), 'configure Default delete ports all')
+        self.assertEqual(expand_all('enable ssh2', ports), 'enable ssh2')
+        self.assertIsNone(expand_all('enable lldp port all', None))
+
+    def test_rerun_1_4_is_empty(self):
+        build = self.build(stack_amount=2)
+        plan = rendered_1_4()
+        self.assertEqual(build.apply(plan), [])
+        self.assertEqual(compute_delta(plan, build.running(), build.all_ports()), [])
+
+    def test_rerun_1_5_is_empty(self):
+        build = self.build(stack_amount=2)
+        # The 1.5 plan expects the ELRP VLAN to exist on the switch already
+        build.apply(['create vlan ElrpVlan'])
+        plan = rendered_1_5()
+        self.assertEqual(build.apply(plan), [])
+        self.assertEqual(compute_delta(plan, build.running(), build.all_ports()), [])
+
+    def test_ports_all_without_hardware_is_sent(self):
+        build = self.build(stack_amount=2)
+        build.apply(['enable lldp port all'])
+        self.assertEqual(compute_delta(['enable lldp port all'], build.running()), ['enable lldp port all'])
+
+    def test_ports_all_partly_in_place(self):
+        build = self.build(stack_amount=2)
+        build.apply(['enable lldp ports 1:1-52'])
+        self.assertEqual(compute_delta(['enable lldp port all'], build.running(), build.all_ports()), ['enable lldp ports 2:1-52'])
+
+    def test_delta_converges(self):
+        for render in (rendered_1_4, rendered_1_5):
+            build = self.build(stack_amount=2)
+            build.apply(['create vlan ElrpVlan'])
+            plan = render()
+            build.apply(plan[:len(plan) // 2])
+            delta = compute_delta(plan, build.running(), build.all_ports())
+            self.assertTrue(delta)
+            self.assertLess(len(delta), len(plan))
+            self.assertEqual(build.apply(delta), [])
+            self.assertEqual(compute_delta(plan, build.running(), build.all_ports()), [])
+
+    def test_delta_adds_missing_ports(self):
+        build = self.build(stack_amount=2)
+        plan = rendered_1_4()
+        voice = 'configure vlan VoIP add ports 1:1-48,2:1-48 tagged'
+        build.apply([voice.replace('1:1-48,2:1-48', '1:1-48') if command == voice else command for command in plan])
+        delta = compute_delta(plan, build.running(), build.all_ports())
+        self.assertEqual(delta, ['configure vlan VoIP add ports 2:1-48 tagged'])
+        build.apply(delta)
+        self.assertEqual(compute_delta(plan, build.running(), build.all_ports()), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#
+# Tests for reading fleet inventories.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import exos_fleet_compiler
+from exos_fleet_compiler import build_settings, read_inventory
+
+class InventoryTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def write(self, name, text):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as inventory:
+            inventory.write(text)
+        return path
+
+    def test_csv_rows(self):
+        path = self.write('inventory.csv', 'hostname,ip,stack,uplinks\nhmd-idf1,10.1.1.10,2,1:49\n')
+        rows = list(read_inventory(path))
+        self.assertEqual([(row['hostname'], row['uplinks']) for row in rows], [('hmd-idf1', '1:49')])
+
+    @unittest.skipIf(exos_fleet_compiler.yaml is None, 'PyYAML is not installed')
+    def test_yaml_values_stay_strings(self):
+        path = self.write('inventory.yaml', '- hostname: hmd-idf1\n  ip: 10.1.1.10\n  stack: 2\n  uplinks: 1:49\n  vlans: {Staff: 010}\n---\nhostname: hmd-idf2\nip: 10.1.1.11\nuplinks: 1:50\n')
+        rows = list(read_inventory(path))
+        self.assertEqual([row['uplinks'] for row in rows], ['1:49', '1:50'])
+        settings = build_settings(rows[0], {}, '1.4')
+        self.assertEqual(settings['stack_amount'], 2)
+        self.assertEqual(settings['vlans'], {'Staff': '010'})
+
+if __name__ == '__main__':
+    unittest.main()
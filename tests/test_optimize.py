@@ -0,0 +1,80 @@
+#
+# Tests for the optimizer and the scheduler on the rendered version 1.4 and 1.5 plans, run against the fake exsh in bench/exsh.py.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import unittest
+
+from plans import FakeBuild, rendered_1_4, rendered_1_5
+from exoslib.apply import command_text
+from exoslib.diff import compute_delta
+from exoslib.optimize import optimize
+from exoslib.schedule import EFFECTS, FEATURES, GLOBAL_ENABLE, PORT_ENABLE, schedule, tag
+
+def effects(plan, feature):
+    '''
+    This function returns the effects of a feature's commands in plan order
+    '''
+    return [effect for command_feature, effect in (tag(command) for command in plan) if command_feature == feature]
+
+class OptimizeTest(unittest.TestCase):
+    def build(self, **kwargs):
+        build = FakeBuild(**kwargs)
+        self.addCleanup(build.close)
+        return build
+
+    def test_removed_counts(self):
+        self.assertEqual(optimize(rendered_1_4())[1], 3)
+        self.assertEqual(optimize(rendered_1_5())[1], 3)
+
+    def test_merges(self):
+        optimized, _ = optimize(rendered_1_4())
+        self.assertIn('configure vlan 10,99 add ports 1:49,2:49 tagged', optimized)
+        self.assertIn('configure lldp ports 1:1-48,2:1-48 advertise port-description system-capabilities management-address', optimized)
+
+    def test_optimize_is_stable(self):
+        for plan in (rendered_1_4(), rendered_1_5()):
+            optimized, _ = optimize(plan)
+            self.assertEqual(optimize(optimized), (optimized, 0))
+
+    def test_optimized_plan_builds_the_same_switch(self):
+        for render in (rendered_1_4, rendered_1_5):
+            build = self.build(stack_amount=2)
+            build.apply(['create vlan ElrpVlan'])
+            plan = render()
+            self.assertEqual(build.apply(optimize(plan)[0]), [])
+            self.assertEqual(compute_delta(plan, build.running(), build.all_ports()), [])
+
+class ScheduleTest(unittest.TestCase):
+    def test_same_commands(self):
+        for plan in (rendered_1_4(), rendered_1_5(), optimize(rendered_1_4())[0]):
+            self.assertEqual(sorted(map(command_text, schedule(plan))), sorted(map(command_text, plan)))
+
+    def test_effects_in_order(self):
+        for plan in (rendered_1_4(), optimize(rendered_1_4())[0]):
+            scheduled = schedule(plan)
+            for feature, _ in FEATURES:
+                found = effects(scheduled, feature)
+                self.assertEqual(found, sorted(found, key=EFFECTS.index), feature)
+
+    def test_1_4_enables_come_last(self):
+        scheduled = schedule(optimize(rendered_1_4())[0])
+        self.assertEqual(effects(scheduled, 'MAC locking'), ['config', PORT_ENABLE, GLOBAL_ENABLE])
+        self.assertEqual(effects(scheduled, 'Netlogin')[-2:], [PORT_ENABLE, GLOBAL_ENABLE])
+        self.assertEqual(effects(scheduled, 'STP')[-1], GLOBAL_ENABLE)
+        self.assertLess(scheduled.index('configure stpd s1 ports link-type edge 1:1-48,2:1-48 edge-safeguard enable bpdu-restrict'), scheduled.index('enable stpd s1'))
+
+    def test_unscheduled_commands_keep_their_place(self):
+        plan = rendered_1_4()
+        scheduled = schedule(plan)
+        for index, command in enumerate(plan):
+            if tag(command)[0] is None:
+                self.assertEqual(scheduled[index], command)
+
+    def test_schedule_is_stable(self):
+        for plan in (rendered_1_4(), rendered_1_5()):
+            self.assertEqual(schedule(schedule(plan)), schedule(plan))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#
+# Tests for the port sets in exoslib/ports.py.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from exoslib.ports import PortSet, format_ports, parse_uplink, stack_ports
+
+class PortSetTest(unittest.TestCase):
+    def test_round_trips(self):
+        for text in ('1-48', '5', '1:1-48,2:1-48', '1:57,2:57', '1:1-52,8:1-52', '1:1,1:3,1:5-6', '48,50-52'):
+            self.assertEqual(str(PortSet.parse(text)), text)
+
+    def test_shortest_form(self):
+        self.assertEqual(str(PortSet.parse('2:5,1:3-4,1:1-2,1:4')), '1:1-4,2:5')
+        self.assertEqual(str(PortSet.parse('1, 2,3-5')), '1-5')
+        self.assertEqual(format_ports(['1:2', '1:1', '1:3']), '1:1-3')
+        self.assertEqual(format_ports([]), '')
+
+    def test_invalid(self):
+        for text in ('', '1:', 'a-b', '5-1', '1:1-48;2:1-48'):
+            self.assertRaises(ValueError, PortSet.parse, text)
+
+    def test_union(self):
+        self.assertEqual(str(PortSet.parse('1:1-24') | PortSet.parse('1:25-48,2:1')), '1:1-48,2:1')
+        self.assertEqual(str(PortSet.parse('1-5') | PortSet()), '1-5')
+
+    def test_difference(self):
+        edge = PortSet.parse('1:1-52,2:1-52')
+        self.assertEqual(str(edge - PortSet.parse('1:49,2:49')), '1:1-48,1:50-52,2:1-48,2:50-52')
+        self.assertEqual(str(edge - PortSet.parse('1:1-52')), '2:1-52')
+        self.assertFalse(edge - edge)
+        self.assertEqual(PortSet.parse('3:1-4') - edge, PortSet.parse('3:1-4'))
+
+    def test_intersection(self):
+        self.assertEqual(str(PortSet.parse('1:1-48,2:1-48') & PortSet.parse('1:40-52,2:49')), '1:40-48')
+        self.assertFalse(PortSet.parse('1:1-4') & PortSet.parse('2:1-4'))
+
+    def test_set_laws(self):
+        first = PortSet.parse('1:1-10,1:20-30,2:5')
+        second = PortSet.parse('1:8-22,2:1-52')
+        self.assertEqual((first - second) | (first & second), first)
+        self.assertFalse((first - second) & second)
+        self.assertEqual(len(first | second), len(first) + len(second) - len(first & second))
+        self.assertTrue((first & second).issubset(first))
+
+    def test_contains_and_iteration(self):
+        ports = PortSet.parse('1:1-3,2:49')
+        self.assertIn('1:2', ports)
+        self.assertIn('2:49', ports)
+        self.assertNotIn('2:1', ports)
+        self.assertNotIn('bogus', ports)
+        self.assertEqual(list(ports), ['1:1', '1:2', '1:3', '2:49'])
+        self.assertEqual(ports.numbers(), set([1, 2, 3, 49]))
+
+    def test_stack(self):
+        self.assertEqual(stack_ports(1, 48), '1-48')
+        self.assertEqual(stack_ports(1, 48, slotted=True), '1:1-48')
+        self.assertEqual(stack_ports(3, 48), '1:1-48,2:1-48,3:1-48')
+        self.assertEqual(len(PortSet.stack(8, 48)), 384)
+        self.assertEqual(len(PortSet.stack(8, 48).slots[8]), 1)
+
+    def test_parse_uplink(self):
+        self.assertEqual(str(parse_uplink('1:52', 1)), '52')
+        self.assertEqual(str(parse_uplink('1:49,2:49', 2)), '1:49,2:49')
+        self.assertRaises(ValueError, parse_uplink, '49', 2)
+        self.assertRaises(ValueError, parse_uplink, '3:49', 2)
+
+if __name__ == '__main__':
+    unittest.main()
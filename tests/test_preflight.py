@@ -0,0 +1,111 @@
+#
+# Tests for the pre-flight reachability checks, run against local stand-ins for the ping and the fake exsh in bench/exsh.py.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import os
+import sys
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+import exsh
+from exoslib.preflight import management_address, ping_check, print_results, run_checks, targets
+
+PLAN = [
+    'configure vlan NetMgmt ipaddress 10.1.1.10 255.255.255.0',
+    'configure iproute add default 10.1.1.1',
+    'configure radius mgmt-access 1 server 10.0.0.5 client-ip 10.1.1.10 vr VR-Default',
+    'configure radius netlogin 1 server 10.0.0.5 client-ip 10.1.1.10 vr VR-Default',
+    'configure syslog 10.0.0.9 vr VR-Default local0',
+    'configure sntp-client primary pool.ntp.org',
+]
+
+def stand_in(answers, delay=0, timeouts=None):
+    '''
+    This function returns a check that answers from a dictionary of host to (reachable, detail) after delay seconds
+    A check that takes longer than its timeout gives up when the timeout runs out, like a ping with fewer echo requests.
+    '''
+    def check(host, timeout):
+        if timeouts is not None:
+            timeouts.append(timeout)
+        if delay > timeout:
+            time.sleep(timeout)
+            return False, 'no replies'
+        time.sleep(delay)
+        return answers[host]
+    return check
+
+class PreflightTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def tearDown(self):
+        sys.stdout.close()
+        sys.stdout = self.saved
+
+    def test_targets_in_plan_order_without_repeats(self):
+        self.assertEqual(targets(PLAN), [('Gateway', '10.1.1.1'), ('RADIUS', '10.0.0.5'), ('Syslog', '10.0.0.9'), ('NTP', 'pool.ntp.org')])
+
+    def test_all_reachable_pass(self):
+        found = [('Gateway', '10.1.1.1'), ('RADIUS', '10.0.0.5')]
+        results = run_checks(found, stand_in({'10.1.1.1': (True, 'ok'), '10.0.0.5': (True, 'ok')}), budget=1)
+        self.assertEqual(results, [('Gateway', '10.1.1.1', True, 'ok'), ('RADIUS', '10.0.0.5', True, 'ok')])
+        self.assertTrue(print_results(results))
+
+    def test_unreachable_server_fails(self):
+        found = [('Gateway', '10.1.1.1'), ('RADIUS', '10.0.0.5')]
+        results = run_checks(found, stand_in({'10.1.1.1': (True, 'ok'), '10.0.0.5': (False, 'no replies')}), budget=1)
+        self.assertEqual(results[1], ('RADIUS', '10.0.0.5', False, 'no replies'))
+        self.assertFalse(print_results(results))
+
+    def test_slow_checks_share_one_budget(self):
+        found = [('Gateway', '10.1.1.1'), ('RADIUS', '10.0.0.5'), ('Syslog', '10.0.0.9')]
+        answers = dict((host, (True, 'ok')) for _, host in found)
+        timeouts = []
+        start = time.time()
+        results = run_checks(found, stand_in(answers, delay=2, timeouts=timeouts), budget=0.3)
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual([result[2] for result in results], [False, False, False])
+        self.assertTrue(all(timeout > 0.05 for timeout in timeouts))
+        self.assertFalse(print_results(results))
+
+    def test_slow_server_leaves_budget_for_the_rest(self):
+        found = [('Gateway', '10.1.1.1'), ('RADIUS', '10.0.0.5'), ('Syslog', '10.0.0.9')]
+        answers = dict((host, (True, 'ok')) for _, host in found)
+        check = stand_in(answers)
+        slow = stand_in(answers, delay=5)
+        results = run_checks(found, lambda host, timeout: (slow if host == '10.1.1.1' else check)(host, timeout), budget=0.3)
+        self.assertEqual([result[2] for result in results], [False, True, True])
+
+    def test_failing_check_is_unreachable(self):
+        def check(host, timeout):
+            raise RuntimeError('Error: ping failed')
+        self.assertEqual(run_checks([('Gateway', '10.1.1.1')], check, budget=1), [('Gateway', '10.1.1.1', False, 'Error: ping failed')])
+
+    def test_host_names_are_skipped(self):
+        results = run_checks([('NTP', 'pool.ntp.org')], stand_in({}), budget=1)
+        self.assertEqual(results, [('NTP', 'pool.ntp.org', None, 'not checked, not an IP address')])
+        self.assertTrue(print_results(results))
+
+    def test_ping_check_on_the_fake_switch(self):
+        switch = exsh.configure(unreachable=['10.0.0.5'])
+        check = ping_check(exsh.clicmd)
+        self.assertEqual(check('10.1.1.1', 5), (True, '2 of 2 replies'))
+        self.assertEqual(check('10.0.0.5', 5), (False, 'no replies'))
+        self.assertEqual(check('10.1.1.1', 0.5), (True, '1 of 1 replies'))
+        self.assertEqual(switch.log, ['ping count 2 vr VR-Default 10.1.1.1', 'ping count 2 vr VR-Default 10.0.0.5', 'ping count 1 vr VR-Default 10.1.1.1'])
+
+    def test_management_address(self):
+        exsh.configure()
+        self.assertIsNone(management_address(exsh.clicmd('show vlan', True)))
+        exsh.clicmd('configure vlan NetMgmt ipaddress 10.1.1.5/23')
+        self.assertEqual(management_address(exsh.clicmd('show vlan', True)), '10.1.1.5')
+
+if __name__ == '__main__':
+    unittest.main()
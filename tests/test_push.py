@@ -0,0 +1,105 @@
+#
+# Tests for the fleet push driver, run against the local fake switch in exoslib/fakeswitch.py.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exoslib.push
+from exoslib.fakeswitch import FakeSwitch
+from exoslib.push import DECLINED, SessionPool, push_fleet, push_host
+
+COMMANDS = ['create vlan Staff tag 10', 'configure vlan Staff add ports 1-48 untagged', 'enable ssh2', 'disable telnet']
+
+class FakeTime(object):
+    '''
+    This class stands in for the time module in exoslib.push and records the backoff sleeps instead of waiting
+    '''
+    def __init__(self):
+        self.sleeps = []
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+class PushTest(unittest.TestCase):
+    def start(self, **kwargs):
+        server = FakeSwitch(keep_log=True, **kwargs)
+        port = server.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        pool = SessionPool('tcp', port, timeout=5)
+        self.addCleanup(pool.close_all)
+        return server, pool
+
+    def fake_time(self):
+        clock = FakeTime()
+        saved = exoslib.push.time
+        exoslib.push.time = clock
+        self.addCleanup(setattr, exoslib.push, 'time', saved)
+        return clock
+
+    def test_push_reuses_one_session(self):
+        server, pool = self.start()
+        result = push_host(pool, 'sw1', '127.0.0.1', COMMANDS)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.applied, len(COMMANDS))
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(server.log, ['disable clipaging'] + COMMANDS)
+
+    def test_resume_at_interrupted_command(self):
+        # The third command received (the second plan command) drops the connection
+        server, pool = self.start(drops=[3])
+        clock = self.fake_time()
+        result = push_host(pool, 'sw1', '127.0.0.1', COMMANDS, retries=3, backoff=0.5)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(result.applied, len(COMMANDS))
+        self.assertEqual(clock.sleeps, [0.5])
+        # Nothing before the interrupted command is sent twice
+        self.assertEqual(server.log, ['disable clipaging', COMMANDS[0], 'disable clipaging'] + COMMANDS[1:])
+        self.assertEqual(pool.opened, 2)
+
+    def test_retry_backoff_gives_up(self):
+        # Every session is dropped on its first command after disable clipaging
+        server, pool = self.start(drops=[2, 4, 6, 8])
+        clock = self.fake_time()
+        result = push_host(pool, 'sw1', '127.0.0.1', COMMANDS, retries=3, backoff=1.0)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.attempts, 4)
+        self.assertEqual(clock.sleeps, [1.0, 2.0, 4.0])
+        self.assertIn('{} command(s) not sent'.format(len(COMMANDS)), result.error)
+
+    def test_save_is_confirmed(self):
+        server, pool = self.start()
+        result = push_host(pool, 'sw1', '127.0.0.1', COMMANDS + ['save'])
+        self.assertTrue(result.ok)
+        self.assertEqual(server.answers, [('save', 'y')])
+
+    def test_unexpected_confirmation_is_declined(self):
+        server, pool = self.start()
+        result = push_host(pool, 'sw1', '127.0.0.1', ['reboot', 'enable ssh2'])
+        self.assertFalse(result.ok)
+        self.assertEqual(server.answers, [('reboot', 'n')])
+        self.assertEqual([command for command, _ in result.failures], ['reboot'])
+        self.assertIn(DECLINED, result.failures[0][1])
+        self.assertEqual(result.applied, 1)
+
+    def test_fleet_reports_errors_per_host(self):
+        server, pool = self.start(fail='^configure bogus')
+        jobs = [('sw{}'.format(number), '127.0.0.1', COMMANDS + (['configure bogus'] if number == 2 else [])) for number in range(4)]
+        results = dict((result.host, result) for result in push_fleet(jobs, pool, workers=2))
+        self.assertEqual(sorted(results), ['sw0', 'sw1', 'sw2', 'sw3'])
+        self.assertEqual([host for host, result in sorted(results.items()) if not result.ok], ['sw2'])
+        self.assertEqual(server.commands, 4 * (len(COMMANDS) + 1) + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+#
+# Tests for resuming an interrupted build in batch mode, run with the configurator scripts against the fake exsh in bench/exsh.py.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import unittest
+
+from plans import FakeBuild
+
+class ResumeTest(unittest.TestCase):
+    def build(self, **kwargs):
+        build = FakeBuild(**kwargs)
+        self.addCleanup(build.close)
+        return build
+
+    def test_resume_1_4_after_interrupt(self):
+        build = self.build(stack_amount=2, interrupt='enable netlogin ports')
+        self.assertEqual(build.run('1.4'), 1)
+        self.assertIn('Build interrupted', build.output_text())
+        self.assertEqual(build.run('1.4'), 0)
+        output = build.output_text().split('Build interrupted')[1]
+        self.assertIn('Configuration built', output)
+        self.assertNotIn('There were errors', output)
+        self.assertNotIn('built with errors', output)
+
+    def test_resume_1_5_after_interrupt(self):
+        build = self.build(stack_amount=2, interrupt='enable tech-support collector')
+        # The 1.5 plan expects the ELRP VLAN to exist on the switch already
+        build.apply(['create vlan ElrpVlan'])
+        self.assertEqual(build.run('1.5'), 1)
+        self.assertEqual(build.run('1.5'), 0)
+        output = build.output_text().split('Build interrupted')[1]
+        self.assertIn('Configuration built', output)
+        self.assertNotIn('There were errors', output)
+        self.assertNotIn('built with errors', output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#
+# Tests for the configuration snapshot and the confirm timer, run against the fake exsh in bench/exsh.py.
+#
+# Usage: python -m pytest tests    or    python -m unittest discover tests
+#
+
+import unittest
+
+from plans import exsh
+from exoslib.firmware import IMAGE_VERSION, STAGED, stage_image
+from exoslib.rollback import Rollback
+
+OLD_IMAGE = '30.7.1.1'
+
+class RollbackTest(unittest.TestCase):
+    def staged(self):
+        '''
+        This function returns a fake switch with the target image staged on its secondary partition
+        '''
+        switch = exsh.configure(image=OLD_IMAGE)
+        switch.partitions['secondary'] = IMAGE_VERSION
+        self.assertEqual(stage_image(exsh.clicmd)[0], STAGED)
+        self.assertEqual(switch.selected, 'secondary')
+        return switch
+
+    def test_restore_boots_the_running_image(self):
+        switch = self.staged()
+        rollback = Rollback(exsh.clicmd)
+        rollback.save()
+        rollback.restore()
+        self.assertEqual(switch.log[-2:], ['use image primary', 'reboot'])
+        self.assertEqual(switch.image, OLD_IMAGE)
+        self.assertEqual(switch.config_selected, 'exos_configurator_rollback')
+
+    def test_armed_reboot_boots_the_running_image(self):
+        switch = self.staged()
+        rollback = Rollback(exsh.clicmd)
+        rollback.save()
+        rollback.arm(5)
+        self.assertEqual(switch.selected, 'primary')
+        # Nobody confirms, the switch reboots at the scheduled time
+        switch.reboot()
+        self.assertEqual(switch.image, OLD_IMAGE)
+
+    def test_confirm_selects_the_staged_image(self):
+        switch = self.staged()
+        rollback = Rollback(exsh.clicmd)
+        rollback.save()
+        rollback.arm(5)
+        rollback.confirm()
+        self.assertIsNone(switch.reboot_at)
+        self.assertEqual(switch.selected, 'secondary')
+        self.assertEqual(switch.config_selected, 'primary')
+
+    def test_no_image_commands_without_staging(self):
+        switch = exsh.configure()
+        rollback = Rollback(exsh.clicmd)
+        rollback.save()
+        rollback.arm(5)
+        rollback.restore()
+        self.assertFalse([command for command in switch.log if command.startswith('use image')])
+
+if __name__ == '__main__':
+    unittest.main()